@@ -1,10 +1,19 @@
-from kaggle_environments.envs.halite.helpers import *
+try:
+    from kaggle_environments.envs.halite.helpers import *
+except ImportError:
+    # Offline builds play on the local engine
+    from engine import *
+from snapshot import BoardSnapshot
+from overlay import TurnOverlay
+from logger import Logger, INFO
 
 class Decesion_Ship:
-    def __init__(self, board, ship, step):
+    def __init__(self, board, ship, step, snapshot):
         self.board = board
         self.step = step
         self.ship = ship
+        # The ships and shipyards are read from the snapshot, which holds the moves committed so far
+        self.snapshot = snapshot
         self.ship_halite = ship.cell.halite
         self.keywords = ['GET_AWAY', 'DONT_GO']
         # player
@@ -17,7 +26,7 @@ class Decesion_Ship:
         
     def determine(self):
         
-        if len(self.player.shipyards) == 0:
+        if len(self.snapshot.my_shipyards()) == 0:
             return self.moves['convert']
         
         if (self.step >= 395 or self.near_end()) and self.ship.halite > 500:
@@ -29,7 +38,7 @@ class Decesion_Ship:
         weights = self.weight_moves()
 
         # sorted_weights = {k: v for k, v in sorted(weights.items(), key=lambda item: item[1], reverse=True)}
-        # log('  -> weights: ' + str(sorted_weights))
+        # logger.debug('  -> weights: %s', sorted_weights)
         
         if len(weights) > 0:
             max_move = max(weights, key=weights.get)
@@ -78,18 +87,18 @@ class Decesion_Ship:
         """
         # If there was a ship/shipyard in E,N,W,or E
         for Dir, cell in self.grid["1"].items():
-            cell_ship = cell.ship
-            cell_yard = cell.shipyard
+            index = self.snapshot.index(cell.position)
+            owner = self.snapshot.ship_owner[index]
             
             # If there is a ship:
-            if cell_ship != None:
+            if owner != -1:
                 # If it is one of my ships
-                if cell_ship.id in self.player.ship_ids:
+                if owner == self.snapshot.me:
                     # 'DONT_GO'
                     del self.moves[Dir]
                 else:
                     myCargo = self.ship.halite
-                    oppCargo = cell_ship.halite
+                    oppCargo = self.snapshot.ship_cargo[index]
                     # If I had more cargo then get_away
                     if oppCargo < myCargo:
                         # 'GET_AWAY'
@@ -103,25 +112,25 @@ class Decesion_Ship:
     def weight_cell(self, cell):
         """ Weights a cell only based on its properties and relative halite. """
         w = 0
-        cell_ship = cell.ship
-        cell_yard = cell.shipyard
+        index = self.snapshot.index(cell.position)
+        ship_owner, yard_owner = self.snapshot.ship_owner[index], self.snapshot.shipyard_owner[index]
         
         w += (cell.halite - self.ship_halite) + 2
         
-        if cell_ship != None:
-            if cell_ship.id in self.player.ship_ids:
-                w += cell_ship.halite * -10
+        if ship_owner != -1:
+            if ship_owner == self.snapshot.me:
+                w += float(self.snapshot.ship_cargo[index]) * -10
             else:
                 myCargo = self.ship.halite
-                oppCargo = cell_ship.halite
+                oppCargo = float(self.snapshot.ship_cargo[index])
                 
                 w += (oppCargo - myCargo) * 8
                 
-        if cell_yard != None:
-            if cell_yard.id in self.player.shipyard_ids:
+        if yard_owner != -1:
+            if yard_owner == self.snapshot.me:
                 w += ( self.ship.halite + 10) * 7
             else:
-                oppYards = len(cell_yard.player.shipyards)
+                oppYards = int((self.snapshot.shipyard_player == yard_owner).sum())
                 w += 1 / (oppYards + 1) * 10
         
         return round(w, 3)
@@ -203,17 +212,8 @@ def choose_between(l=[]):
     
     return random.choice([acts['N'], acts['W'],acts['E'],acts['S'], acts['mine']])
 
-def log(text, step=1):
-    if step == 0:
-        with open("log-a.txt", "w") as text_file:
-            text = str(text) + '\n'
-            text_file.write(text)
-    else:
-        with open("log-a.txt", "a") as text_file:
-            text = str(text) + '\n'
-            text_file.write(text)
-
-# log('logs:', 0)
+# Lines are buffered during the turn and written when it ends
+logger = Logger('log-a.txt', INFO)
 
 def agent(obs, config):
     # Make the board
@@ -223,21 +223,23 @@ def agent(obs, config):
     # Current player info
     me = board.current_player # Player Object
     
-    new_board = Board(obs,config)
-    # log('-----------------------------------------------------------------')
-    # log(step + 1)
+    # The snapshot follows the actions committed so far instead of simulating the board after each one of them
+    snapshot = BoardSnapshot(board)
+    overlay = TurnOverlay(snapshot, board.configuration.convert_cost, board.configuration.spawn_cost)
+    keys = {action: key for key, action in acts.items()}
+    # logger.info('%s|-----------------------------------------------------------------', step + 1)
     for ship in me.ships:
-        # log('ship-id:' + ship.id + ', pos:' + str(ship.position) + ', cargo: ' + str(ship.halite))
-#         decider = Decesion_Ship(new_board, ship, step)
-        decider = Decesion_Ship(new_board, new_board.ships[ship.id], step)
+        # logger.debug('ship-id:%s, pos:%s, cargo: %s', ship.id, ship.position, ship.halite)
+        decider = Decesion_Ship(board, ship, step, snapshot)
         ship.next_action = decider.determine()
         
-        new_board = board.next()
+        if ship.next_action is not None:
+            overlay.commit(ship.id, keys[ship.next_action])
     
     #Implement a pipeline where given that
     for shipyard in me.shipyards:
         # If there were no ships on the yard
-        if new_board.shipyards[shipyard.id].cell.ship == None and step < 392:
+        if snapshot.ship_owner[snapshot.index(shipyard.position)] == -1 and step < 392:
             if len(me.ships) == 0:
                 shipyard.next_action = acts['spawn']
 
@@ -247,7 +249,8 @@ def agent(obs, config):
             if step > 200 and me.halite > 10000 + len(me.ships) * 1000:
                 shipyard.next_action = acts['spawn']
         
-        new_board = board.next()
+        if shipyard.next_action is not None:
+            overlay.commit(shipyard.id, 'spawn')
 
-        
+    logger.flush()
     return me.next_actions
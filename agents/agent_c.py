@@ -1,5 +1,9 @@
 
-from kaggle_environments.envs.halite.helpers import *
+try:
+    from kaggle_environments.envs.halite.helpers import *
+except ImportError:
+    # Offline builds play on the local engine
+    from engine import *
 
 class Decesion_Ship:
     def __init__(self, board, ship, step):
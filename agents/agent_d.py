@@ -1,6 +1,13 @@
-from kaggle_environments.envs.halite.helpers import Board, ShipAction, ShipyardAction
+try:
+    from kaggle_environments.envs.halite.helpers import Board, ShipAction, ShipyardAction
+except ImportError:
+    # Offline builds play on the local engine
+    from engine import Board, ShipAction, ShipyardAction
 import pandas as pd
 import numpy as np
+from offsets import offset_table
+from snapshot import BoardSnapshot
+from overlay import TurnOverlay
 
 
 class DecisionShip:
@@ -10,19 +17,25 @@ class DecisionShip:
             board: the board that we will base our decisions on
             ship: the ship we are deciding for
             step: the steps into the stimulation
+            snapshot: the BoardSnapshot of the board, kept up with the actions committed earlier in the turn
         returns:
             determine: returns the next-action that should be taken
     """
-    def __init__(self, board: Board, ship_id, step):
+    def __init__(self, board: Board, ship_id, step, snapshot):
         self.board = board
+        self.snapshot = snapshot
         self.ship = board.ships[ship_id]
         self.step = step
 
         # Some usefull properties
         self.player = self.board.current_player
         self.ship_cargo = self.ship.halite
-        self.current_cell = self.ship.cell
         self.current_position = self.ship.position
+        self.current_index = snapshot.index(self.current_position)
+        self.current_halite = float(snapshot.halite[self.current_index])
+        # Player totals, projected by the actions committed earlier in the turn
+        self.player_halite = float(snapshot.player_halite[snapshot.me])
+        self.n_ships, self.n_shipyards = len(snapshot.my_ships()), len(snapshot.my_shipyards())
         
         # All moves ship can take
         self.moves = {"N": ShipAction.NORTH, 'S': ShipAction.SOUTH, 'W': ShipAction.WEST,
@@ -32,7 +45,7 @@ class DecisionShip:
         # Weights of different moves
         self.weights = {"N": 0, "E": 0, "W": 0, "S": 0, "mine": 0, "convert": 0, 'None': 0}
         # The cells around the main one
-        self.grid = grid(self.ship.cell)
+        self.grid = grid(self.current_index, snapshot.size)
         # Closest shipyard id and the distance
         self.closest_shipyard_id, self.closest_shipyard_distance = self.closest_shipyard()
         # Default move which is set to mining (None)
@@ -43,16 +56,8 @@ class DecisionShip:
         self.set_hyperparameters()
 
     def set_hyperparameters(self):
-        """ Initializes the hyperparameters that will affect the decision process """
-        self.MINING = 500 + (self.step // 50) * 80
-        self.DEPOSIT = 800 + (self.step // 300) * 300 + self.step // 380 * 800
-        self.ATTACK_ENEMY_SHIP = 600 - (self.step // 75) * 100
-        self.DIRECTION_ENCOURAGEMENT = 100 - (self.step // 120) * 20 
-        self.DISTRIBUTION = -500 + (self.step // 20) * 50
-        self.GET_AWAY = -500 + (self.step // 100) * 20
-        self.CLOSEST_SHIPYARD = 500 + (self.step // 60) * 100
-        self.CONVERSION = 80 - (self.step // 200) * 10
-        self.CARGO_THRESHHOLD = 600
+        """ Initializes the hyperparameters that will affect the decision process, read from the step's row """
+        self.__dict__.update(HYPERPARAMETERS[self.step] if self.step < len(HYPERPARAMETERS) else step_hyperparameters(self.step))
 
     def determine(self):
         """ Returns next action decided for the ship based on the observations that have been made. """
@@ -94,17 +99,17 @@ class DecisionShip:
     def weight_convert(self, base_threshold=400):
         """ Weights the option for ship conversion """
         # Calculating the threshhold
-        threshold = base_threshold + 600 * (len(self.player.shipyards) // 3)
+        threshold = base_threshold + 600 * (self.n_shipyards // 3)
         # 1. If they are no shipyards left
-        no_shipyards = len(self.player.shipyards) == 0
+        no_shipyards = self.n_shipyards == 0
         # 2. There will be a threshold for the amount of cargo any ship could have
-        threshhold_reach = self.ship.halite >= threshold
+        threshhold_reach = self.ship_cargo >= threshold
         # 3. On shipyard already
-        on_shipyard = self.ship.cell.shipyard is not None
+        on_shipyard = self.snapshot.shipyard_owner[self.current_index] != -1
 
         # self.Shipyards[self.closest_shipyard_id]['moves'] < 12
 
-        if self.player.halite + self.ship.halite >= 500:
+        if self.player_halite + self.ship_cargo >= 500:
             if no_shipyards and not on_shipyard:
                 self.weights['convert'] = 1e6
             elif not on_shipyard:
@@ -123,56 +128,59 @@ class DecisionShip:
         # See if any of the shipyards need defending
         self.shipyard_status()
 
+        snapshot, (keys, indices) = self.snapshot, self.grid
+
         # Iterate through different directions
-        for direction, cell in self.grid.items():
+        for direction, index in zip(keys, indices.tolist()):
             # Set the global direction to the one at hand
             self.current['dir'] = direction
-            self.current['cell'] = cell
+            self.current['index'] = index
+            halite = float(snapshot.halite[index])
 
             # 1. Evaluate the moves based on other objects present in the map
             # 1.1 If there was a ship
-            if cell.ship is not None:
+            if snapshot.ship_owner[index] != -1:
                 # If it was my ship
-                if cell.ship.id in self.player.ship_ids:
-                    self.distribute_ships(cell.ship_id)
+                if snapshot.ship_owner[index] == snapshot.me:
+                    self.distribute_ships(float(snapshot.ship_cargo[index]))
                 else:
-                    self.deal_enemy_ship(cell.ship_id)
+                    self.deal_enemy_ship(float(snapshot.ship_cargo[index]))
 
             # 1.2 If there was a shipyard
-            if cell.shipyard is not None:
-                if cell.shipyard.id in self.player.shipyard_ids:
+            if snapshot.shipyard_owner[index] != -1:
+                if snapshot.shipyard_owner[index] == snapshot.me:
                     self.deposit()
                 else:
-                    self.attack_enemy_shipyard(cell.shipyard_id)
+                    self.attack_enemy_shipyard()
 
             # 2. Trigger movement in the main four direction solely based on the amount of halite each cell has
-            main_dir_encourage = self.DIRECTION_ENCOURAGEMENT * self.grid[direction].halite + 10
+            main_dir_encourage = self.DIRECTION_ENCOURAGEMENT * halite + 10
             self.add_accordingly(main_dir_encourage, title='  main4: ', loging=False)
 
             # 3. Either encourage mining or discourage it by adding the difference between cells to the mine
-            mining_trigger = (self.current_cell.halite - self.grid[direction].halite) / len(direction)
+            mining_trigger = (self.current_halite - halite) / len(direction)
 
             self.weights['mine'] += mining_trigger
 
         # The correlation of the mining with cell's halite
-        self.weights['mine'] += self.current_cell.halite * self.MINING
+        self.weights['mine'] += self.current_halite * self.MINING
 
-    def distribute_ships(self, ship_id):
-        """ This function lowers the ships tendency to densely populate an area """
+    def distribute_ships(self, cargo):
+        """ This function lowers the ships tendency to densely populate an area, cargo being the other ship's """
         if len(self.current['dir']) == 1: self.eliminated_moves.append(self.current['dir'])
 
-        distribution_encouragement = -10 * abs(self.ship_cargo - self.board.ships[ship_id].halite)
+        distribution_encouragement = -10 * abs(self.ship_cargo - cargo)
 
         self.add_accordingly(distribution_encouragement, title='Distribution', loging=False)
 
-    def deal_enemy_ship(self, ship_id):
+    def deal_enemy_ship(self, enemy_cargo):
         """ This function will evaluate to either attack or get_away from an enemy ship based on the 
         simple observation: If my ship had more cargo then I should not attack. """
         # If the ship's cargo was more than enemy's cargo and it was not equal to zero then get away otherwise attack
-        if self.ship_cargo > (self.board.ships[ship_id].halite + 0.4 * self.current['cell'].halite):
-            self.get_away(cargo_diff=abs(self.board.ships[ship_id].halite - self.ship_cargo))
+        if self.ship_cargo > (enemy_cargo + 0.4 * float(self.snapshot.halite[self.current['index']])):
+            self.get_away(cargo_diff=abs(enemy_cargo - self.ship_cargo))
         else:
-            self.attack_enemy_ship(abs(self.board.ships[ship_id].halite - self.ship_cargo))
+            self.attack_enemy_ship(abs(enemy_cargo - self.ship_cargo))
 
     def attack_enemy_ship(self, diff):
         """ This function encourages attacking the enemy ship """
@@ -188,7 +196,7 @@ class DecisionShip:
             direction_discouragement = 0
         elif len(self.current['dir']) == 2:
             # When the enemy ship is two moves away, there should be a strong discouragement
-            direction_discouragement = 5 * self.GET_AWAY * (self.ship.halite  + 10)
+            direction_discouragement = 5 * self.GET_AWAY * (self.ship_cargo  + 10)
         else:
             direction_discouragement = self.GET_AWAY * cargo_diff
         
@@ -206,9 +214,9 @@ class DecisionShip:
             deposit_tendency = self.DEPOSIT * self.ship_cargo 
         self.add_accordingly(deposit_tendency, title='Deposit', loging=False)
 
-    def attack_enemy_shipyard(self, shipyard_id):
+    def attack_enemy_shipyard(self):
         """ Weights the tendency to attack the enemy shipyard. """
-        if len(self.player.ships) >= 2 and self.player.halite > 700 and self.ship_cargo < 30 and self.closest_shipyard_distance < 5:
+        if self.n_ships >= 2 and self.player_halite > 700 and self.ship_cargo < 30 and self.closest_shipyard_distance < 5:
             destory_shipyard = 1e4 / len(self.current['dir'])
             self.add_accordingly(destory_shipyard, title='Destroy_en_shipyard', loging=False)
         elif len(self.current['dir']) == 1 and self.ship_cargo > 100:
@@ -217,51 +225,52 @@ class DecisionShip:
     def go_to_closest_shipyard(self, value):
         """ Encourage movement towards the nearest shipyard """
         if self.closest_shipyard_id != 0.99: # Given that there is a closest shipyard
-            (x, y) = self.board.shipyards[self.closest_shipyard_id].position
+            (x, y) = self.snapshot.point(self.snapshot.shipyard_pos[self.snapshot.shipyard_lookup[self.closest_shipyard_id]])
 
-            if x > self.current_cell.position.x:
+            if x > self.current_position.x:
                 self.weights['E'] += value
-            elif x < self.current_cell.position.x:
+            elif x < self.current_position.x:
                 self.weights['W'] += value
 
-            if y > self.current_cell.position.y:
+            if y > self.current_position.y:
                 self.weights['N'] += value
-            elif y < self.current_cell.position.y:
+            elif y < self.current_position.y:
                 self.weights['S'] += value
 
     def shipyard_status(self):
         """ Measures tendency for the shipyards within the map """
-        if len(self.player.shipyards) != 0:
-            for shipyard in self.player.shipyards:
-                self.analyze_shipyard_surroundings(shipyard.id)
+        if self.n_shipyards != 0:
+            for shipyard_index in self.snapshot.my_shipyards().tolist():
+                self.analyze_shipyard_surroundings(shipyard_index)
 
-    def analyze_shipyard_surroundings(self, shipyard_id):
+    def analyze_shipyard_surroundings(self, shipyard_index):
         """ Analyzes the tendency to go toward a specific shipyard """
-        shipyard, value = self.board.shipyards[shipyard_id], 0
-        shipyard_grid = grid(shipyard.cell)
+        snapshot, value = self.snapshot, 0
+        position = int(snapshot.shipyard_pos[shipyard_index])
+        _, indices = grid(position, snapshot.size)
 
-        for direction, cell in shipyard_grid.items():
-            ship_id = shipyard_grid[direction].ship_id
+        for index in indices.tolist():
             # If there is a ship on that cell
-            if cell.ship is not None:
-                if cell.ship.id in self.player.ship_ids:
+            if snapshot.ship_owner[index] != -1:
+                if snapshot.ship_owner[index] == snapshot.me:
                     value += -1e4 / (self.ship_cargo + 0.99)
                 else:
-                    value += 1e4 /(cell.ship.halite + 0.99) 
+                    value += 1e4 /(float(snapshot.ship_cargo[index]) + 0.99) 
 
         # Don't discourage any move toward a shipyards
         if value > 0:
             currentDir = ""
+            shipyard = snapshot.point(position)
 
-            if shipyard.position.x > self.current_position.x:
-                currentDir += "E" * abs(shipyard.position.x - self.current_position.x)
-            elif shipyard.position.x < self.current_position.x:
-                currentDir += "W" * abs(shipyard.position.x - self.current_position.x)
+            if shipyard.x > self.current_position.x:
+                currentDir += "E" * abs(shipyard.x - self.current_position.x)
+            elif shipyard.x < self.current_position.x:
+                currentDir += "W" * abs(shipyard.x - self.current_position.x)
 
-            if shipyard.position.y > self.current_position.y:
-                currentDir += "S" * abs(shipyard.position.y - self.current_position.y)
-            elif shipyard.position.y < self.current_position.y:
-                currentDir += "N" * abs(shipyard.position.y - self.current_position.y)
+            if shipyard.y > self.current_position.y:
+                currentDir += "S" * abs(shipyard.y - self.current_position.y)
+            elif shipyard.y < self.current_position.y:
+                currentDir += "N" * abs(shipyard.y - self.current_position.y)
 
             if currentDir != "":
                 self.current['dir'] = currentDir
@@ -270,18 +279,18 @@ class DecisionShip:
     def closest_shipyard(self):
         """ Returns the closest shipyard's id """
         closest_id, diff = 0.99, 0.99
-        for shipyard in self.player.shipyards:
-            distance = self.measure_distance(shipyard.cell)
+        for shipyard_index in self.snapshot.my_shipyards().tolist():
+            distance = self.measure_distance(self.snapshot.point(self.snapshot.shipyard_pos[shipyard_index]))
             if diff > distance or diff == 0.99:
-                closest_id, diff = shipyard.id, distance
+                closest_id, diff = self.snapshot.shipyard_ids[shipyard_index], distance
         return closest_id, diff
     
     def measure_distance(self, dest):
         """ Measures the distance between two points """
-        x_1 = abs(self.current_cell.position.x - dest.position.x)
-        x_2 = abs(21 - self.current_cell.position.x + dest.position.x)
-        y_1 = abs(self.current_cell.position.y - dest.position.y)
-        y_2 = abs(21 - self.current_cell.position.y + dest.position.y)
+        x_1 = abs(self.current_position.x - dest.x)
+        x_2 = abs(21 - self.current_position.x + dest.x)
+        y_1 = abs(self.current_position.y - dest.y)
+        y_2 = abs(21 - self.current_position.y + dest.y)
 
         return min((x_1 + y_1), (x_1 + y_2), (x_2 + y_1), (x_2 + y_2))
     
@@ -290,7 +299,7 @@ class DecisionShip:
         count = 0
         # If the halite was less than 500 and it had no ships
         for opp in self.board.opponents:
-            if opp.halite < 500 and len(opp.ships) == 0 and self.player.halite > opp.halite: count += 1
+            if opp.halite < 500 and len(opp.ships) == 0 and self.player_halite > opp.halite: count += 1
             if opp.halite > 2000 and len(opp.ships) > 1: count -= 1
         # If count was more than 2 return True
         return count >= 2
@@ -312,15 +321,18 @@ class DecisionShip:
 
 
 class ShipyardDecisions:
-    def __init__(self, board: Board, player, step):
+    def __init__(self, board: Board, player, step, snapshot):
         """
             Decides the Shipyard's next action based on the given parameters
             board: The board that we will be observing
             step: step of the stimulation
+            snapshot: the BoardSnapshot of the board, kept up with the actions committed earlier in the turn
         """
         self.board = board
+        self.snapshot = snapshot
         self.player = player
-        self.player_halite = player.halite
+        # Projected by the actions committed earlier in the turn
+        self.player_halite = float(snapshot.player_halite[snapshot.me])
         self.step = step
         self.Shipyards = player.shipyards
         self.shipyard_tendencies = {}
@@ -343,12 +355,12 @@ class ShipyardDecisions:
         """ Iterates through the shipyards and weights their tendencies. """
         for shipyard in self.Shipyards:
             # Weighting will take place only when there are no ships on the cell
-            if shipyard.cell.ship is None:
-                weight = self.weight(grid(shipyard.cell))
+            if self.snapshot.ship_owner[self.snapshot.index(shipyard.position)] == -1:
+                weight = self.weight(self.snapshot.shipyard_lookup[shipyard.id])
 
                 self.shipyard_tendencies[shipyard.id] = weight
 
-    def weight(self, grid):
+    def weight(self, shipyard_index):
         """
             Weights shipyard's tendency to spawn solely based on the objects around it
             The weighting system is rather simple:
@@ -356,14 +368,15 @@ class ShipyardDecisions:
                 - If there was one of my own ships, then subtract from the weight
             Take the distance of the ship into account
         """
-        if len(self.board.current_player.ships) == 0: return 10
+        if len(self.snapshot.my_ships()) == 0: return 10
         if self.step < 70 and self.player_halite >= 500: return 10
 
-        value = 0
+        snapshot, value = self.snapshot, 0
+        keys, indices = grid(int(snapshot.shipyard_pos[shipyard_index]), snapshot.size)
         # Iterating through the grid
-        for direction, cell in grid.items():
-            if cell.ship is not None:
-                if cell.ship.id in self.player.ship_ids:
+        for direction, index in zip(keys, indices.tolist()):
+            if snapshot.ship_owner[index] != -1:
+                if snapshot.ship_owner[index] == snapshot.me:
                     value -= 120 / len(direction)
                 else:
                     value += 100 / len(direction)
@@ -371,93 +384,32 @@ class ShipyardDecisions:
                     if len(direction) == 1 and self.player_halite > 500: 
                         value += 1e3 
 
-            if cell.shipyard is not None:
-                if cell.shipyard.id in self.player.shipyard_ids:
-                    value += 200 / len(direction)
+            if snapshot.shipyard_owner[index] == snapshot.me:
+                value += 200 / len(direction)
 
         return round(value, 2)
 
-def grid(cell):
-    """ Returns a dictionary of cells which are in 10 moves distance of the given cell """
-    # The directions that are one move away
-    north, south, west, east = cell.north, cell.south, cell.west, cell.east
-    # The directions that are two moves away
-    n2, s2, w2, e2 = north.north, south.south, west.west, east.east
-    n3, s3, w3, e3 = n2.north, s2.south, w2.west, e2.east
-    n4, s4, w4, e4 = n3.north, s3.south, w3.west, e3.east
-    n5, s5, w5, e5 = n4.north, s4.south, w4.west, e4.east
-    n6, s6, w6, e6 = n5.north, s5.south, w5.west, e5.east
-    n7, s7, w7, e7 = n6.north, s6.south, w6.west, e6.east
-    n8, s8, w8, e8 = n7.north, s7.south, w7.west, e7.east
-    n9, s9, w9, e9 = n8.north, s8.south, w8.west, e8.east
-    n10, s10, w10, e10 = n9.north, s9.south, w9.west, e9.east
-
-    return {
-        # 1 move away
-        'N': north, 'S': south, 'W': west, 'E': east,
-        # 2 moves away
-        'NW': north.west, 'NE': north.east, 'SW': south.west, 'SE': south.east, 'WW': w2, 'EE': e2, 'NN': n2, 'SS': s2,
-        # 3 moves away
-        'SSS': s3, 'EEE': e3, 'WWW': w3, 'NNN': n3,
-        'ENN': n2.east, 'WNN': n2.west, 'ESS': s2.east, 'WSS': s2.west,
-        'SEE': e2.south, 'NEE': e2.north, 'SWW': w2.south, 'NWW': w2.north,
-        # 4 moves away
-        'NNNN': n4, 'SSSS': s4, 'WWWW': w4, 'EEEE': e4,
-        'EESS': e2.south.south, 'EENN': e2.north.north, 'WWNN': w2.north.north, 'WWSS': w2.south.south,
-        'WWWS': w3.south, 'EEES': e3.south, 'EEEN': e3.north, 'WWWN': w3.north,
-        'SSSW': s3.west, 'SSSE': s3.east, 'NNNE': n3.east, 'NNNW': n3.west,
-        # 5 moves away
-        'SSSSS': s5, 'NNNNN': n5, 'WWWWW': w5, 'EEEEE': e5,
-        'WWWWN': w4.north, 'WWWWS': w4.south, 'EEEEN': e4.north, 'EEEES': e4.south,
-        'SSSSE': s4.east, 'SSSSW': s4.west, 'NNNNW': n4.west, 'NNNNE': n4.east,
-        'EESSS': s3.east.east, 'WWSSS': s3.west.west, 'EENNN': n3.east.east, 'WWNNN': n3.west.west,
-        'EEESS': e3.south.south, 'EEENN': e3.north.north, 'WWWSS': w3.south.south, 'WWWNN': w3.north.north,
-        # 6 moves away
-        'SSSSSS': s6, 'NNNNNN': n6, 'WWWWWW': w6, 'EEEEEE': e6,
-        'WWWWWN': w5.north, 'WWWWWS': w5.south, 'EEEEEN': e5.north, 'EEEEES': e5.south,
-        'SSSSSE': s5.east, 'SSSSSW': s5.west, 'NNNNNW': n5.west, 'NNNNNE': n5.east,
-        'WWWWNN': w4.north.north, 'WWWWSS': w4.south.south, 'EEEENN': e4.north.north, 'EEEESS': e4.south.south,
-        'NNNNEE': n4.east.east, 'NNNNWW': n4.west.west, 'SSSSWW': s4.west.west, 'SSSSEE': s4.east.east,
-        'EEENNN': e3.north.north.north, 'EEESSS': e3.south.south.south, 'WWWNNN': w3.north.north.north, 'WWWSSS': w3.south.south.south,
-        # 7 moves away
-        'SSSSSSS': s7, 'NNNNNNN': n7, 'WWWWWWW': w7, 'EEEEEEE': e7,
-        'WWWWWWN': w6.north, 'WWWWWWS': w6.south, 'EEEEEEN': e6.north, 'EEEEEES': e6.south,
-        'SSSSSSE': s6.east, 'SSSSSSW': s6.west, 'NNNNNNW': n6.west, 'NNNNNNE': n6.east,
-        'WWWWWNN': w5.north.north, 'WWWWWSS': w5.south.south, 'EEEEENN': e5.north.north, 'EEEEESS': e5.south.south,
-        'NNNNNWW': n5.west.west, 'NNNNNEE': n5.east.east, 'SSSSSWW': s5.west.west, 'SSSSSEE': s5.east.east,
-        'EEEENNN': e4.north.north.north, 'EEEESSS': e4.south.south.south, 'WWWWNNN': w4.north.north.north, 'WWWWSSS': w4.south.south.south,
-        'NNNNEEE': n4.east.east.east, 'NNNNWWW': n4.west.west.west, 'SSSSWWW': s4.west.west.west, 'SSSSEEE': s4.east.east.east,
-        # 8 moves away
-        'SSSSSSSS': s8, 'NNNNNNNN': n8, 'WWWWWWWW': w8, 'EEEEEEEE': e8,
-        'WWWWWWWN': w7.north, 'WWWWWWWS': w7.south, 'EEEEEEEN': e7.north, 'EEEEEEES': e7.south,
-        'SSSSSSSE': s7.east, 'SSSSSSSW': s7.west, 'NNNNNNNW': n7.west, 'NNNNNNNE': n7.east,
-        'WWWWWWNN': w6.north.north, 'WWWWWWWSS': w6.south.south, 'EEEEEEENN': e6.north.north, 'EEEEEEESS': e6.south.south,
-        'NNNNNNWW': n6.west.west, 'NNNNNNEE': n6.east.east, 'SSSSSSWW': s6.west.west, 'SSSSSSEE': s6.west.west,
-        'NNNNNWWW': n5.west.west.west, 'NNNNNEEE': n5.east.east.east, 'SSSSSWWW': s5.west.west.west, 'SSSSSEEE':  s5.east.east.east,
-        'EEEEENNN': e5.north.north.north, 'EEEEESSS': e5.south.south.south, 'WWWWWNNN': w5.north.north.north, 'WWWWWSSS': w5.south.south.south,
-        'EEEENNNN': e4.north.north.north.north, 'WWWWNNNN': w4.north.north.north.north, 'EEEESSSS': e4.south.south.south.south, 'WWWWSSSS': w4.south.south.south.south,
-        # 9 moves away
-        'SSSSSSSS': s9, 'NNNNNNNN': n9, 'WWWWWWWW': w9, 'EEEEEEEE': e9,
-        'WWWWWWWWN': w8.north, 'WWWWWWWWS': w8.south, 'EEEEEEEEN': e8.north, 'EEEEEEEES': e8.south,
-        'SSSSSSSSE': s8.east, 'SSSSSSSSW': s8.west, 'NNNNNNNNW': n8.west, 'NNNNNNNNE': n8.east,
-        'NNNNNNNEE': n7.east.east, 'NNNNNNNWW': n7.west.west, 'SSSSSSSEE': s7.east.east, 'SSSSSSSWW': s7.west.west,
-        'EEEEEEENN': e7.north.north, 'EEEEEEESS': e7.south.south, 'WWWWWWWNN': w7.north.north, 'WWWWWWWSS': w7.south.south,
-        'NNNNNNWWW': n6.west.west.west, 'NNNNNNEEE': n6.east.east.east, 'SSSSSSWWW': s6.west.west.west, 'SSSSSSEEE': s6.east.east.east,
-        'EEEEEENNN': e6.north.north.north, 'EEEEEESSS': e6.south.south.south, 'WWWWWWNNN': w6.north.north.north, 'WWWWWWSSS': w6.south.south.south,
-        'NNNNNWWWW': n5.west.west.west.west, 'NNNNNEEEE': n5.east.east.east.east, 'SSSSSWWWW': s5.west.west.west.west, 'SSSSSEEEE':  s5.east.east.east.east,
-        'EEEEENNNN': e5.north.north.north.north, 'EEEEESSSS': e5.south.south.south.south, 'WWWWWNNNN': w5.north.north.north.north, 'WWWWWSSSS': w5.south.south.south.south,
-        # 10 moves away
-        'SSSSSSSSS': s10, 'NNNNNNNNN': n10, 'WWWWWWWWW': w10, 'EEEEEEEEE': e10,
-        'WWWWWWWWWN': w9.north, 'WWWWWWWWWS': w9.south, 'EEEEEEEEEN': e9.north, 'EEEEEEEEES': e9.south,
-        'SSSSSSSSSE': s9.east, 'SSSSSSSSSW': s9.west, 'NNNNNNNNNW': n9.west, 'NNNNNNNNNE': n9.east,
-        'NNNNNNNNEE': n8.east.east, 'SSSSSSSSEE': s8.east.east, 'NNNNNNNNWW': n8.west.west, 'SSSSSSSSWW': s8.west.west,
-        'EEEEEEEENN': e8.north.north, 'EEEEEEEESS': e8.south.south, 'WWWWWWWWNN': w8.north.north, 'WWWWWWWWNN': w8.north.north,
-        'WWWWWWWNNN': w7.north.north, 'WWWWWWWSSS': w7.south.south, 'EEEEEEESSS': e7.south.south.south, 'EEEEEEEWWW': e7.north.north.north,
-        'NNNNNNNWWW': n7.west.west.west, 'NNNNNNNEEE': n7.east.east.east, 'SSSSSSSWWW': s7.west.west.west, 'SSSSSSSEEE': s7.east.east.east,
-        'WWWWWWNNNN': w6.north.north.north.north, 'WWWWWWSSSS': w6.south.south.south.south, 'EEEEEENNNN': e6.north.north.north.north, 'EEEEEESSSS': e6.south.south.south.south,
-        'NNNNNNWWWW': n6.west.west.west.west, 'NNNNNNEEEE': n6.east.east.east.east, 'SSSSSSWWWW': s6.west.west.west.west, 'SSSSSSEEEE': s6.east.east.east.east,
-        'NNNNNWWWWW': n5.west.west.west.west.west, 'NNNNNEEEEE': n5.east.east.east.east.east, 'SSSSSWWWWW': s5.west.west.west.west.west, 'SSSSSEEEEE': s5.east.east.east.east.east
-    }
+def step_hyperparameters(step):
+    """ The hyperparameters of a step, they only depend on the step """
+    return {'MINING': 500 + (step // 50) * 80,
+            'DEPOSIT': 800 + (step // 300) * 300 + step // 380 * 800,
+            'ATTACK_ENEMY_SHIP': 600 - (step // 75) * 100,
+            'DIRECTION_ENCOURAGEMENT': 100 - (step // 120) * 20,
+            'DISTRIBUTION': -500 + (step // 20) * 50,
+            'GET_AWAY': -500 + (step // 100) * 20,
+            'CLOSEST_SHIPYARD': 500 + (step // 60) * 100,
+            'CONVERSION': 80 - (step // 200) * 10,
+            'CARGO_THRESHHOLD': 600}
+
+
+# One row per step, built once at import
+HYPERPARAMETERS = [step_hyperparameters(step) for step in range(400)]
+
+
+def grid(index, size=21, radius=10):
+    """ Returns the direction keys and the flat indices of the cells which are in `radius` moves distance of the given flat index """
+    table = offset_table(radius, size)
+    return table.keys, table.gather(index)
 
 movement_dictionary = {"S": "SOUTH", 'N': 'NORTH', 'W': 'WEST', 'E': 'EAST', 'convert': 'CONVERT'}
 
@@ -472,23 +424,24 @@ def agent(obs, config):
 
     ships = [ship.id for ship in sorted(board.current_player.ships, key=operator.attrgetter("halite"), reverse=True)]
     actions = {}
+    # The snapshot follows the actions committed so far instead of simulating the board after each one of them
+    snapshot = BoardSnapshot(board)
+    overlay = TurnOverlay(snapshot, board.configuration.convert_cost, board.configuration.spawn_cost)
 
     for ship_id in ships:
-        if ship_id in board.current_player.ship_ids:
-            next_action, action_type = DecisionShip(board, ship_id, step).determine()
-                
-            if action_type != 'mine':
-                actions[ship_id] = movement_dictionary[action_type]
-                board.ships[ship_id].next_action = next_action
-                board = board.next()
+        next_action, action_type = DecisionShip(board, ship_id, step, snapshot).determine()
+            
+        if action_type != 'mine':
+            actions[ship_id] = movement_dictionary[action_type]
+            board.ships[ship_id].next_action = next_action
+            overlay.commit(ship_id, action_type)
 
-    shipyard_ids = ShipyardDecisions(board, board.current_player, step).determine()
+    shipyard_ids = ShipyardDecisions(board, board.current_player, step, snapshot).determine()
 
     for shipyard_id in board.current_player.shipyard_ids:
         if shipyard_id in shipyard_ids:
             actions[shipyard_id] = 'SPAWN'
             board.shipyards[shipyard_id].next_action = ShipyardAction.SPAWN
-            
-            board = board.next()
+            overlay.commit(shipyard_id, 'spawn')
         
     return actions
@@ -0,0 +1,120 @@
+import numpy as np
+
+
+def solve(value):
+    """
+        Returns the column of every row in the assignment of the rows to distinct columns with the highest total value
+        params:
+            value: rows x columns array, there have to be at least as many columns as rows, -inf where a row can't go
+        Hungarian method with shortest augmenting paths and potentials: every row is added in turn and the columns
+        are scanned as whole arrays, so a row costs a handful of NumPy calls per column its path goes through.
+    """
+    rows, columns = value.shape
+    if rows == 0:
+        return np.zeros(0, dtype=int)
+    cost = -np.asarray(value, dtype=float)
+    # Forbidden pairs cost more than any assignment that avoids them
+    finite = np.isfinite(cost)
+    cost[~finite] = (np.abs(cost[finite]).max() + 1) * (rows + 1) if finite.any() else 1.
+
+    # Row/column 0 is the virtual start of every path, the rows are numbered from 1
+    a = np.zeros((rows + 1, columns + 1))
+    a[1:, 1:] = cost
+    u, v = np.zeros(rows + 1), np.zeros(columns + 1)
+    owner, way = np.zeros(columns + 1, dtype=int), np.zeros(columns + 1, dtype=int)
+    for row in range(1, rows + 1):
+        owner[0], column = row, 0
+        reduced, used = np.full(columns + 1, np.inf), np.zeros(columns + 1, dtype=bool)
+        while True:
+            used[column] = True
+            current = a[owner[column]] - u[owner[column]] - v
+            free = ~used
+            better = free & (current < reduced)
+            reduced[better], way[better] = current[better], column
+            candidates = np.where(free, reduced, np.inf)
+            column = int(np.argmin(candidates))
+            delta = candidates[column]
+            u[owner[used]] += delta
+            v[used] -= delta
+            reduced[free] -= delta
+            if owner[column] == 0:
+                break
+        # Flip the path back to its start
+        while column:
+            previous = way[column]
+            owner[column] = owner[previous]
+            column = previous
+
+    assigned = np.full(rows, -1)
+    taken = np.flatnonzero(owner[1:])
+    assigned[owner[1:][taken] - 1] = taken
+    return assigned
+
+
+class FleetTargets:
+    """
+        Gives every one of my ships its own target for the turn, the assignment with the highest value for the fleet
+        params:
+            snapshot: the BoardSnapshot of the turn
+            field: the DistanceField of my shipyards, None when I have none
+            steps_left: turns left in the game, nothing is worth doing that can't be brought home in time
+            cells: how many of the richest cells are candidates
+            slots: how many ships one of my shipyards can take at once
+        The candidates and their value for a ship (halite per turn it takes):
+            cell: 0.25 * halite (a turn of mining) over the moves to the cell plus the turn spent mining it
+            shipyard: the ship's cargo over the moves to the shipyard plus one
+            enemy: half the cargo of an enemy ship carrying more than mine over the moves to it plus one
+        Keeps:
+            targets: ship_id: (kind, flat position, value) of every ship that got a target worth something
+    """
+    kinds = ['cell', 'shipyard', 'enemy']
+
+    def __init__(self, snapshot, field=None, steps_left=400, cells=150, slots=4):
+        self.snapshot = snapshot
+        me = snapshot.me
+        ships = snapshot.my_ships()
+        self.ship_ids = [snapshot.ship_ids[n] for n in ships]
+        self.targets = {}
+        if len(ships) == 0:
+            return
+        cargo = snapshot.ship_halite[ships]
+
+        # The richest cells nobody could take from under my ships: no shipyard and no enemy ship on them
+        open_cell = (snapshot.shipyard_owner == -1) & ((snapshot.ship_owner == -1) | (snapshot.ship_owner == me))
+        rich = np.flatnonzero(open_cell & (snapshot.halite > 0))
+        rich = rich[np.argsort(-snapshot.halite[rich], kind='stable')[:cells]]
+        yards = np.repeat(snapshot.shipyard_pos[snapshot.my_shipyards()], slots)
+        enemy_ships = np.flatnonzero(snapshot.ship_player != me)
+        enemy_ships = enemy_ships[snapshot.ship_halite[enemy_ships] > 0]
+        self.positions = np.concatenate([rich, yards, snapshot.ship_pos[enemy_ships]]).astype(int)
+        self.kind = np.repeat([0, 1, 2], [len(rich), len(yards), len(enemy_ships)])
+
+        moves = self.moves(snapshot.ship_pos[ships], self.positions)
+        home = field.moves[self.positions] if field is not None else np.zeros(len(self.positions))
+        value = np.full(moves.shape, -np.inf)
+
+        cell, yard, enemy = self.kind == 0, self.kind == 1, self.kind == 2
+        mining = 0.25 * snapshot.halite[self.positions][None, :] / (moves + 1)
+        # A cell only counts when the ship can still mine it and get home before the end
+        value[:, cell] = np.where(moves[:, cell] + 1 + home[cell] < steps_left, mining[:, cell], -np.inf)
+        value[:, yard] = np.where(cargo[:, None] > 0, cargo[:, None] / (moves[:, yard] + 1), -np.inf)
+        enemy_cargo = snapshot.ship_halite[enemy_ships][None, :]
+        value[:, enemy] = np.where(cargo[:, None] < enemy_cargo, 0.5 * enemy_cargo / (moves[:, enemy] + 1), -np.inf)
+
+        # Every ship can also keep no target, worth nothing and open to that ship only
+        idle = np.full((len(ships), len(ships)), -np.inf)
+        np.fill_diagonal(idle, 0.)
+        assigned = solve(np.hstack([value, idle]))
+
+        for n, column in enumerate(assigned.tolist()):
+            if column < len(self.positions) and value[n, column] > 0:
+                kind = self.kinds[self.kind[column]]
+                self.targets[self.ship_ids[n]] = kind, int(self.positions[column]), float(value[n, column])
+
+    def moves(self, origins, targets):
+        """ Returns the origins x targets moves around the torus between flat positions """
+        size, half = self.snapshot.size, self.snapshot.size // 2
+        x, y = self.snapshot.x, self.snapshot.y
+        dx = (x[targets][None, :] - x[origins][:, None] + half) % size - half
+        dy = (y[targets][None, :] - y[origins][:, None] + half) % size - half
+        return np.abs(dx) + np.abs(dy)
@@ -0,0 +1,41 @@
+import numpy as np
+from offsets import offset_table, DIRECTIONS
+
+
+class AttractionField:
+    """
+        The halite around the cells it is asked for, spread over the four moves the way add_accordingly spreads a value,
+        computed when asked (field() or at())
+        params:
+            halite: the flat halite map (snapshot.halite)
+            size: the board size
+            radius: how many moves away the cells around count
+            cells: only the first `cells` cells of the grid count (OffsetTable order), all of them by default
+            growth: the halite of a cell is multiplied by growth ** moves (what it regenerates on the way)
+        Keeps:
+            kernel: grid cells x directions (N, E, W, S), growth ** moves * (weightX or weightY of the direction)
+            base: the kernel's sums, the values with 1 as the halite of every cell, for the constant part of a value
+        It is a circular correlation of the halite map with one decay kernel per direction. Only the ships' cells are
+        ever asked for, so the grids are gathered for the asked cells only instead of the whole board.
+    """
+    directions = list(DIRECTIONS)
+
+    def __init__(self, halite, size=21, radius=10, cells=None, growth=1.):
+        self.table = table = offset_table(radius, size)
+        self.cells = cells = len(table) if cells is None else min(cells, len(table))
+        self.halite = np.asarray(halite, dtype=float)
+
+        # weightX goes to dirX and weightY to dirY, a cell straight north only pulls north
+        self.kernel = table.projection[:, :cells].T * growth ** table.moves[:cells, None]
+        self.base = self.kernel.sum(axis=0)
+
+    def field(self, index):
+        """
+            Returns the spread halite of the flat index (one value per direction) or of an array of indices (one row
+            each): sum over the grid of halite * growth ** moves * (weightX or weightY of the direction)
+        """
+        return self.halite[self.table.gather(index)[..., :self.cells]] @ self.kernel
+
+    def at(self, index, scale=1., constant=0.):
+        """ Returns direction: value of scale * halite + constant summed over the grid of the flat index (or indices) """
+        return dict(zip(self.directions, (scale * self.field(index) + constant * self.base).T.tolist()))
@@ -0,0 +1,81 @@
+import argparse
+import json
+import math
+import sys
+
+import numpy as np
+
+
+def mann_whitney(a, b):
+    """
+        Two-sided Mann-Whitney U test of the samples, with the normal approximation and the tie correction
+        Returns the p-value (1 when the samples are too small to tell anything)
+    """
+    a, b = np.asarray(a, dtype=float), np.asarray(b, dtype=float)
+    n1, n2 = len(a), len(b)
+    if n1 < 3 or n2 < 3:
+        return 1.
+
+    values = np.concatenate([a, b])
+    order = values.argsort(kind='mergesort')
+    ranks = np.empty(len(values))
+    ranks[order] = np.arange(1, len(values) + 1)
+    # Tied values share their mean rank
+    unique, inverse, counts = np.unique(values, return_inverse=True, return_counts=True)
+    ranks = (np.bincount(inverse, weights=ranks) / counts)[inverse]
+
+    u = ranks[:n1].sum() - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    sigma = math.sqrt(n1 * n2 / 12 * ((n + 1) - (counts ** 3 - counts).sum() / (n * (n - 1))))
+    if sigma == 0:
+        return 1.
+    z = (abs(u - n1 * n2 / 2) - 0.5) / sigma
+    return math.erfc(max(z, 0) / math.sqrt(2))
+
+
+def compare(base, new, alpha=0.01, threshold=0.05):
+    """
+        Compares two reports of micro.py, function by function and state by state
+        Returns a row per measurement present in both: the medians (us), new/base ratio, p-value and a verdict:
+        'slower'/'faster' when the difference is significant at `alpha` and larger than `threshold`, '' otherwise.
+    """
+    base_results = {(r['module'], r['function'], r['state']): r for r in base['results']}
+    rows = []
+    for result in new['results']:
+        key = (result['module'], result['function'], result['state'])
+        if key not in base_results:
+            continue
+        before = base_results[key]
+        ratio = result['p50'] / before['p50'] if before['p50'] else float('inf')
+        p = mann_whitney(before['samples'], result['samples'])
+        verdict = ''
+        if p < alpha and abs(ratio - 1) > threshold:
+            verdict = 'slower' if ratio > 1 else 'faster'
+        rows.append({'module': key[0], 'function': key[1], 'state': key[2], 'base': before['p50'],
+                     'new': result['p50'], 'ratio': round(ratio, 3), 'p': p, 'verdict': verdict})
+    return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compares two micro.py reports, exits with 1 on a significant slowdown')
+    parser.add_argument('base')
+    parser.add_argument('new')
+    parser.add_argument('--alpha', type=float, default=0.01, help='significance level of the test')
+    parser.add_argument('--threshold', type=float, default=0.05, help='smallest relative change that matters')
+    parser.add_argument('--json', action='store_true', help='print the rows as JSON')
+    args = parser.parse_args()
+
+    with open(args.base) as base_file, open(args.new) as new_file:
+        base, new = json.load(base_file), json.load(new_file)
+    rows = compare(base, new, args.alpha, args.threshold)
+
+    if args.json:
+        json.dump(rows, sys.stdout)
+    else:
+        print('%s -> %s' % (base.get('revision'), new.get('revision')))
+        print('%-8s %-28s %-8s %11s %11s %7s %9s' % ('module', 'function', 'state', 'base p50', 'new p50', 'ratio', 'p'))
+        for row in rows:
+            print('%-8s %-28s %-8s %9.1fus %9.1fus %7.3f %9.2g %s' % (
+                row['module'], row['function'], row['state'], row['base'], row['new'], row['ratio'], row['p'],
+                row['verdict']))
+    sys.exit(1 if any(row['verdict'] == 'slower' for row in rows) else 0)
@@ -0,0 +1,79 @@
+import copy
+import json
+import os
+import random
+import sys
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCHMARKS)
+sys.path.insert(0, ROOT)
+
+from engine import DEFAULT_CONFIGURATION, Game
+
+# The states replayed by the benchmarks, frozen so two revisions are measured on the same boards
+CORPUS = os.path.join(BENCHMARKS, 'corpus.json')
+
+# name: (step, ships of the current player, the fleet being filled up with extra ships when it is smaller)
+STATES = {'early': (6, None), 'mid': (150, None), 'late': (350, None),
+          'mid-40': (150, 40), 'late-40': (350, 40), 'late-80': (350, 80)}
+
+
+def play_states(steps, agents=('mod', 'current', 'agent_d', 'agent_e'), seed=7):
+    """ Plays a game between the agents on the local engine and returns the observation of each of the steps """
+    import runner
+    sys.modules.setdefault('kaggle_environments', None)
+    game = Game([runner.load_agent(name, seat).agent for seat, name in enumerate(agents)], seed=seed)
+    observations = {}
+    while not game.done and game.board.step <= max(steps):
+        if game.board.step in steps:
+            observations[game.board.step] = game.board.observation
+        game.step()
+    return observations
+
+
+def crowd(observation, ships, seed=0, max_cargo=600):
+    """
+        Returns a copy of the observation where the current player has `ships` ships
+        The extra ships are put on random empty cells with a random cargo, their ids can't clash with the game's.
+    """
+    observation = copy.deepcopy(observation)
+    rng = random.Random(seed)
+    player = observation['players'][observation['player']]
+    taken = {position for _, shipyards, fleet in observation['players']
+             for position in list(shipyards.values()) + [ship[0] for ship in fleet.values()]}
+    free = [index for index in range(len(observation['halite'])) if index not in taken]
+
+    for n, position in enumerate(rng.sample(free, max(ships - len(player[2]), 0))):
+        player[2]['%s-%s' % (observation['step'], 1000 + n)] = [position, rng.randint(0, max_cargo)]
+    return observation
+
+
+def build(seed=7):
+    """ Returns the corpus: a list of {name, ships, observation}, the current player being the largest fleet """
+    observations = play_states({step for step, _ in STATES.values()}, seed=seed)
+    corpus = []
+    for name, (step, ships) in STATES.items():
+        observation = dict(observations[step])
+        observation['player'] = max(range(len(observation['players'])), key=lambda n: len(observation['players'][n][2]))
+        if ships is not None:
+            observation = crowd(observation, ships, seed)
+        corpus.append({'name': name, 'ships': len(observation['players'][observation['player']][2]),
+                       'observation': observation})
+    return corpus
+
+
+def load(path=CORPUS):
+    """ Returns the corpus and the configuration it was played with """
+    with open(path) as corpus_file:
+        data = json.load(corpus_file)
+    return data['states'], data['configuration']
+
+
+if __name__ == '__main__':
+    # Regenerating the corpus makes earlier results incomparable, it is only needed when the rules change
+    states = build()
+    configuration = {key: value for key, value in DEFAULT_CONFIGURATION.items() if key != 'randomSeed'}
+    with open(CORPUS, 'w') as corpus_file:
+        json.dump({'configuration': configuration, 'states': states}, corpus_file)
+    for state in states:
+        print(state['name'], 'step', state['observation']['step'], 'ships', state['ships'])
@@ -0,0 +1,92 @@
+import argparse
+import random
+import time
+from multiprocessing import Pool
+
+# corpus puts the root of the repository on sys.path
+import corpus
+import runner
+from engine import Game
+from search import BeamSearch
+from economy import EconomySearch
+
+
+def play(job):
+    """
+        Plays one game, two seats of mod searching and two staying greedy, job being (game, seed, searching seats,
+        BeamSearch's keyword arguments or None, EconomySearch's keyword arguments or None)
+        Returns the game's result like runner.play, the seats named 'search' and 'greedy', with the mean seconds a turn
+        of each took and how often the search ran out of time
+    """
+    game_index, seed, searching, beam, economy = job
+    modules = [runner.load_agent('mod', seat) for seat in range(4)]
+    for seat, module in enumerate(modules):
+        module.search = BeamSearch(module.fleet_options, **beam) if seat in searching and beam else None
+        module.economy = EconomySearch(seed=seed, **economy) if seat in searching and economy else None
+
+    seconds, timeouts = {'search': [], 'greedy': []}, 0
+
+    def timed(seat, module):
+        def agent(obs, config):
+            nonlocal timeouts
+            start = time.perf_counter()
+            actions = module.agent(obs, config)
+            seconds['search' if seat in searching else 'greedy'].append(time.perf_counter() - start)
+            timeouts += bool(module.search and module.search.stats.get('timeout'))
+            return actions
+        return agent
+
+    game = Game([timed(seat, module) for seat, module in enumerate(modules)],
+                {'episodeSteps': runner._options.get('steps', 400)}, seed)
+    rewards = game.run()
+    return {'game': game_index, 'seed': seed, 'rewards': rewards,
+            'seats': ['search' if seat in searching else 'greedy' for seat in range(4)],
+            'turn': {name: sum(times) / max(len(times), 1) for name, times in seconds.items()}, 'timeouts': timeouts}
+
+
+def schedule(games, beam, economy, seed=0):
+    """
+        Every game is played on its own map with two random seats searching
+        The maps are symmetric, so swapping the searching and greedy seats on a map mostly replays the same game.
+    """
+    rng = random.Random(seed)
+    return [(game_index, rng.randrange((1 << 31) - 1), set(rng.sample(range(4), 2)), beam, economy)
+            for game_index in range(games)]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Plays mod with its searches (BeamSearch, EconomySearch) against the greedy mod")
+    parser.add_argument('-n', '--games', type=int, default=20)
+    parser.add_argument('-p', '--processes', type=int, default=None, help='every core by default')
+    parser.add_argument('--steps', type=int, default=400)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--depth', type=int, default=2, help="BeamSearch's depth, 0 leaves the moves greedy")
+    parser.add_argument('--width', type=int, default=3)
+    parser.add_argument('--branching', type=int, default=2)
+    parser.add_argument('--discount', type=float, default=0.5)
+    parser.add_argument('--time-limit', type=float, default=1., help='seconds the beam search may take in a turn')
+    parser.add_argument('--economy', type=float, default=0.,
+                        help='seconds the tree search of the spawns and conversions may take in a turn, 0 leaves the thresholds')
+    parser.add_argument('--horizon', type=int, default=20, help="turns the economy's playouts look ahead")
+    parser.add_argument('--decisions', nargs='+', default=['spawn'], choices=['spawn', 'convert'],
+                        help='what the economy may decide on top of the thresholds')
+    args = parser.parse_args()
+
+    beam = {'depth': args.depth, 'width': args.width, 'branching': args.branching, 'discount': args.discount,
+            'time_limit': args.time_limit} if args.depth else None
+    economy = {'time_limit': args.economy, 'horizon': args.horizon, 'decisions': tuple(args.decisions)} \
+        if args.economy else None
+    options = {'agents': ['mod'], 'steps': args.steps, 'verbose': False, 'helpers': False, 'traces': None}
+    start, results = time.perf_counter(), []
+    with Pool(args.processes, initializer=runner._init_worker, initargs=(options,)) as pool:
+        for result in pool.imap_unordered(play, schedule(args.games, beam, economy, args.seed)):
+            results.append(result)
+            print('game %s: %s' % (result['game'], ', '.join('%s %s' % pair for pair in zip(result['seats'], result['rewards']))),
+                  flush=True)
+
+    print('%s games in %.0fs' % (len(results), time.perf_counter() - start))
+    print('%-8s %6s %9s %6s %5s %8s' % ('mode', 'games', 'halite', 'rank', 'wins', 'turn ms'))
+    for name, stat in runner.summarize(results).items():
+        turn = 1000 * sum(result['turn'][name] for result in results) / len(results)
+        print('%-8s %6s %9s %6s %5s %8.1f' % (name, stat['games'], stat['halite'], stat['rank'], stat['wins'], turn))
+    print('searches out of time: %s' % sum(result['timeouts'] for result in results))
@@ -0,0 +1,185 @@
+import argparse
+import copy
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+import corpus
+from corpus import ROOT
+
+import runner
+
+# The agents measured by default
+MODULES = ['current', 'mod', 'agent_d', 'agent_e']
+
+
+def cases(name, module, observation, configuration):
+    """
+        Returns function: setup of every function measured for the module on the state
+        A setup builds what the function needs (untimed) and returns the call that gets timed, the functions an
+        agent doesn't have or the state doesn't allow (e.g. no shipyard) are left out.
+    """
+    Board = module.Board
+    board = Board(observation, configuration)
+    step = observation['step']
+    me = board.current_player
+    # The ship agent() decides first, the one with the most cargo
+    ship_id = max(me.ships, key=lambda ship: ship.halite).id
+    shipyard_id = me.shipyard_ids[0] if me.shipyard_ids else None
+
+    def fresh():
+        board = Board(observation, configuration)
+        return board, module.BoardSnapshot(board)
+
+    def decision_ship(board, snapshot):
+        return module.DecisionShip(board, ship_id, step, snapshot)
+
+    setups = {'Board': lambda: lambda: Board(observation, configuration)}
+
+    def setup_grid():
+        board, snapshot = fresh()
+        index = snapshot.index(board.ships[ship_id].position)
+        return lambda: module.grid(index, snapshot.size)
+    setups['grid'] = setup_grid
+
+    if hasattr(module, 'Locator'):
+        def setup_locator():
+            board, snapshot = fresh()
+            ship = board.ships[ship_id]
+            return lambda: module.Locator(snapshot, ship).generate_grid_df()
+        setups['Locator.generate_grid_df'] = setup_locator
+
+    def setup_decision_ship():
+        arguments = fresh()
+        return lambda: decision_ship(*arguments)
+    setups['DecisionShip'] = setup_decision_ship
+
+    def setup_weight_moves():
+        decider = decision_ship(*fresh())
+        return decider.weight_moves
+    setups['DecisionShip.weight_moves'] = setup_weight_moves
+
+    def setup_shipyard_status():
+        decider = decision_ship(*fresh())
+        return decider.shipyard_status
+    setups['DecisionShip.shipyard_status'] = setup_shipyard_status
+
+    if hasattr(module, 'FleetDecisions'):
+        def setup_fleet():
+            board, snapshot = fresh()
+            deciders = [module.DecisionShip(board, ship.id, step, snapshot) for ship in board.current_player.ships]
+            return lambda: module.FleetDecisions(snapshot, deciders).weight_moves()
+        setups['FleetDecisions.weight_moves'] = setup_fleet
+
+    if shipyard_id is not None:
+        def setup_shipyard():
+            board, snapshot = fresh()
+            decisions = module.ShipyardDecisions(board, board.current_player, step, snapshot)
+            shipyard_index = snapshot.shipyard_lookup[shipyard_id]
+            return lambda: decisions.weight(shipyard_index)
+        setups['ShipyardDecisions.weight'] = setup_shipyard
+
+    def setup_agent():
+        arguments = copy.deepcopy(observation), configuration
+        return lambda: module.agent(*arguments)
+    setups['agent'] = setup_agent
+    return setups
+
+
+def measure(setup, repeat=200, budget=1.):
+    """
+        Times the call setup() returns, with a fresh setup for every sample
+        Stops after `repeat` samples or once `budget` seconds were spent timing (but never under 5 samples).
+        Returns the samples (seconds) and the peak/net memory the call allocated (bytes, traced once).
+    """
+    gc.collect()
+    samples, spent = [], 0.
+    while len(samples) < repeat and (spent < budget or len(samples) < 5):
+        call = setup()
+        start = time.perf_counter()
+        call()
+        elapsed = time.perf_counter() - start
+        samples.append(elapsed)
+        spent += elapsed
+
+    call = setup()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    call()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return samples, peak - base, current - base
+
+
+def summary(samples):
+    """ Latency percentiles (microseconds) of the samples """
+    samples = np.asarray(samples) * 1e6
+    return {'n': len(samples), 'mean': round(float(samples.mean()), 1),
+            **{'p%s' % q: round(float(np.percentile(samples, q)), 1) for q in (50, 90, 99)}}
+
+
+def revision():
+    """ The git revision of the tree, None outside of a repository """
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(names=MODULES, functions=None, states=None, repeat=200, budget=1.):
+    """ Measures every function of every module on every state of the corpus, returns the results """
+    corpus_states, configuration = corpus.load()
+    results = []
+    for name in names:
+        module = runner.load_agent(name, 0)
+        for state in corpus_states:
+            if states and state['name'] not in states:
+                continue
+            for function, setup in cases(name, module, state['observation'], configuration).items():
+                if functions and function not in functions:
+                    continue
+                samples, peak, net = measure(setup, repeat, budget)
+                results.append({'module': name, 'function': function, 'state': state['name'], 'ships': state['ships'],
+                                **summary(samples), 'alloc_peak_kb': round(peak / 1024, 1),
+                                'alloc_net_kb': round(net / 1024, 1), 'samples': [round(s * 1e6, 2) for s in samples]})
+                print('%-8s %-28s %-8s p50 %9.1fus p90 %9.1fus peak %8.1fKB' % (
+                    name, function, state['name'], results[-1]['p50'], results[-1]['p90'], results[-1]['alloc_peak_kb']),
+                    file=sys.stderr)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Times the decision hot path of the agents on the benchmark corpus')
+    parser.add_argument('modules', nargs='*', metavar='module',
+                        help='agents to measure: %s by default' % ', '.join(MODULES))
+    parser.add_argument('-f', '--function', action='append', help='only measure these functions')
+    parser.add_argument('-s', '--state', action='append', help='only measure on these states of the corpus')
+    parser.add_argument('-r', '--repeat', type=int, default=200, help='maximum samples per function and state')
+    parser.add_argument('-b', '--budget', type=float, default=1., help='seconds of timing per function and state')
+    parser.add_argument('-o', '--out', help='JSON file for the results (compare two with compare.py)')
+    args = parser.parse_args()
+    unknown = [name for name in args.modules if name not in runner.AGENTS]
+    if unknown:
+        parser.error('unknown agents: %s' % ', '.join(unknown))
+
+    # The agents run on the engine's Board like in runner.py, and their logs are kept out of the way
+    sys.modules.setdefault('kaggle_environments', None)
+    os.chdir(tempfile.mkdtemp(prefix='halite-bench-'))
+
+    results = run(args.modules or MODULES, args.function, args.state, args.repeat, args.budget)
+    report = {'revision': revision(), 'python': platform.python_version(), 'numpy': np.__version__,
+              'machine': platform.machine(), 'date': time.strftime('%Y-%m-%d %H:%M:%S'), 'results': results}
+    if args.out:
+        with open(args.out, 'w') as out_file:
+            json.dump(report, out_file)
+    else:
+        json.dump(report, sys.stdout)
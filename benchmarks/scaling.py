@@ -0,0 +1,182 @@
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+
+import numpy as np
+
+# corpus puts the root of the repository on sys.path
+import corpus
+import micro
+import runner
+from engine import DEFAULT_CONFIGURATION, populate
+
+try:
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+except ImportError:
+    # The curves are still written as JSON and printed
+    plt = None
+
+# Every axis is swept on its own, the others staying at the base point
+BASE = {'ships': 20, 'shipyards': 3, 'size': 21}
+AXES = {'ships': [1, 5, 10, 20, 40, 80, 150], 'shipyards': [1, 2, 4, 8, 12], 'size': [21, 32, 40]}
+
+# What gets timed at every point, agent() being the whole turn
+FUNCTIONS = ['agent', 'Board', 'DecisionShip', 'DecisionShip.weight_moves', 'DecisionShip.shipyard_status',
+             'Locator.generate_grid_df', 'FleetDecisions.weight_moves', 'ShipyardDecisions.weight']
+
+
+def synthetic(size=21, ships=20, shipyards=3, players=4, step=200, seed=0, max_cargo=600, player_halite=5000):
+    """
+        Returns the observation and configuration of a made-up board
+        params:
+            size: the board size, the halite map is generated like a real game's for it
+            ships, shipyards: how many of them every player has, put on random distinct cells
+            step: the step the board is at
+        Player 0 is the current player and always gets `ships` ships, the opponents get as many as the board has room
+        for (150 ships for each of 4 players don't fit on 21x21). Cargos are random, every player has `player_halite`.
+    """
+    room = size * size - players * shipyards - ships
+    if room < 0:
+        raise ValueError('%s ships and %s shipyards per player do not fit on a %sx%s board' % (ships, shipyards, size, size))
+    fleets = [ships] + [min(ships, room // (players - 1))] * (players - 1)
+
+    configuration = {**DEFAULT_CONFIGURATION, 'size': size, 'randomSeed': seed}
+    observation = populate(configuration, players, seed)
+    rng = random.Random(seed)
+    cells = iter(rng.sample(range(size * size), players * shipyards + sum(fleets)))
+
+    counter = 0
+    for player, fleet in zip(observation['players'], fleets):
+        player[0] = player_halite
+        player[1], player[2] = {}, {}
+        for _ in range(shipyards):
+            counter += 1
+            position = next(cells)
+            player[1]['%s-%s' % (step, counter)] = position
+            observation['halite'][position] = 0
+        for _ in range(fleet):
+            counter += 1
+            player[2]['%s-%s' % (step, counter)] = [next(cells), rng.randint(0, max_cargo)]
+    observation['step'] = step
+    return observation, configuration
+
+
+def sweep(names, functions=FUNCTIONS, axes=AXES, repeat=5, budget=2., seed=0):
+    """
+        Times the functions of the modules along each axis
+        Returns a row per module, axis, point and function: ships, shipyards, size and the latency percentiles (us)
+    """
+    rows = []
+    for name in names:
+        module = runner.load_agent(name, 0)
+        for axis, values in axes.items():
+            for value in values:
+                point = {**BASE, axis: value}
+                observation, configuration = synthetic(point['size'], point['ships'], point['shipyards'], seed=seed)
+                for function, setup in micro.cases(name, module, observation, configuration).items():
+                    if function not in functions:
+                        continue
+                    samples, peak, _ = micro.measure(setup, repeat, budget)
+                    rows.append({'module': name, 'axis': axis, **point, 'function': function,
+                                 **micro.summary(samples), 'alloc_peak_kb': round(peak / 1024, 1)})
+                    print('%-8s %-9s %4s %-30s %10.1fms' % (name, axis, value, function, rows[-1]['p50'] / 1000),
+                          file=sys.stderr)
+    return rows
+
+
+def growth(rows, axis='ships'):
+    """
+        Returns (module, function, exponent) sorted by exponent, the exponent being the slope of log(latency)
+        over log(axis) between the two largest points: ~1 grows linearly, ~2 quadratically
+    """
+    curves = {}
+    for row in rows:
+        if row['axis'] == axis:
+            curves.setdefault((row['module'], row['function']), []).append((row[axis], row['p50']))
+    exponents = []
+    for (module, function), points in curves.items():
+        (x1, y1), (x2, y2) = sorted(points)[-2:]
+        if x2 > x1 and y1 > 0 and y2 > 0:
+            exponents.append((module, function, round(math.log(y2 / y1) / math.log(x2 / x1), 2)))
+    return sorted(exponents, key=lambda item: -item[2])
+
+
+def plot(rows, directory):
+    """ One figure per axis, one panel per module with the latency of every function (log scale) """
+    os.makedirs(directory, exist_ok=True)
+    modules = list(dict.fromkeys(row['module'] for row in rows))
+    functions = list(dict.fromkeys(FUNCTIONS + [row['function'] for row in rows]))
+    for axis in dict.fromkeys(row['axis'] for row in rows):
+        figure, panels = plt.subplots(1, len(modules), figsize=(5 * len(modules), 4.5), squeeze=False)
+        for panel, module in zip(panels[0], modules):
+            selected = [row for row in rows if row['axis'] == axis and row['module'] == module]
+            for function in dict.fromkeys(row['function'] for row in selected):
+                points = sorted((row[axis], row['p50'] / 1000) for row in selected if row['function'] == function)
+                # A function keeps its colour from one panel to the next
+                color = 'C%s' % (functions.index(function) % 10)
+                panel.plot(*zip(*points), marker='o', color=color, label=function)
+            panel.set_title(module)
+            panel.set_xlabel(axis)
+            panel.set_ylabel('p50 (ms)')
+            panel.set_yscale('log')
+        handles = {label: handle for panel in panels[0] for handle, label in zip(*panel.get_legend_handles_labels())}
+        figure.legend(handles.values(), handles.keys(), loc='lower center', ncol=4, fontsize='small')
+        figure.tight_layout(rect=(0, 0.12, 1, 1))
+        figure.savefig(os.path.join(directory, 'scaling-%s.png' % axis))
+        plt.close(figure)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Sweeps fleet size, shipyards and board size and times the agents")
+    parser.add_argument('modules', nargs='*', metavar='module',
+                        help='agents to measure: %s by default' % ', '.join(micro.MODULES))
+    parser.add_argument('-a', '--axis', action='append', choices=list(AXES), help='only sweep these axes')
+    parser.add_argument('-f', '--function', action='append', help='only time these functions')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='maximum samples per function and point')
+    parser.add_argument('-b', '--budget', type=float, default=2., help='seconds of timing per function and point')
+    parser.add_argument('-o', '--out', help='JSON file for the rows')
+    parser.add_argument('--plot', help='directory for the figures (needs matplotlib)')
+    args = parser.parse_args()
+    unknown = [name for name in args.modules if name not in runner.AGENTS]
+    if unknown:
+        parser.error('unknown agents: %s' % ', '.join(unknown))
+
+    sys.modules.setdefault('kaggle_environments', None)
+    out = os.path.abspath(args.out) if args.out else None
+    figures = os.path.abspath(args.plot) if args.plot else None
+    os.chdir(tempfile.mkdtemp(prefix='halite-bench-'))
+
+    axes = {axis: values for axis, values in AXES.items() if not args.axis or axis in args.axis}
+    rows = sweep(args.modules or micro.MODULES, args.function or FUNCTIONS, axes, args.repeat, args.budget)
+
+    if out:
+        with open(out, 'w') as out_file:
+            json.dump({'revision': micro.revision(), 'base': BASE, 'rows': rows}, out_file)
+    if figures:
+        if plt is None:
+            print('matplotlib is not installed, no figures', file=sys.stderr)
+        else:
+            plot(rows, figures)
+
+    for axis in axes:
+        others = ', '.join('%s=%s' % item for item in BASE.items() if item[0] != axis)
+        print('\nagent() p50 (ms) against %s (%s)' % (axis, others))
+        modules = list(dict.fromkeys(row['module'] for row in rows))
+        print('%8s' % axis + ''.join('%10s' % module for module in modules))
+        for value in axes[axis]:
+            line = '%8s' % value
+            for module in modules:
+                p50 = [row['p50'] for row in rows if row['axis'] == axis and row[axis] == value and
+                       row['module'] == module and row['function'] == 'agent']
+                line += '%10.1f' % (p50[0] / 1000) if p50 else '%10s' % '-'
+            print(line)
+    if 'ships' in axes:
+        print('\nGrowth with the fleet size (latency ~ ships^exponent between the two largest fleets)')
+        for module, function, exponent in growth(rows):
+            print('%-8s %-30s %5.2f' % (module, function, exponent))
@@ -1,6 +1,18 @@
-from kaggle_environments.envs.halite.helpers import Board, ShipAction, ShipyardAction
-import pandas as pd
+try:
+    from kaggle_environments.envs.halite.helpers import Board, ShipAction, ShipyardAction
+except ImportError:
+    # Offline builds play on the local engine
+    from engine import Board, ShipAction, ShipyardAction
 import numpy as np
+from snapshot import BoardSnapshot
+from overlay import TurnOverlay
+from logger import Logger, DEBUG, INFO
+from decision_trace import TraceWriter
+from timers import PhaseTimer
+from deadline import TurnBudget, cheap_action
+from routes import FieldCache
+from records import Records, ShipRecord, ShipyardRecord, CellRecord
+from offsets import offset_table
 
 
 class DecisionShip:
@@ -10,19 +22,28 @@ class DecisionShip:
             board: the board that we will base our decisions on
             ship: the ship we are deciding for
             step: the steps into the stimulation
+            snapshot: the BoardSnapshot of the board
+            radius: how many moves away the ship looks, smaller when the turn runs out of time
         returns:
             determine: returns the next-action that should be taken
     """
-    def __init__(self, board: Board, ship_id, step):
+    def __init__(self, board: Board, ship_id, step, snapshot, radius=10):
         self.board = board
         self.ship = board.ships[ship_id]
         self.step = step
+        self.snapshot = snapshot
+        self.radius = radius
 
         # Some usefull properties
         self.player = self.board.current_player
         self.ship_cargo = self.ship.halite
         self.current_cell = self.ship.cell
         self.current_position = self.ship.position
+        self.current_index = snapshot.index(self.current_position)
+        self.current_halite = float(snapshot.halite[self.current_index])
+        # Player totals, projected by the actions committed earlier in the turn
+        self.player_halite = float(snapshot.player_halite[snapshot.me])
+        self.n_ships, self.n_shipyards = len(snapshot.my_ships()), len(snapshot.my_shipyards())
         
         # All moves ship can take
         self.moves = {"N": ShipAction.NORTH, 'S': ShipAction.SOUTH, 'W': ShipAction.WEST,
@@ -35,16 +56,19 @@ class DecisionShip:
         self.weights = {"N": 0, "E": 0, "W": 0, "S": 0, "mine": 0, "convert": 0, 'None': 0}
 
         # The object's relative situation to other ship/shipyards
-        self.locator = Locator(board, self.ship)
-        self.Ships = self.locator.get_ship_info()
-        self.Shipyards = self.locator.get_shipyard_info()
-        self.grid = self.locator.generate_grid_df()
-
+        with timer.phase('locator'):
+            self.locator = Locator(snapshot, self.ship, radius)
+            self.Ships = self.locator.get_ship_info()
+            self.Shipyards = self.locator.get_shipyard_info()
+            self.grid = self.locator.generate_grid_df()
+
+        # The way from every cell to my closest shipyard, kept across turns
+        self.field = fields.get(snapshot)
         # Closest shipyard id
         self.closest_shipyard_id = self.closest_shipyard()
         # Gets the distance to the closest shipyard
         if self.closest_shipyard_id != 0:
-            self.closest_shipyard_distance = self.Shipyards[self.closest_shipyard_id]['moves']
+            self.closest_shipyard_distance = int(self.field.moves[self.current_index])
         else:
             self.closest_shipyard_distance = 1
 
@@ -61,13 +85,14 @@ class DecisionShip:
     def determine(self):
         """ Returns next action decided for the ship based on the observations that have been made. """
         self.weight_moves()  # Calculate the weights for main four directions
-        self.round()  # Round the weights
-        self.apply_elimination()  # Apply the eliminations
+        with timer.phase('elimination'):
+            self.round()  # Round the weights
+            self.apply_elimination()  # Apply the eliminations
 
-        # Sort the values
-        sorted_weights = {k: v for k, v in sorted(self.weights.items(), key=lambda item: item[1], reverse=True)}
+            # Sort the values
+            sorted_weights = {k: v for k, v in sorted(self.weights.items(), key=lambda item: item[1], reverse=True)}
 
-        log('  -> weights: ' + str(sorted_weights))
+        logger.debug('  -> weights: %s', sorted_weights)
 
         # Choose the action with highest value given that it is not eliminated
         for action in sorted_weights.keys():
@@ -82,7 +107,7 @@ class DecisionShip:
         weightX, weightY = self.grid[self.current_direction]['weightX'], self.grid[self.current_direction]['weightY']
 
         if value != 0 and loging:
-            log('   ' + title + ', adding ' + str(round(value * weightX, 3)) + ' to ' + dirX + ', moves: ' + str(self.grid[self.current_direction]['movesX']) + ' and ' + str(round(value * weightY, 2)) + ' to ' + dirY + ", moves: " + str(self.grid[self.current_direction]['movesY']))
+            logger.debug('   %s, adding %s to %s, moves: %s and %s to %s, moves: %s', title, round(value * weightX, 3), dirX, self.grid[self.current_direction]['movesX'], round(value * weightY, 2), dirY, self.grid[self.current_direction]['movesY'])
 
         if weightX != 0: self.weights[dirX] += value * weightX
         if weightY != 0: self.weights[dirY] += value * weightY
@@ -90,19 +115,19 @@ class DecisionShip:
     def weight_convert(self, base_threshold=600):
         """ Weights the option for ship conversion. """
         # Calculating the threshhold
-        threshold = base_threshold + 1000 * (len(self.player.shipyards) // 3)
+        threshold = base_threshold + 1000 * (self.n_shipyards // 3)
         
         # 1. If they are no shipyards left
-        no_shipyards = len(self.player.shipyards) == 0
+        no_shipyards = self.n_shipyards == 0
         # 2. There will be a threshold for the amount of cargo any ship could have
         threshhold_reach = self.ship.halite > threshold
         # 3. On shipyard already
-        on_shipyard = self.ship.cell.shipyard is not None
+        on_shipyard = self.snapshot.shipyard_owner[self.current_index] != -1
 
-        if self.player.halite + self.ship.halite >= 500:
+        if self.player_halite + self.ship.halite >= 500:
             if no_shipyards and not on_shipyard:
                 self.weights['convert'] = 1e4
-            elif self.Shipyards[self.closest_shipyard_id]['moves'] < 12 and not on_shipyard:
+            elif self.closest_shipyard_distance < 12 and not on_shipyard:
                 self.weights['convert'] = (self.ship_cargo - threshold) * 60
             else:
                 self.eliminated_moves.append('convert')
@@ -127,58 +152,62 @@ class DecisionShip:
                 4. If there is an enemy shipyard: depending on the situation might attack it
         """
         # Weight the CONVERT option
-        self.weight_convert()
+        with timer.phase('weight_convert'):
+            self.weight_convert()
 
         # See if any of the shipyards need defending
-        self.shipyard_status()
+        with timer.phase('shipyard_status'):
+            self.shipyard_status()
 
         # Iterate through different directions
-        for direction in list(self.grid.columns):
-            # Set the global direction to the one at hand
-            self.current_direction = direction
-
-            # Get the ids just for the ease of use
-            Ship_id = self.grid[direction]['ship_id']
-            Shipyard_id = self.grid[direction]['shipyard_id']
-
-            # 1. Evaluate the moves based on other objects present in the map
-            # 1.1 If there was a ship
-            if not pd.isna(Ship_id):
-                # If it was my ship
-                if self.grid[direction].my_ship == 1:
-                    if self.Ships[Ship_id]['moves'] == 1:
-                        log(' Myship on ' + direction)
-                        self.eliminated_moves.append(direction)
+        with timer.phase('grid_loop'):
+            for direction in self.grid.ids:
+                # Set the global direction to the one at hand
+                self.current_direction = direction
+
+                # Get the ids just for the ease of use
+                Ship_id = self.grid[direction]['ship_id']
+                Shipyard_id = self.grid[direction]['shipyard_id']
+
+                # 1. Evaluate the moves based on other objects present in the map
+                # 1.1 If there was a ship
+                if Ship_id is not None:
+                    # If it was my ship
+                    if self.grid[direction].my_ship == 1:
+                        if self.Ships[Ship_id]['moves'] == 1:
+                            logger.debug(' Myship on %s', direction)
+                            self.eliminated_moves.append(direction)
+                        else:
+                            self.distribute_ships(Ship_id)
                     else:
-                        self.distribute_ships(Ship_id)
-                else:
-                    if self.Ships[Ship_id]['moves'] == 1 and self.Ships[Ship_id]['cargo'] < self.ship_cargo:
-                        self.eliminated_moves.append(direction)
-                        self.eliminated_moves.append('mine')
-                        # Go to the closest shipyard preferably
-                        self.go_to_closest_shipyard(self.ship_cargo ** 3)
+                        if self.Ships[Ship_id]['moves'] == 1 and self.Ships[Ship_id]['cargo'] < self.ship_cargo:
+                            self.eliminated_moves.append(direction)
+                            self.eliminated_moves.append('mine')
+                            # Go to the closest shipyard preferably
+                            self.go_to_closest_shipyard(self.ship_cargo ** 3)
+                        else:
+                            self.deal_enemy_ship(Ship_id)
+
+                # 1.2 If there was a shipyard
+                if Shipyard_id is not None:
+                    if self.grid[direction].my_shipyard == 1:
+                        self.deposit()
                     else:
-                        self.deal_enemy_ship(Ship_id)
-
-            # 1.2 If there was a shipyard
-            if not pd.isna(Shipyard_id):
-                if self.grid[direction].my_shipyard == 1:
-                    self.deposit()
-                else:
-                    self.attack_enemy_shipyard(Shipyard_id)
+                        self.attack_enemy_shipyard(Shipyard_id)
 
-            # 2. Trigger movement in the main four direction solely based on the amount of halite each cell has
-            main_dir_encourage = 5 * self.grid[direction].halite + 10
-            self.add_accordingly(main_dir_encourage, title='  main4: ', loging=False)
+                # 3. Either encourage mining or discourage it by adding the difference between cells to the mine
+                mining_trigger = (self.current_halite - self.grid[direction].halite) / self.grid[direction].moves
 
-            # 3. Either encourage mining or discourage it by adding the difference between cells to the mine
-            mining_trigger = (self.current_cell.halite - self.grid[direction].halite) / self.grid[direction].moves
+                self.weights['mine'] += mining_trigger
 
-            self.weights['mine'] += mining_trigger
+        # 2. Trigger movement in the main four direction solely based on the amount of halite each cell has: every cell
+        # of the grid adds 5 * halite + 10, spread like add_accordingly, and the sums come from the turn's field
+        for direction, value in self.snapshot.attraction(self.radius).at(self.current_index, 5, 10).items():
+            self.weights[direction] += value
 
         # The correlation of the mining with cell's halite
-        self.weights['mine'] += self.current_cell.halite * 500
-        # log('  Mining-enc: ' + str(round(self.current_cell.halite ** 2, 2)))
+        self.weights['mine'] += self.current_halite * 500
+        # log('  Mining-enc: ' + str(round(self.current_halite ** 2, 2)))
 
     def distribute_ships(self, ship_id):
         """ This function lowers the ships tendency to densely populate an area """
@@ -259,7 +288,7 @@ class DecisionShip:
 
     def attack_enemy_shipyard(self, shipyard_id):
         """ Weights the tendency to attack the enemy shipyard. """
-        if len(self.player.ships) >= 2 and self.player.halite > 700 and self.ship_cargo < 30 and self.closest_shipyard_distance < 5:
+        if self.n_ships >= 2 and self.player_halite > 700 and self.ship_cargo < 30 and self.closest_shipyard_distance < 5:
             destory_shipyard = 1e4 / len(self.current_direction)
             self.add_accordingly(destory_shipyard, title='Destroy_en_shipyard', loging=False)
         elif len(self.current_direction) == 1 and self.ship_cargo > 100:
@@ -268,7 +297,9 @@ class DecisionShip:
     def go_to_closest_shipyard(self, value):
         """ Encourage movement towards the nearest shipyard """
         if self.closest_shipyard_id != 0:
-            dirX, dirY = self.Shipyards[self.closest_shipyard_id]['dirX'], self.Shipyards[self.closest_shipyard_id]['dirY']
+            dx, dy = self.field.dx[self.current_index], self.field.dy[self.current_index]
+            dirX = 'E' if dx > 0 else 'W' if dx < 0 else 'None'
+            dirY = 'N' if dy > 0 else 'S' if dy < 0 else 'None'
             
             self.weights[dirX] += value
             self.weights[dirY] += value
@@ -278,24 +309,17 @@ class DecisionShip:
     def shipyard_status(self):
         """ Measures tendency for the shipyards within the map """
         if not self.Shipyards.empty:
+            # The ships around the shipyards are measured once for all the ships of the turn
+            threats = self.snapshot.threats()
             for shipyard in self.player.shipyards:
-                self.analyze_shipyard_surroundings(shipyard.id)
+                self.analyze_shipyard_surroundings(shipyard.id, threats)
 
-    def analyze_shipyard_surroundings(self, shipyard_id):
+    def analyze_shipyard_surroundings(self, shipyard_id, threats):
         """ Checks to see if a given shipyard needs protection or not? """
-        shipyard = self.board.shipyards[shipyard_id]
         dirX, dirY = self.Shipyards[shipyard_id]['dirX'], self.Shipyards[shipyard_id]['dirY']
-        value = 0
-        shipyard_grid = Locator(self.board, shipyard).generate_grid_df()
-
-        for direction in list(shipyard_grid.columns):
-            ship_id = shipyard_grid[direction].ship_id
-            # If there is a ship on that cell
-            if not pd.isna(ship_id):
-                if shipyard_grid[direction].my_ship == 1:
-                    value += -1e4 / shipyard_grid[direction]['moves'] ** 2
-                else:
-                    value += 1e4 / shipyard_grid[direction]['moves'] ** 2
+        # Every enemy ship around the shipyard adds 1e4 / moves ** 2, every one of mine takes it away
+        index = self.snapshot.shipyard_lookup[shipyard_id]
+        value = 1e4 * float(threats.threat[index] - threats.defence[index])
 
         if value > 0:
             # More concenteration on the closest shipyard
@@ -308,14 +332,10 @@ class DecisionShip:
         
     def closest_shipyard(self):
         """ Returns the closest shipyard's id. """
-        shipyard_id = 0  # The default value would be zero meaning that they either no shipyard or I did not have any
-        # First we should check to see if there are any Shipyards at all
-        if not self.Shipyards.empty:
-            # Then we should check to see if I have any shipyards
-            if not self.Shipyards.T[self.Shipyards.T['my_shipyard'] == 1].empty:
-                shipyard_id = self.Shipyards.T[self.Shipyards.T['my_shipyard'] == 1]['moves'].astype('int').idxmin()
-
-        return shipyard_id
+        # The default value would be zero meaning that they either no shipyard or I did not have any
+        if self.field is None:
+            return 0
+        return self.snapshot.shipyard_ids[self.snapshot.shipyard_index[self.field.target[self.current_index]]]
 
     def near_end(self):
         """ Determines if the game is about to end so the ships with halite can convert to shipyard and maximum the halite we will end up with. """
@@ -323,7 +343,7 @@ class DecisionShip:
 
         # If the halite was less than 500 and it had no ships
         for opp in self.board.opponents:
-            if opp.halite < 500 and len(opp.ships) == 0 and self.player.halite > opp.halite: count += 1
+            if opp.halite < 500 and len(opp.ships) == 0 and self.player_halite > opp.halite: count += 1
             if opp.halite > 2000 and len(opp.ships) > 1: count -= 1
 
         # If count was more than 2 return True
@@ -347,14 +367,17 @@ class DecisionShip:
 
 
 class ShipyardDecisions:
-    def __init__(self, board: Board, player, step):
+    def __init__(self, board: Board, player, step, snapshot):
         """
             Decides the Shipyard's next action based on the given parameters
             board: The board that we will be observing
             step: step of the stimulation
+            snapshot: the BoardSnapshot of the board
         """
         self.board = board
-        self.player_halite = player.halite
+        self.snapshot = snapshot
+        # Projected by the actions committed earlier in the turn
+        self.player_halite = float(snapshot.player_halite[snapshot.me])
         self.step = step
         self.Shipyards = player.shipyards
         self.shipyard_tendencies = {}
@@ -364,7 +387,7 @@ class ShipyardDecisions:
         self.weight_shipyard_tendencies()
         sorted_weights = {k: v for k, v in
                           sorted(self.shipyard_tendencies.items(), key=lambda item: item[1], reverse=True)}
-        log(' Shipyard weights: ' + str(sorted_weights))
+        logger.info(' Shipyard weights: %s', sorted_weights)
         shipyard_ids = []
         for shipyard_id, tendency in sorted_weights.items():
             if tendency > 0 and self.player_halite >= 500:
@@ -377,322 +400,202 @@ class ShipyardDecisions:
         """ Iterates through the shipyards and weights their tendencies. """
         for shipyard in self.Shipyards:
             # Weighting will take place only when there are no ships on the cell
-            if shipyard.cell.ship is None:
-                grid = Locator(self.board, shipyard).generate_grid_df()
-                weight = self.weight(grid)
+            if self.snapshot.ship_owner[self.snapshot.index(shipyard.position)] == -1:
+                weight = self.weight(self.snapshot.shipyard_lookup[shipyard.id])
 
                 self.shipyard_tendencies[shipyard.id] = weight
 
-    def weight(self, grid):
+    def weight(self, shipyard_index, radius=10):
         """
             Weights shipyard's tendency to spawn solely based on the objects around it
             The weighting system is rather simple:
                 - If there was an enemy ship add to the weight
                 - If there was one of my own ships, then subtract from the weight
-            Take the distance of the ship into account
+            Take the distance of the ship into account (only the ones in `radius` moves count)
         """
-        if len(self.board.current_player.ships) == 0:
+        if len(self.snapshot.my_ships()) == 0:
             return 10
         if self.step < 70 and self.player_halite >= 500:
             return 10
 
-        value = 0
-        # Iterating through the grid
-        for direction in grid.columns:
-            if not pd.isna(grid[direction].ship_id):
-                if grid[direction].my_ship == 1:
-                    value -= 100 / grid[direction]['moves']
-                else:
-                    value += 100 / grid[direction]['moves']
-                    # If there was an enemy ship one move away from my shipyard then spawn
-                    if grid[direction]['moves'] == 1 and self.player_halite > 500: 
-                        value += 1e3 
+        threats = self.snapshot.threats(radius)
+        moves = threats.moves[shipyard_index]
+        enemy, own = threats.enemy[shipyard_index], threats.own[shipyard_index]
+
+        # The ships around: enemies add to the weight, mine take from it
+        close = threats.inverse(1, 100, moves)
+        value = close[enemy].sum() - close[own].sum()
+        # If there was an enemy ship one move away from my shipyard then spawn
+        if self.player_halite > 500:
+            value += 1e3 * (enemy & (moves == 1)).sum()
 
-            if not pd.isna(grid[direction].shipyard_id):
-                if grid[direction].my_shipyard == 0:
-                    value += 200 / grid[direction]['moves']
+        # The enemy shipyards around
+        value += threats.inverse(1, 200, threats.shipyard_moves[shipyard_index])[threats.enemy_shipyards[shipyard_index]].sum()
 
-        return round(value, 2)
+        return round(float(value), 2)
 
 
 class Locator:
-    """ This module returns dataframes that could be used to analyze the board much faster """
+    """ This module returns Records (light column-wise tables) that could be used to analyze the board much faster """
 
-    def __init__(self, board, ship):
-        self.board = board
+    def __init__(self, snapshot, ship, radius=10):
+        self.snapshot = snapshot
         self.ship = ship
         self.ship_position = ship.position
+        self.radius = radius
         # Get the grid
-        self.grid = grid(ship.cell)
+        self.grid, self.grid_indices = grid(snapshot.index(ship.position), snapshot.size, radius)
 
     def get_ship_info(self):
-        """ Returns the info about ships in all of the board. """
-        ships_info = {}
-
-        for ship_id, ship in self.board.ships.items():
-            base_info = {"my_ship": 0, "moves": 0, "position": (ship.position.x, ship.position.y),
-                         'cargo': ship.cell.halite,
-                         'dirX': (determine_directions(self.ship_position, ship.position))[0],
-                         'dirY': (determine_directions(self.ship_position, ship.position))[1],
-                         'movesX': min(abs(self.ship_position.x - ship.position.x),
-                                       abs(21 - self.ship_position.x + ship.position.x)),
-                         'movesY': min(abs(self.ship_position.y - ship.position.y),
-                                       abs(21 - self.ship_position.y + ship.position.y))}
-
-            base_info['moves'] = base_info['movesX'] + base_info['movesY']
-
-            if ship_id in self.board.current_player.ship_ids and ship.id != self.ship.id:
-                base_info['my_ship'] = 1
-                ships_info[ship_id] = base_info
-            elif not (ship_id in self.board.current_player.ship_ids):
-                ships_info[ship_id] = base_info
-
-        return pd.DataFrame(ships_info)
+        """ Returns the info about ships in all of the board (the located ship excluded). """
+        snapshot, distances = self.snapshot, self.snapshot.distances
+        origin = distances.ship(snapshot.ship_lookup[self.ship.id])
+        keep = np.flatnonzero(np.arange(len(snapshot.ship_ids)) != origin)
+
+        positions = snapshot.ship_pos[keep]
+        dirX, dirY = distances.directions(origin, keep)
+        movesX, movesY = np.abs(distances.dx[origin, keep]), np.abs(distances.dy[origin, keep])
+
+        return Records(ShipRecord, [snapshot.ship_ids[n] for n in keep], {
+            'my_ship': (snapshot.ship_player[keep] == snapshot.me).astype(int),
+            'moves': distances.moves[origin, keep],
+            'position': list(zip(snapshot.x[positions].tolist(), snapshot.y[positions].tolist())),
+            'cargo': snapshot.halite[positions],
+            'dirX': dirX, 'dirY': dirY,
+            'movesX': movesX, 'movesY': movesY})
 
     def get_shipyard_info(self):
         """ Returns the info about shipyards in all of the board. """
-        shipyards_info = {}
-
-        for shipyard_id, shipyard in self.board.shipyards.items():
-            base_info = {"my_shipyard": 0, "position": (shipyard.position.x, shipyard.position.y),
-                         'dirX': (determine_directions(self.ship_position, shipyard.position))[0],
-                         'dirY': (determine_directions(self.ship_position, shipyard.position))[1],
-                         'player_halite': shipyard.player.halite,
-                         'movesX': min(abs(self.ship_position.x - shipyard.position.x),
-                                       abs(21 - self.ship_position.x + shipyard.position.x)),
-                         'movesY': min(abs(self.ship_position.y - shipyard.position.y),
-                                       abs(21 - self.ship_position.y + shipyard.position.y))}
-
-            base_info['moves'] = base_info['movesX'] + base_info['movesY']
-
-            if shipyard_id in self.board.current_player.shipyard_ids:
-                base_info['my_shipyard'] = 1
-                shipyards_info[shipyard_id] = base_info
-            else:
-                shipyards_info[shipyard_id] = base_info
-
-        return pd.DataFrame(shipyards_info)
+        snapshot, distances = self.snapshot, self.snapshot.distances
+        origin, targets = distances.ship(snapshot.ship_lookup[self.ship.id]), distances.shipyards()
+        positions = snapshot.shipyard_pos
+        dirX, dirY = distances.directions(origin, targets)
+
+        return Records(ShipyardRecord, snapshot.shipyard_ids, {
+            'my_shipyard': (snapshot.shipyard_player == snapshot.me).astype(int),
+            'position': list(zip(snapshot.x[positions].tolist(), snapshot.y[positions].tolist())),
+            'dirX': dirX, 'dirY': dirY,
+            'player_halite': snapshot.player_halite[snapshot.shipyard_player],
+            'movesX': np.abs(distances.dx[origin, targets]), 'movesY': np.abs(distances.dy[origin, targets]),
+            'moves': distances.moves[origin, targets]})
 
     def generate_grid_df(self):
-        """ Generates a Dataframe describing the information of objects and cells in the grid of the ship. """
-        all_dirs = {}
-
-        for direction, cell in self.grid.items():
-
-            base_info = {
-                "ship_id": None, "shipyard_id": None,
-                "my_ship": 0, "my_shipyard": 0,
-                "halite": 0, "moves": 0,
-                "movesX": 0, "movesY": 0,
-                "dirY": 'None', "dirX": 'None',
-                'weightX': 0, 'weightY': 0
-            }
-
-            if "N" in direction:
-                base_info['dirY'] = 'N'
-                base_info['movesY'] = direction.count("N")
-            elif "S" in direction:
-                base_info['dirY'] = 'S'
-                base_info['movesY'] = direction.count("S")
-
-            if "W" in direction:
-                base_info['dirX'] = 'W'
-                base_info['movesX'] = direction.count("W")
-            elif "E" in direction:
-                base_info['dirX'] = 'E'
-                base_info['movesX'] = direction.count("E")
-
-            if base_info['dirY'] != 'None':
-                base_info['weightY'] = 1 / (len(direction) ** 2 * base_info['movesY']) 
-
-            if base_info['dirX'] != 'None':
-                base_info['weightX'] = 1 / (len(direction) ** 2 * base_info['movesX']) 
-
-            if cell.ship is not None:
-                base_info["ship_id"] = cell.ship.id
-                if cell.ship.id in self.ship.player.ship_ids:
-                    base_info["my_ship"] = 1
-
-            if cell.shipyard is not None:
-                base_info["shipyard_id"] = cell.shipyard.id
-                if cell.shipyard.id in self.ship.player.shipyard_ids:
-                    base_info['my_shipyard'] = 1
-
-            base_info['halite'] = cell.halite
-            # The number of letters in the direction would indicate the number of moves needed to get there
-            base_info['moves'] = len(direction)
-
-            all_dirs[direction] = base_info
-
-        return pd.DataFrame(all_dirs)
+        """ Generates the Records describing the information of objects and cells in the grid of the ship, keyed by direction. """
+        snapshot = self.snapshot
+        # The analysed object's owner decides what counts as "mine"
+        owner = snapshot.ship_player[snapshot.ship_lookup[self.ship.id]] if self.ship.id in snapshot.ship_lookup \
+            else snapshot.shipyard_player[snapshot.shipyard_lookup[self.ship.id]]
+        table = offset_table(self.radius, snapshot.size)
+        indices = self.grid_indices
+        ship_owners, shipyard_owners = snapshot.ship_owner[indices], snapshot.shipyard_owner[indices]
+
+        # The direction properties come precomputed with the offset table, the number of moves is the number of letters
+        return Records(CellRecord, self.grid, {
+            'ship_id': [snapshot.ship_ids[n] if n != -1 else None for n in snapshot.ship_index[indices].tolist()],
+            'shipyard_id': [snapshot.shipyard_ids[n] if n != -1 else None for n in snapshot.shipyard_index[indices].tolist()],
+            'my_ship': (ship_owners == owner).astype(int),
+            'my_shipyard': (shipyard_owners == owner).astype(int),
+            'halite': snapshot.halite[indices],
+            'moves': table.moves,
+            'movesX': table.movesX, 'movesY': table.movesY,
+            'dirY': table.dirY, 'dirX': table.dirX,
+            'weightX': table.weightX, 'weightY': table.weightY})
 
 
 ####################
 # Helper Functions #
 ####################
-def determine_directions(point1, point2, size=21):
-    """ Given two points determine the closest directions to take to get to the point. """
-    x1, y1 = point1.x, point1.y
-    x2, y2 = point2.x, point2.y
-
-    # For both x and y they are two type of paths to take
-    diff_x_1 = abs(x2 - x1)
-    diff_x_2 = abs(size - x2 + x1)
-    diff_y_1 = abs(y2 - y1)
-    diff_y_2 = abs(size - y2 + y1)
-    # Given that x1=x2 or y1=y2 then return None, so we know
-    # no movement was needed in that axis.
-    best_x, best_y = 'None', 'None'
-
-    if diff_x_1 > diff_x_2:
-        if x2 - x1 > 0:
-            best_x = "W"
-        elif x2 - x1 < 0:
-            best_x = "E"
-    else:
-        if x2 - x1 > 0:
-            best_x = "E"
-        elif x2 - x1 < 0:
-            best_x = "W"
-
-    if diff_y_1 > diff_y_2:
-        if y2 - y1 > 0:
-            best_y = "S"
-        elif y2 - y1 < 0:
-            best_y = "N"
-    else:
-        if y2 - y1 > 0:
-            best_y = "N"
-        elif y2 - y1 < 0:
-            best_y = "S"
-
-    return best_x, best_y
-
-
-def grid(cell):
-    """ Returns a dictionary of cells which are in 10 moves distance of the given cell """
-    # The directions that are one move away
-    north, south, west, east = cell.north, cell.south, cell.west, cell.east
-    # The directions that are two moves away
-    n2, s2, w2, e2 = north.north, south.south, west.west, east.east
-    n3, s3, w3, e3 = n2.north, s2.south, w2.west, e2.east
-    n4, s4, w4, e4 = n3.north, s3.south, w3.west, e3.east
-    n5, s5, w5, e5 = n4.north, s4.south, w4.west, e4.east
-    n6, s6, w6, e6 = n5.north, s5.south, w5.west, e5.east
-    n7, s7, w7, e7 = n6.north, s6.south, w6.west, e6.east
-    n8, s8, w8, e8 = n7.north, s7.south, w7.west, e7.east
-    n9, s9, w9, e9 = n8.north, s8.south, w8.west, e8.east
-    n10, s10, w10, e10 = n9.north, s9.south, w9.west, e9.east
-
-    return {
-        # 1 move away
-        'N': north, 'S': south, 'W': west, 'E': east,
-        # 2 moves away
-        'NW': north.west, 'NE': north.east, 'SW': south.west, 'SE': south.east, 'WW': w2, 'EE': e2, 'NN': n2, 'SS': s2,
-        # 3 moves away
-        'SSS': s3, 'EEE': e3, 'WWW': w3, 'NNN': n3,
-        'ENN': n2.east, 'WNN': n2.west, 'ESS': s2.east, 'WSS': s2.west,
-        'SEE': e2.south, 'NEE': e2.north, 'SWW': w2.south, 'NWW': w2.north,
-        # 4 moves away
-        'NNNN': n4, 'SSSS': s4, 'WWWW': w4, 'EEEE': e4,
-        'EESS': e2.south.south, 'EENN': e2.north.north, 'WWNN': w2.north.north, 'WWSS': w2.south.south,
-        'WWWS': w3.south, 'EEES': e3.south, 'EEEN': e3.north, 'WWWN': w3.north,
-        'SSSW': s3.west, 'SSSE': s3.east, 'NNNE': n3.east, 'NNNW': n3.west,
-        # 5 moves away
-        'SSSSS': s5, 'NNNNN': n5, 'WWWWW': w5, 'EEEEE': e5,
-        'WWWWN': w4.north, 'WWWWS': w4.south, 'EEEEN': e4.north, 'EEEES': e4.south,
-        'SSSSE': s4.east, 'SSSSW': s4.west, 'NNNNW': n4.west, 'NNNNE': n4.east,
-        'EESSS': s3.east.east, 'WWSSS': s3.west.west, 'EENNN': n3.east.east, 'WWNNN': n3.west.west,
-        'EEESS': e3.south.south, 'EEENN': e3.north.north, 'WWWSS': w3.south.south, 'WWWNN': w3.north.north,
-        # 6 moves away
-        'SSSSSS': s6, 'NNNNNN': n6, 'WWWWWW': w6, 'EEEEEE': e6,
-        'WWWWWN': w5.north, 'WWWWWS': w5.south, 'EEEEEN': e5.north, 'EEEEES': e5.south,
-        'SSSSSE': s5.east, 'SSSSSW': s5.west, 'NNNNNW': n5.west, 'NNNNNE': n5.east,
-        'WWWWNN': w4.north.north, 'WWWWSS': w4.south.south, 'EEEENN': e4.north.north, 'EEEESS': e4.south.south,
-        'NNNNEE': n4.east.east, 'NNNNWW': n4.west.west, 'SSSSWW': s4.west.west, 'SSSSEE': s4.east.east,
-        'EEENNN': e3.north.north.north, 'EEESSS': e3.south.south.south, 'WWWNNN': w3.north.north.north, 'WWWSSS': w3.south.south.south,
-        # 7 moves away
-        'SSSSSSS': s7, 'NNNNNNN': n7, 'WWWWWWW': w7, 'EEEEEEE': e7,
-        'WWWWWWN': w6.north, 'WWWWWWS': w6.south, 'EEEEEEN': e6.north, 'EEEEEES': e6.south,
-        'SSSSSSE': s6.east, 'SSSSSSW': s6.west, 'NNNNNNW': n6.west, 'NNNNNNE': n6.east,
-        'WWWWWNN': w5.north.north, 'WWWWWSS': w5.south.south, 'EEEEENN': e5.north.north, 'EEEEESS': e5.south.south,
-        'NNNNNWW': n5.west.west, 'NNNNNEE': n5.east.east, 'SSSSSWW': s5.west.west, 'SSSSSEE': s5.east.east,
-        'EEEENNN': e4.north.north.north, 'EEEESSS': e4.south.south.south, 'WWWWNNN': w4.north.north.north, 'WWWWSSS': w4.south.south.south,
-        'NNNNEEE': n4.east.east.east, 'NNNNWWW': n4.west.west.west, 'SSSSWWW': s4.west.west.west, 'SSSSEEE': s4.east.east.east,
-        # 8 moves away
-        'SSSSSSSS': s8, 'NNNNNNNN': n8, 'WWWWWWWW': w8, 'EEEEEEEE': e8,
-        'WWWWWWWN': w7.north, 'WWWWWWWS': w7.south, 'EEEEEEEN': e7.north, 'EEEEEEES': e7.south,
-        'SSSSSSSE': s7.east, 'SSSSSSSW': s7.west, 'NNNNNNNW': n7.west, 'NNNNNNNE': n7.east,
-        'WWWWWWNN': w6.north.north, 'WWWWWWWSS': w6.south.south, 'EEEEEEENN': e6.north.north, 'EEEEEEESS': e6.south.south,
-        'NNNNNNWW': n6.west.west, 'NNNNNNEE': n6.east.east, 'SSSSSSWW': s6.west.west, 'SSSSSSEE': s6.west.west,
-        'NNNNNWWW': n5.west.west.west, 'NNNNNEEE': n5.east.east.east, 'SSSSSWWW': s5.west.west.west, 'SSSSSEEE':  s5.east.east.east,
-        'EEEEENNN': e5.north.north.north, 'EEEEESSS': e5.south.south.south, 'WWWWWNNN': w5.north.north.north, 'WWWWWSSS': w5.south.south.south,
-        'EEEENNNN': e4.north.north.north.north, 'WWWWNNNN': w4.north.north.north.north, 'EEEESSSS': e4.south.south.south.south, 'WWWWSSSS': w4.south.south.south.south,
-        # 9 moves away
-        'SSSSSSSS': s9, 'NNNNNNNN': n9, 'WWWWWWWW': w9, 'EEEEEEEE': e9,
-        'WWWWWWWWN': w8.north, 'WWWWWWWWS': w8.south, 'EEEEEEEEN': e8.north, 'EEEEEEEES': e8.south,
-        'SSSSSSSSE': s8.east, 'SSSSSSSSW': s8.west, 'NNNNNNNNW': n8.west, 'NNNNNNNNE': n8.east,
-        'NNNNNNNEE': n7.east.east, 'NNNNNNNWW': n7.west.west, 'SSSSSSSEE': s7.east.east, 'SSSSSSSWW': s7.west.west,
-        'EEEEEEENN': e7.north.north, 'EEEEEEESS': e7.south.south, 'WWWWWWWNN': w7.north.north, 'WWWWWWWSS': w7.south.south,
-        'NNNNNNWWW': n6.west.west.west, 'NNNNNNEEE': n6.east.east.east, 'SSSSSSWWW': s6.west.west.west, 'SSSSSSEEE': s6.east.east.east,
-        'EEEEEENNN': e6.north.north.north, 'EEEEEESSS': e6.south.south.south, 'WWWWWWNNN': w6.north.north.north, 'WWWWWWSSS': w6.south.south.south,
-        'NNNNNWWWW': n5.west.west.west.west, 'NNNNNEEEE': n5.east.east.east.east, 'SSSSSWWWW': s5.west.west.west.west, 'SSSSSEEEE':  s5.east.east.east.east,
-        'EEEEENNNN': e5.north.north.north.north, 'EEEEESSSS': e5.south.south.south.south, 'WWWWWNNNN': w5.north.north.north.north, 'WWWWWSSSS': w5.south.south.south.south,
-    }
-
-
-def log(text, step=1):
-    if step == 0:
-        with open("log.txt", "w") as text_file:
-            text = str(text) + '\n'
-            text_file.write(text)
-    else:
-        with open("log.txt", "a") as text_file:
-            text = str(text) + '\n'
-            text_file.write(text)
-
-
-log('logs:', 0)
+def grid(index, size=21, radius=10):
+    """ Returns the direction keys and the flat indices of the cells which are in `radius` moves distance of the given flat index """
+    table = offset_table(radius, size)
+    return table.keys, table.gather(index)
+
+
+# Lines are buffered during the turn and written when it ends, set the level to DEBUG to get every ship's weights
+logger = Logger('log.txt', INFO)
+# Every ship's weights and chosen action, give it a path (e.g. tracer = TraceWriter('game.trace')) to record a game
+tracer = TraceWriter()
+# Times the phases of every turn, set timer.enabled = True to log them per turn and summed over the game
+timer = PhaseTimer()
+# Shrinks the ships' grid when the turn runs out of time, it learns what a ship costs over the game
+budget = TurnBudget()
+# The distance fields of the shipyards, only searched again when the shipyards change
+fields = FieldCache()
 
 movement_dictionary = {"S": "SOUTH", 'N': 'NORTH', 'W': 'WEST', 'E': 'EAST', 'convert': 'CONVERT'}
 
 import operator
 def agent(obs, config):
+    # The clock of the turn starts before anything else
+    budget.start_turn(obs, config)
+    timer.start_turn()
     # Another for updates
-    board = Board(obs, config)
+    with timer.phase('board'):
+        board = Board(obs, config)
 
     # Step of the board
     step = board.observation['step']
+    # A new game starts a new log
+    if step == 0:
+        logger.reset()
+        tracer.reset()
+        timer.reset()
 
-    ships = [ship.id for ship in sorted(board.current_player.ships, key=operator.attrgetter("halite"), reverse=True)]
+    with timer.phase('sort'):
+        ships = [ship.id for ship in sorted(board.current_player.ships, key=operator.attrgetter("halite"), reverse=True)]
     actions = {}
 
+    # Dense copy of the board that every decision reads from, the overlay keeps it up with the committed actions
+    with timer.phase('snapshot'):
+        snapshot = BoardSnapshot(board)
+        overlay = TurnOverlay(snapshot, board.configuration.convert_cost, board.configuration.spawn_cost)
+
     # It would be absurd to log when I am out of the game
     if not(len(board.current_player.ships) == 0 and board.current_player.halite < 500):
-        log(str(step + 1) + '|-----------------------------------------------------------------------')
+        logger.info('%s|-----------------------------------------------------------------------', step + 1)
 
-    for ship_id in ships:
+    budget.mark()
+    for n, ship_id in enumerate(ships):
         if ship_id in board.current_player.ship_ids:
-            log(' Pos:' + str(board.ships[ship_id].position) + ', cargo: ' + str(board.ships[ship_id].halite) + ', player halite: ' + str(board.current_player.halite))
-                
-            next_action, action_type = DecisionShip(board, ship_id, step).determine()
+            logger.debug(' Pos:%s, cargo: %s, player halite: %s', board.ships[ship_id].position, board.ships[ship_id].halite, board.current_player.halite)
+
+            # The ships left get a smaller grid, then a cheap rule, when the turn is running out of time
+            radius = budget.radius(len(ships) - n)
+            if radius is None:
+                decider, action_type = None, cheap_action(snapshot, overlay, ship_id, fields.get(snapshot))
+                next_action = ShipAction[movement_dictionary[action_type]] if action_type != 'mine' else None
+            else:
+                decider = DecisionShip(board, ship_id, step, snapshot, radius)
+                next_action, action_type = decider.determine()
+            if radius != budget.RADII[0]:
+                logger.info(' Time pressure: %.2fs left, %s ships with radius %s', budget.remaining(), len(ships) - n, radius)
+            budget.ship_done(radius)
+            tracer.add(step, board.current_player.id, ship_id, board.ships[ship_id].position, board.ships[ship_id].halite,
+                       snapshot.player_halite[snapshot.me], decider.weights if decider else {}, action_type, decider)
                 
             if action_type != 'mine':
                 actions[ship_id] = movement_dictionary[action_type]
                 board.ships[ship_id].next_action = next_action
-                if step == 200: log(board)
-                board = board.next()
-                if step == 200: log(board)
+                # The next ships have to see where this one is going
+                with timer.phase('commit'):
+                    overlay.commit(ship_id, action_type)
         # else:
         #     log(' Not found')
 
-    shipyard_ids = ShipyardDecisions(board, board.current_player, step).determine()
+    with timer.phase('shipyards'):
+        shipyard_ids = ShipyardDecisions(board, board.current_player, step, snapshot).determine()
 
     for shipyard_id in board.current_player.shipyard_ids:
         if shipyard_id in shipyard_ids:
             actions[shipyard_id] = 'SPAWN'
             board.shipyards[shipyard_id].next_action = ShipyardAction.SPAWN
-            
-            board = board.next()
-        
+            overlay.commit(shipyard_id, 'spawn')
+
+    timer.end_turn(step)
+    if timer.enabled:
+        logger.info(timer.turn_summary())
+        if step == board.configuration.episode_steps - 2:
+            logger.info(timer.summary())
+    logger.flush()
+    tracer.flush()
     return actions
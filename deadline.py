@@ -0,0 +1,112 @@
+import time
+from collections import deque
+import numpy as np
+from engine import DEFAULT_CONFIGURATION
+from offsets import offset_table
+
+
+class TurnBudget:
+    """
+        Splits the time a turn may take between the ships and tells how far each one can afford to look
+        params:
+            safety: share of the time that is actually used, the rest covers what happens outside of agent()
+            window: how many of the last ships decided with a radius its cost is averaged over
+        Keeps:
+            limit: seconds the turn may take (act_timeout plus its share of the overage, times safety)
+            costs: radius: seconds the last ships decided with that radius took, measured with ship_done()
+        The costs are kept from one turn to the next so even the first ship of a turn is budgeted. The ships come
+        in cargo order, so when time runs out the ones left are the ones with the least to lose: they are looked
+        at with a smaller radius (10 -> 6 -> 2) and then with cheap_action().
+    """
+    RADII = (10, 6, 2)
+
+    def __init__(self, safety=0.6, window=50, clock=time.perf_counter):
+        self.safety = safety
+        self.clock = clock
+        self.costs = {radius: deque(maxlen=window) for radius in self.RADII}
+        self.start_turn({}, {})
+
+    def start_turn(self, obs, config):
+        """ Starts the clock of the turn the agent was called for, before anything else is done """
+        self.start = self.last = self.clock()
+        # The overage left is spread over the turns left
+        steps_left = max(config.get('episodeSteps', DEFAULT_CONFIGURATION['episodeSteps']) - obs.get('step', 0) - 1, 1)
+        self.limit = self.safety * (config.get('actTimeout', DEFAULT_CONFIGURATION['actTimeout']) +
+                                    obs.get('remainingOverageTime', 60) / steps_left)
+
+    def remaining(self):
+        return self.limit - (self.clock() - self.start)
+
+    def cost(self, radius):
+        """ Estimated seconds a ship takes with the radius, scaled by the grid size from the closest measured radius """
+        if self.costs[radius]:
+            return np.mean(self.costs[radius])
+        measured = [other for other in self.RADII if self.costs[other]]
+        if not measured:
+            return 0.
+        measured = min(measured, key=lambda other: abs(other - radius))
+        # The grid has 2r(r+1) cells
+        return np.mean(self.costs[measured]) * (radius * (radius + 1)) / (measured * (measured + 1))
+
+    def radius(self, ships_left):
+        """
+            Returns the radius the next ship can be decided with, None when there is no time left for a search
+            params:
+                ships_left: ships still to decide, the next one included
+        """
+        remaining = self.remaining()
+        for radius in self.RADII:
+            if self.cost(radius) * ships_left <= remaining:
+                return radius
+        # Not every ship fits anymore, the ones with more cargo still get the smallest search while it lasts
+        if self.cost(self.RADII[-1]) <= remaining:
+            return self.RADII[-1]
+        return None
+
+    def mark(self):
+        """ Starts the clock of the next ship """
+        self.last = self.clock()
+
+    def ship_done(self, radius):
+        """ Records the time since the previous ship (or the last mark) as the cost of the radius """
+        elapsed = self.clock() - self.last
+        if radius is not None:
+            self.costs[radius].append(elapsed)
+        self.mark()
+
+
+def cheap_action(snapshot, overlay, ship_id, field=None, full=300):
+    """
+        The move of a ship there was no time to weight: keep mining unless the cell is unsafe or nearly empty
+        A cell is unsafe when one of my ships will be on it or an enemy ship with less cargo could step on it.
+        With the DistanceField of my shipyards, a ship carrying more than `full` takes the first step home when it is safe.
+        Returns 'mine' or a direction.
+    """
+    size, me = snapshot.size, snapshot.me
+    ship_index = snapshot.ship_lookup[ship_id]
+    origin, cargo = int(snapshot.ship_pos[ship_index]), float(snapshot.ship_halite[ship_index])
+    table = offset_table(1, size)
+    # The cell itself then its four neighbours (N, S, W, E)
+    cells = np.concatenate([[origin], table.gather(origin)])
+
+    # A ship can reach its own cell and the four around it
+    threat = (snapshot.ship_owner != -1) & (snapshot.ship_owner != me) & (snapshot.ship_cargo < cargo)
+    threatened = threat[table.gather(cells)].any(axis=1) | threat[cells]
+    taken = np.array([cell in overlay.reserved for cell in cells.tolist()])
+    # My ships that haven't moved yet stay where they are
+    taken[1:] |= snapshot.ship_owner[cells[1:]] == me
+    enemy_shipyard = (snapshot.shipyard_owner[cells] != -1) & (snapshot.shipyard_owner[cells] != me)
+    safe = ~(threatened | taken | enemy_shipyard)
+
+    if field is not None and cargo > full and field.step[origin]:
+        home = table.keys.index(field.step[origin])
+        if safe[1 + home]:
+            return table.keys[home]
+
+    halite = snapshot.halite[cells]
+    best = 1 + int(np.argmax(np.where(safe[1:], halite[1:], -1)))
+    if safe[0] and not (halite[0] < 50 and safe[best] and halite[best] > 2 * halite[0] + 50):
+        return 'mine'
+    if safe[best]:
+        return table.keys[best - 1]
+    return 'mine'
@@ -0,0 +1,110 @@
+import json
+import numpy as np
+
+MAGIC = b'HALITE-TRACE 1\n'
+
+# Action codes of the 'action' column
+ACTIONS = ['mine', 'N', 'E', 'W', 'S', 'convert']
+
+# The hyperparameters set_hyperparameters() gives every ship, NaN for agents that don't have them
+HYPERPARAMETERS = ['MINING', 'DEPOSIT', 'DIRECTION_ENCOURAGEMENT', 'ATTACK_ENEMY_SHIP', 'DISTRIBUTION',
+                   'GET_AWAY', 'CLOSEST_SHIPYARD', 'CONVERSION']
+
+# One row per ship decision, the weights of eliminated moves are NaN
+COLUMNS = [('step', 'i2'), ('player', 'i1'), ('ship_step', 'i2'), ('ship_n', 'i2'), ('x', 'i1'), ('y', 'i1'),
+           ('cargo', 'f4'), ('player_halite', 'f4')] + \
+          [('weight_' + action, 'f4') for action in ACTIONS] + \
+          [('action', 'i1'), ('near_end', 'i1')] + \
+          [(name, 'f4') for name in HYPERPARAMETERS]
+
+
+class TraceWriter:
+    """
+        Append-only binary trace of the ship decisions, one columnar block per turn
+        params:
+            path: the trace file, None disables the writer so add() and flush() cost nothing
+        Layout: MAGIC, one JSON line with the columns and their dtypes, then a block per flush():
+        the number of rows (uint32) followed by every column's values back to back.
+    """
+    def __init__(self, path=None):
+        self.path = path
+        self.rows = []
+
+    @property
+    def enabled(self):
+        return self.path is not None
+
+    def add(self, step, player, ship_id, position, cargo, player_halite, weights, action, decider=None):
+        """
+            Records a ship's decision
+            params:
+                ship_id: the ship's id ('<step>-<n>')
+                position: the ship's Point
+                weights: the weights the action was chosen from (eliminated moves left out)
+                action: the chosen action ('mine', 'N', ..., 'convert')
+                decider: the DecisionShip, its hyperparameters and NEAR_END get recorded when it has them
+        """
+        if self.path is None:
+            return
+        ship_step, ship_n = ship_id.split('-')
+        self.rows.append((step, player, int(ship_step), int(ship_n), position.x, position.y, cargo, player_halite,
+                          *[weights.get(move, np.nan) for move in ACTIONS], ACTIONS.index(action),
+                          int(getattr(decider, 'NEAR_END', False)),
+                          *[getattr(decider, name, np.nan) for name in HYPERPARAMETERS]))
+
+    def flush(self):
+        """ Appends the rows recorded since the last flush as one block """
+        if self.path is None or not self.rows:
+            return
+        columns = list(zip(*self.rows))
+        self.rows = []
+
+        with open(self.path, 'ab') as trace_file:
+            if trace_file.tell() == 0:
+                trace_file.write(MAGIC + json.dumps(COLUMNS).encode() + b'\n')
+            trace_file.write(np.uint32(len(columns[0])).tobytes())
+            for (name, dtype), values in zip(COLUMNS, columns):
+                trace_file.write(np.asarray(values, dtype=dtype).tobytes())
+
+    def reset(self):
+        """ Empties the file (e.g. when a new game starts) and the pending rows """
+        self.rows = []
+        if self.path is not None:
+            open(self.path, 'wb').close()
+
+
+def read_trace(path):
+    """ Memory-maps a trace file and returns a dictionary of column: NumPy array with the rows of all blocks """
+    data = np.memmap(path, dtype=np.uint8, mode='r')
+    if len(data) == 0:
+        return {name: np.zeros(0, dtype=dtype) for name, dtype in COLUMNS}
+    if bytes(data[:len(MAGIC)]) != MAGIC:
+        raise ValueError(path + ' is not a trace file')
+
+    offset = len(MAGIC)
+    end = offset + bytes(data[offset:offset + 4096]).index(b'\n')
+    columns = [(name, np.dtype(dtype)) for name, dtype in json.loads(bytes(data[offset:end]))]
+    offset = end + 1
+
+    # Walk the blocks, each column of a block is a view into the mapping
+    blocks = {name: [] for name, _ in columns}
+    while offset < len(data):
+        rows = int(data[offset:offset + 4].view(np.uint32)[0])
+        offset += 4
+        for name, dtype in columns:
+            size = rows * dtype.itemsize
+            blocks[name].append(data[offset:offset + size].view(dtype))
+            offset += size
+
+    return {name: np.concatenate(parts) if parts else np.zeros(0, dtype=dtype)
+            for (name, dtype), parts in zip(columns, blocks.values())}
+
+
+def read_traces(paths):
+    """ Reads several trace files (e.g. the games of a tuning run) into one dictionary, 'game' holds the file's index """
+    traces = [read_trace(path) for path in paths]
+    if not traces:
+        return {}
+    merged = {name: np.concatenate([trace[name] for trace in traces]) for name in traces[0]}
+    merged['game'] = np.concatenate([np.full(len(trace['step']), n, dtype=np.int32) for n, trace in enumerate(traces)])
+    return merged
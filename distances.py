@@ -0,0 +1,54 @@
+import numpy as np
+
+
+class DistanceMatrix:
+    """
+        Wrapped offsets and distances between every pair of ships and shipyards of a board, computed all at once
+        params:
+            ship_pos, shipyard_pos: flat positions (Point.to_index) of the ships and the shipyards
+            size: the board size
+        Ships come first then shipyards, row i / column j describe the way from entity i to entity j:
+            dx, dy: the shortest offset around the torus, east and north being positive
+            moves: the number of moves it takes (|dx| + |dy|)
+    """
+    def __init__(self, ship_pos, shipyard_pos, size=21):
+        self.size = size
+        self.ships = len(ship_pos)
+        positions = np.concatenate([np.asarray(ship_pos, dtype=int), np.asarray(shipyard_pos, dtype=int)])
+        self.x, self.y = x, y = positions % size, size - 1 - positions // size
+
+        # Going the other way around is taken whenever it is shorter
+        half = size // 2
+        self.dx = (x[None, :] - x[:, None] + half) % size - half
+        self.dy = (y[None, :] - y[:, None] + half) % size - half
+        self.moves = np.abs(self.dx) + np.abs(self.dy)
+
+    def move(self, entity, position):
+        """ Updates the row and column of an entity that moved to another flat position """
+        size, half = self.size, self.size // 2
+        self.x[entity], self.y[entity] = position % size, size - 1 - position // size
+        self.dx[entity] = (self.x - self.x[entity] + half) % size - half
+        self.dy[entity] = (self.y - self.y[entity] + half) % size - half
+        self.dx[:, entity] = (self.x[entity] - self.x + half) % size - half
+        self.dy[:, entity] = (self.y[entity] - self.y + half) % size - half
+        self.moves[entity] = np.abs(self.dx[entity]) + np.abs(self.dy[entity])
+        self.moves[:, entity] = np.abs(self.dx[:, entity]) + np.abs(self.dy[:, entity])
+
+    def ship(self, ship_index):
+        """ Returns the row/column of a ship (its index in ship_ids) """
+        return ship_index
+
+    def shipyard(self, shipyard_index):
+        """ Returns the row/column of a shipyard (its index in shipyard_ids) """
+        return self.ships + shipyard_index
+
+    def shipyards(self):
+        """ Returns the columns of all the shipyards """
+        return slice(self.ships, None)
+
+    def directions(self, origin, targets):
+        """ Returns the dirX and dirY ('E'/'W', 'N'/'S', 'None' when aligned) leading from origin to each of targets """
+        dx, dy = self.dx[origin, targets], self.dy[origin, targets]
+        dirX = np.where(dx > 0, 'E', np.where(dx < 0, 'W', 'None'))
+        dirY = np.where(dy > 0, 'N', np.where(dy < 0, 'S', 'None'))
+        return dirX, dirY
@@ -0,0 +1,252 @@
+import math
+import random
+import time
+import numpy as np
+from engine import ShipAction, ShipyardAction
+from offsets import offset_table
+
+
+class Node:
+    """ The statistics of a sequence of my spawn/convert decisions, one child per decision of the next turn """
+    __slots__ = ('visits', 'total', 'children')
+
+    def __init__(self):
+        self.visits = 0
+        self.total = 0.
+        self.children = {}
+
+
+def moves_between(a, b, size=21):
+    """ Returns the moves around the torus between two flat indices """
+    dx, dy = abs(a % size - b % size), abs(a // size - b // size)
+    return min(dx, size - dx) + min(dy, size - dy)
+
+
+def spawn_yard(player):
+    """
+        Returns the id of the shipyard the player spawns from, the first one without one of its ships on it, None when
+        there is none, player being its [halite, {shipyard_id: index}, {ship_id: [index, cargo]}] of obs['players']
+    """
+    _, shipyards, ships = player
+    occupied = {index for index, _ in ships.values()}
+    return next((shipyard_id for shipyard_id, index in shipyards.items() if index not in occupied), None)
+
+
+def convert_candidate(player, size=21, convert_cost=500):
+    """
+        Returns the id of the ship the player converts, the farthest from its shipyards (the most cargo on ties) of the
+        ones it can afford to convert and that aren't on one, None without any
+    """
+    halite, shipyards, ships = player
+    yards = set(shipyards.values())
+    best, best_key = None, None
+    for ship_id, (index, cargo) in ships.items():
+        if index in yards or cargo + halite < convert_cost:
+            continue
+        key = min((moves_between(index, yard, size) for yard in yards), default=size), cargo
+        if best is None or key > best_key:
+            best, best_key = ship_id, key
+    return best
+
+
+class EconomySearch:
+    """
+        Monte Carlo tree search over my spawn and convert decisions, played out on the local engine
+        params:
+            time_limit: seconds the search may take in a turn, it stops as soon as it is over
+            min_playouts: the playouts the root needs (the ones of the turns before included) for the search to decide,
+                with fewer it leaves the decision to the caller's thresholds
+            decisions: the decisions the search may take on top of following the rules, 'spawn' and/or 'convert'.
+                The playouts' ships don't fight, so they overrate the extra shipyards a conversion brings: they stay
+                off unless asked for
+            margin: how much more halite a spawn or a conversion has to be worth than following the rules to be taken
+            horizon: how many turns a playout goes on for at most (the end of the game comes first when it is closer)
+            future: how many turns after a playout its ships keep mining at the rate they did in it
+            exploration: the UCT constant, on values scaled by the spread of the playouts' values
+            return_cargo: the cargo the playouts' ships bring home at
+            mine_halite: the halite of a cell the playouts' ships stay and mine on
+            spawn_until: the step after which nobody spawns in the playouts
+            randomness: the chance a playout's ship moves randomly instead of going to the richest neighbour
+            seed: the seed of the playouts
+            clock: the clock the time is measured with
+        Every turn I either follow the rules, spawn one ship (from spawn_yard) or convert one (convert_candidate). The
+        rules are the playouts' model of the caller's thresholds, following them leaves the turn to those. The tree is
+        open loop: a node is the sequence of my decisions since the turn it was built for, every playout starts from
+        the real board, takes the tree's decisions for as long as they are known then the rules. All the ships of all
+        the players move with the same cheap rules: home when full, mine a rich cell, otherwise the richest neighbour.
+        A playout is worth my halite, my cargo and what my ships would mine in the `future` turns after it (no further
+        than the end) at the rate they mined in it. Shipyards are worth nothing more than the deposits they take in.
+        The subtree of the decision taken becomes the root of the next turn, its playouts keep counting.
+        Keeps:
+            stats: playouts and the visits of the root's decisions, for the last search
+    """
+    def __init__(self, time_limit=0.5, min_playouts=20, decisions=('spawn',), margin=200., horizon=20, future=40,
+                 exploration=1.4, return_cargo=300, mine_halite=50, spawn_until=250, randomness=0.2, seed=0,
+                 clock=time.perf_counter):
+        self.time_limit = time_limit
+        self.min_playouts = min_playouts
+        self.decisions = decisions
+        self.margin = margin
+        self.horizon = horizon
+        self.future = future
+        self.exploration = exploration
+        self.return_cargo = return_cargo
+        self.mine_halite = mine_halite
+        self.spawn_until = spawn_until
+        self.randomness = randomness
+        self.rng = random.Random(seed)
+        self.clock = clock
+        self.root, self.last = Node(), None
+        self.neighbours = {}
+        self.low, self.high = math.inf, -math.inf
+        self.stats = {}
+
+    def decide(self, board, time_limit=None):
+        """
+            Returns 'spawn' or 'convert' for the current player of the local engine's Board, None when the rules (the
+            caller's thresholds) should decide: when they are the best, there is nothing to decide or too few playouts
+            time_limit: seconds the search may take this turn, time_limit by default
+        """
+        deadline = self.clock() + (self.time_limit if time_limit is None else min(time_limit, self.time_limit))
+        # The decision taken last turn keeps what its playouts learned
+        if self.last is not None and self.last[0] == board.step - 1 and self.last[1] in self.root.children:
+            self.root = self.root.children[self.last[1]]
+        else:
+            self.root = Node()
+            self.low, self.high = math.inf, -math.inf
+
+        legal = self.legal(board, board.observation['players'][board.current_player_id])
+        playouts = 0
+        while len(legal) > 1 and self.clock() < deadline:
+            self.playout(board)
+            playouts += 1
+
+        self.stats = {'playouts': playouts, 'visits': {action: child.visits for action, child in self.root.children.items()}}
+        if len(legal) == 1 or self.root.visits < self.min_playouts:
+            self.last = None
+            return None
+        action = max(legal, key=lambda action: self.root.children[action].visits if action in self.root.children else -1)
+        # The playouts are few and noisy, the rules keep the turn unless they clearly lose
+        rules = self.root.children.get('rules')
+        if rules is not None and rules.visits and self.mean(self.root.children[action]) - self.mean(rules) < self.margin:
+            action = 'rules'
+        self.last = board.step, action
+        return None if action == 'rules' else action
+
+    @staticmethod
+    def mean(node):
+        return node.total / node.visits
+
+    def legal(self, board, player):
+        """ Returns the decisions the player (its entry of obs['players']) can take on the board """
+        configuration = board.configuration
+        legal = ['rules']
+        if 'spawn' in self.decisions and player[0] >= configuration.spawn_cost and spawn_yard(player) is not None:
+            legal.append('spawn')
+        if 'convert' in self.decisions and \
+                convert_candidate(player, configuration.size, configuration.convert_cost) is not None:
+            legal.append('convert')
+        return legal
+
+    def playout(self, board):
+        """ Plays the tree's decisions then the rules up to the horizon and adds the value to the nodes it went through """
+        me = board.current_player_id
+        end = min(board.step + self.horizon, board.configuration.episode_steps - 1)
+        node, path = self.root, [self.root]
+        mined, ship_turns = 0, 0
+        while board.step < end:
+            action = None
+            if node is not None:
+                legal = self.legal(board, board.observation['players'][me])
+                untried = [action for action in legal if action not in node.children]
+                if untried:
+                    action = self.rng.choice(untried)
+                    node.children[action] = Node()
+                else:
+                    action = max(legal, key=lambda action: self.uct(node, node.children[action]))
+                node = node.children[action]
+                path.append(node)
+                # One new node per playout, the rules take over from there
+                if node.visits == 0:
+                    node = None
+            cargo = {ship_id: ship[1] for ship_id, ship in board.observation['players'][me][2].items()}
+            board = self.step(board, me, action)
+            ships = board.observation['players'][me][2]
+            mined += sum(max(ships[ship_id][1] - before, 0) for ship_id, before in cargo.items() if ship_id in ships)
+            ship_turns += len(cargo)
+
+        value = self.value(board, me, mined / max(ship_turns, 1))
+        self.low, self.high = min(self.low, value), max(self.high, value)
+        for node in path:
+            node.visits += 1
+            node.total += value
+
+    def uct(self, parent, child):
+        spread = max(self.high - self.low, 1.)
+        return self.mean(child) + self.exploration * spread * math.sqrt(math.log(parent.visits) / child.visits)
+
+    def value(self, board, player_id, rate):
+        """ My halite and cargo, and what my ships mine at `rate` a turn in the future turns """
+        halite, _, ships = board.observation['players'][player_id]
+        steps_left = board.configuration.episode_steps - 1 - board.step
+        return halite + sum(cargo for _, cargo in ships.values()) + rate * min(self.future, steps_left) * len(ships)
+
+    def step(self, board, me, action):
+        """ Returns the board a turn later, my spawn/convert being the action (the rules' one when None or 'rules') """
+        observation, configuration = board.observation, board.configuration
+        size = configuration.size
+        for player_id, player in enumerate(observation['players']):
+            for shipyard_id in player[1]:
+                board.shipyards[shipyard_id].next_action = None
+            decision = action if player_id == me and action not in (None, 'rules') else self.rule(board, player)
+            if decision == 'spawn':
+                board.shipyards[spawn_yard(player)].next_action = ShipyardAction.SPAWN
+            converting = convert_candidate(player, size, configuration.convert_cost) if decision == 'convert' else None
+            for ship_id, move in self.moves(board, observation['halite'], player, converting).items():
+                board.ships[ship_id].next_action = move
+        return board.next()
+
+    def rule(self, board, player):
+        """ The playouts' spawn/convert: convert without shipyards, spawn early on when there is halite to spare """
+        configuration = board.configuration
+        if not player[1]:
+            return 'convert' if convert_candidate(player, configuration.size, configuration.convert_cost) else 'hold'
+        if board.step < self.spawn_until and player[0] >= 2 * configuration.spawn_cost and \
+                spawn_yard(player) is not None and self.rng.random() < 0.5:
+            return 'spawn'
+        return 'hold'
+
+    def moves(self, board, halite, player, converting=None):
+        """ Returns ship_id: ShipAction (None to stay) of the player's ships, never two of them on the same cell """
+        size = board.configuration.size
+        table = offset_table(1, size)
+        actions = [ShipAction[{'N': 'NORTH', 'S': 'SOUTH', 'W': 'WEST', 'E': 'EAST'}[key]] for key in table.keys]
+        # Every cell's neighbours as python lists, the playouts look them up far too often for numpy
+        if size not in self.neighbours:
+            self.neighbours[size] = table.gather(np.arange(size * size)).tolist()
+        neighbours = self.neighbours[size]
+        steps_left = board.configuration.episode_steps - 1 - board.step
+        yards = list(player[1].values())
+        taken, moves = set(), {}
+        for ship_id, (index, cargo) in player[2].items():
+            if ship_id == converting:
+                moves[ship_id] = ShipAction.CONVERT
+                continue
+            cells = [index] + neighbours[index]
+
+            home = min(yards, key=lambda yard: moves_between(index, yard, size), default=None)
+            if home is not None and cargo > 0 and (cargo > self.return_cargo or
+                                                   moves_between(index, home, size) + 2 >= steps_left):
+                distances = [moves_between(cell, home, size) for cell in cells]
+                order = sorted(range(5), key=distances.__getitem__)
+            elif halite[index] >= self.mine_halite:
+                order = range(5)
+            elif self.rng.random() < self.randomness:
+                order = self.rng.sample(range(5), 5)
+            else:
+                order = sorted(range(5), key=lambda n: -halite[cells[n]])
+
+            n = next((n for n in order if cells[n] not in taken), 0)
+            taken.add(cells[n])
+            moves[ship_id] = actions[n - 1] if n else None
+        return moves
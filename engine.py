@@ -0,0 +1,816 @@
+import copy
+import math
+import operator
+import random
+import traceback
+from enum import Enum, auto
+from functools import lru_cache
+import numpy as np
+
+# Stand-in for kaggle_environments.envs.halite.helpers, the modules fall back on it when kaggle_environments
+# is not installed:
+#     try:
+#         from kaggle_environments.envs.halite.helpers import Board, ShipAction, ShipyardAction
+#     except ImportError:
+#         from engine import Board, ShipAction, ShipyardAction
+__all__ = ['Point', 'Configuration', 'Observation', 'ShipAction', 'ShipyardAction', 'Cell', 'Ship', 'Shipyard',
+           'Player', 'Board', 'Game', 'DEFAULT_CONFIGURATION', 'populate']
+
+# The defaults of halite.json
+DEFAULT_CONFIGURATION = {'episodeSteps': 400, 'actTimeout': 3, 'runTimeout': 9600, 'startingHalite': 24000,
+                         'size': 21, 'spawnCost': 500, 'convertCost': 500, 'moveCost': 0, 'collectRate': 0.25,
+                         'regenRate': 0.02, 'maxCellHalite': 500, 'agentTimeout': 60, 'randomSeed': None}
+
+
+class Point(tuple):
+    """
+        (x, y) position, x being the column and y the row counted from the bottom (north is y + 1)
+        Operators don't wrap around the board, `point % size` does
+    """
+    def __new__(cls, x, y):
+        return super(Point, cls).__new__(cls, (x, y))
+
+    @property
+    def x(self):
+        return self[0]
+
+    @property
+    def y(self):
+        return self[1]
+
+    def map(self, f):
+        return Point(f(self[0]), f(self[1]))
+
+    def map2(self, other, f):
+        return Point(f(self[0], other[0]), f(self[1], other[1]))
+
+    def translate(self, offset, size):
+        """ Translates the point by offset and wraps it around the board """
+        return (self + offset) % size
+
+    def distance_to(self, other, size):
+        """ Manhattan distance around the torus """
+        abs_x, abs_y = abs(self.x - other.x), abs(self.y - other.y)
+        return (abs_x if abs_x < size / 2 else size - abs_x) + (abs_y if abs_y < size / 2 else size - abs_y)
+
+    def to_index(self, size):
+        """ Flat index of the point in obs['halite'] """
+        return (size - self.y - 1) * size + self.x
+
+    @staticmethod
+    def from_index(index, size):
+        """ Point of a flat index, the inverse of to_index """
+        y, x = divmod(index, size)
+        return Point(x, size - y - 1)
+
+    def __abs__(self):
+        return self.map(operator.abs)
+
+    def __add__(self, other):
+        return self.map2(other, operator.add)
+
+    def __eq__(self, other):
+        try:
+            return self[0] == other[0] and self[1] == other[1]
+        except (TypeError, IndexError):
+            return False
+
+    def __floordiv__(self, denominator):
+        return self.map(lambda x: x // denominator)
+
+    def __hash__(self):
+        return hash((self.x, self.y))
+
+    def __mod__(self, mod):
+        return self.map(lambda x: x % mod)
+
+    def __mul__(self, factor):
+        return self.map(lambda x: x * factor)
+
+    def __neg__(self):
+        return self.map(operator.neg)
+
+    def __str__(self):
+        return f"({self.x}, {self.y})"
+
+    def __sub__(self, other):
+        return self.map2(other, operator.sub)
+
+
+class Configuration(dict):
+    """ The game's configuration (the keys of halite.json) with the helpers' snake_case properties """
+    @property
+    def episode_steps(self):
+        return self['episodeSteps']
+
+    @property
+    def act_timeout(self):
+        return self['actTimeout']
+
+    @property
+    def run_timeout(self):
+        return self['runTimeout']
+
+    @property
+    def agent_timeout(self):
+        return self['agentTimeout']
+
+    @property
+    def starting_halite(self):
+        return self['startingHalite']
+
+    @property
+    def size(self):
+        return self['size']
+
+    @property
+    def spawn_cost(self):
+        return self['spawnCost']
+
+    @property
+    def convert_cost(self):
+        return self['convertCost']
+
+    @property
+    def move_cost(self):
+        return self['moveCost']
+
+    @property
+    def collect_rate(self):
+        return self['collectRate']
+
+    @property
+    def regen_rate(self):
+        return self['regenRate']
+
+    @property
+    def max_cell_halite(self):
+        return self['maxCellHalite']
+
+    @property
+    def random_seed(self):
+        return self['randomSeed']
+
+
+class Observation(dict):
+    """ An agent's observation: halite, players ([halite, shipyards, ships] each), player, step """
+    @property
+    def step(self):
+        return self['step']
+
+    @property
+    def remaining_overage_time(self):
+        return self.get('remainingOverageTime', 60)
+
+    @property
+    def halite(self):
+        return self['halite']
+
+    @property
+    def players(self):
+        return self['players']
+
+    @property
+    def player(self):
+        return self['player']
+
+
+class ShipAction(Enum):
+    NORTH = auto()
+    EAST = auto()
+    SOUTH = auto()
+    WEST = auto()
+    CONVERT = auto()
+    # None mines the cell
+
+    def to_point(self):
+        """ Offset of the move, None for CONVERT """
+        return _offsets.get(self)
+
+    def __str__(self):
+        return self.name
+
+    @staticmethod
+    def moves():
+        return [ShipAction.NORTH, ShipAction.EAST, ShipAction.SOUTH, ShipAction.WEST]
+
+
+class ShipyardAction(Enum):
+    SPAWN = auto()
+
+    def __str__(self):
+        return self.name
+
+
+_offsets = {ShipAction.NORTH: Point(0, 1), ShipAction.EAST: Point(1, 0),
+            ShipAction.SOUTH: Point(0, -1), ShipAction.WEST: Point(-1, 0)}
+
+
+@lru_cache(maxsize=None)
+def _points(size):
+    """ Point of every flat index """
+    return [Point.from_index(index, size) for index in range(size * size)]
+
+
+@lru_cache(maxsize=None)
+def _neighbours(size):
+    """ Flat index of the cell each move leads to, for every flat index """
+    points = _points(size)
+    return {action: [offset.translate(point, size).to_index(size) for point in points]
+            for action, offset in _offsets.items()}
+
+
+class Cell:
+    """ A cell of the board, a view on the Board's arrays """
+    __slots__ = ('_index', '_board')
+
+    def __init__(self, index, board):
+        self._index = index
+        self._board = board
+
+    @property
+    def position(self):
+        return _points(self._board._size)[self._index]
+
+    @property
+    def halite(self):
+        return float(self._board._halite[self._index])
+
+    @property
+    def shipyard_id(self):
+        return self._board._shipyard_at[self._index]
+
+    @property
+    def ship_id(self):
+        return self._board._ship_at[self._index]
+
+    @property
+    def ship(self):
+        """ The ship on the cell, None if there isn't one """
+        return self._board._ships.get(self.ship_id)
+
+    @property
+    def shipyard(self):
+        """ The shipyard on the cell, None if there isn't one """
+        return self._board._shipyards.get(self.shipyard_id)
+
+    def neighbor(self, offset):
+        """ The cell at position + offset """
+        return self._board[self.position + offset]
+
+    @property
+    def north(self):
+        return self._board._cell(_neighbours(self._board._size)[ShipAction.NORTH][self._index])
+
+    @property
+    def south(self):
+        return self._board._cell(_neighbours(self._board._size)[ShipAction.SOUTH][self._index])
+
+    @property
+    def east(self):
+        return self._board._cell(_neighbours(self._board._size)[ShipAction.EAST][self._index])
+
+    @property
+    def west(self):
+        return self._board._cell(_neighbours(self._board._size)[ShipAction.WEST][self._index])
+
+
+class Ship:
+    __slots__ = ('_id', '_index', '_halite', '_player_id', '_board', '_next_action')
+
+    def __init__(self, ship_id, index, halite, player_id, board, next_action=None):
+        self._id = ship_id
+        self._index = index
+        self._halite = halite
+        self._player_id = player_id
+        self._board = board
+        self._next_action = next_action
+
+    @property
+    def id(self):
+        return self._id
+
+    @property
+    def position(self):
+        return _points(self._board._size)[self._index]
+
+    @property
+    def halite(self):
+        return self._halite
+
+    @property
+    def player_id(self):
+        return self._player_id
+
+    @property
+    def cell(self):
+        return self._board._cell(self._index)
+
+    @property
+    def player(self):
+        return self._board._players[self._player_id]
+
+    @property
+    def next_action(self):
+        """ The action the ship takes when Board.next() is called """
+        return self._next_action
+
+    @next_action.setter
+    def next_action(self, value):
+        self._next_action = value
+
+    @property
+    def _observation(self):
+        return [self._index, self._halite]
+
+
+class Shipyard:
+    __slots__ = ('_id', '_index', '_player_id', '_board', '_next_action')
+
+    def __init__(self, shipyard_id, index, player_id, board, next_action=None):
+        self._id = shipyard_id
+        self._index = index
+        self._player_id = player_id
+        self._board = board
+        self._next_action = next_action
+
+    @property
+    def id(self):
+        return self._id
+
+    @property
+    def position(self):
+        return _points(self._board._size)[self._index]
+
+    @property
+    def player_id(self):
+        return self._player_id
+
+    @property
+    def cell(self):
+        return self._board._cell(self._index)
+
+    @property
+    def player(self):
+        return self._board._players[self._player_id]
+
+    @property
+    def next_action(self):
+        """ The action the shipyard takes when Board.next() is called """
+        return self._next_action
+
+    @next_action.setter
+    def next_action(self, value):
+        self._next_action = value
+
+    @property
+    def _observation(self):
+        return self._index
+
+
+class Player:
+    __slots__ = ('_id', '_halite', '_shipyard_ids', '_ship_ids', '_board')
+
+    def __init__(self, player_id, halite, shipyard_ids, ship_ids, board):
+        self._id = player_id
+        self._halite = halite
+        self._shipyard_ids = shipyard_ids
+        self._ship_ids = ship_ids
+        self._board = board
+
+    @property
+    def id(self):
+        return self._id
+
+    @property
+    def halite(self):
+        return self._halite
+
+    @property
+    def shipyard_ids(self):
+        return self._shipyard_ids
+
+    @property
+    def ship_ids(self):
+        return self._ship_ids
+
+    @property
+    def shipyards(self):
+        return [self._board._shipyards[shipyard_id] for shipyard_id in self._shipyard_ids]
+
+    @property
+    def ships(self):
+        return [self._board._ships[ship_id] for ship_id in self._ship_ids]
+
+    @property
+    def is_current_player(self):
+        return self._id == self._board._current_player_id
+
+    @property
+    def next_actions(self):
+        """ The queued actions in the format the game expects back from an agent """
+        ship_actions = {ship.id: ship.next_action.name for ship in self.ships if ship.next_action is not None}
+        shipyard_actions = {shipyard.id: shipyard.next_action.name for shipyard in self.shipyards
+                            if shipyard.next_action is not None}
+        return {**ship_actions, **shipyard_actions}
+
+    @property
+    def _observation(self):
+        return [self._halite, {shipyard.id: shipyard._index for shipyard in self.shipyards},
+                {ship.id: ship._observation for ship in self.ships}]
+
+
+class Board:
+    """
+        Drop-in for the helpers' Board, backed by flat arrays indexed like obs['halite']
+        params:
+            raw_observation: the agent's observation
+            raw_configuration: the configuration, the missing keys take halite.json's defaults
+            next_actions: the actions of each player (as agents return them), applied by next()
+        Keeps:
+            _halite: halite of each cell (NumPy array)
+            _ship_at, _shipyard_at: id of the ship/shipyard on each cell, None when empty
+        Ships and shipyards hold their flat index, Cell objects are only built when they get asked for.
+        next() follows the rules of the helpers' Board.next() step for step, ids included.
+    """
+    def __init__(self, raw_observation, raw_configuration, next_actions=None):
+        observation = Observation(raw_observation)
+        self._configuration = Configuration({**DEFAULT_CONFIGURATION, **raw_configuration})
+        self._size = size = self._configuration.size
+        self._step = observation.step
+        self._remaining_overage_time = observation.remaining_overage_time
+        self._current_player_id = observation.player
+        self._halite = np.array(observation.halite, dtype=float)
+        self._ship_at = [None] * (size * size)
+        self._shipyard_at = [None] * (size * size)
+        self._players, self._ships, self._shipyards = {}, {}, {}
+        self._cells, self._cell_list = None, None
+
+        next_actions = next_actions or [{}] * len(observation.players)
+        for player_id, (player_halite, shipyards, ships) in enumerate(observation.players):
+            self._players[player_id] = Player(player_id, player_halite, [], [], self)
+            actions = next_actions[player_id] or {}
+
+            for ship_id, (index, halite) in ships.items():
+                action = actions.get(ship_id)
+                action = ShipAction[action] if action in ShipAction.__members__ else None
+                self._add_ship(Ship(ship_id, index, halite, player_id, self, action))
+
+            for shipyard_id, index in shipyards.items():
+                action = actions.get(shipyard_id)
+                action = ShipyardAction[action] if action in ShipyardAction.__members__ else None
+                self._add_shipyard(Shipyard(shipyard_id, index, player_id, self, action))
+
+    @property
+    def configuration(self):
+        return self._configuration
+
+    @property
+    def players(self):
+        return self._players
+
+    @property
+    def ships(self):
+        return self._ships
+
+    @property
+    def shipyards(self):
+        return self._shipyards
+
+    @property
+    def cells(self):
+        """ Point: Cell of every cell, built the first time they are asked for """
+        if self._cells is None:
+            size = self._size
+            self._cell_list = [Cell(index, self) for index in range(size * size)]
+            # Column by column like the helpers
+            self._cells = {Point(x, y): self._cell_list[(size - y - 1) * size + x]
+                           for x in range(size) for y in range(size)}
+        return self._cells
+
+    @property
+    def step(self):
+        return self._step
+
+    @property
+    def current_player_id(self):
+        return self._current_player_id
+
+    @property
+    def current_player(self):
+        return self._players[self._current_player_id]
+
+    @property
+    def opponents(self):
+        return [player for player in self._players.values() if not player.is_current_player]
+
+    @property
+    def observation(self):
+        """ The observation the board stands for """
+        return {'halite': self._halite.tolist(),
+                'players': [player._observation for player in self._players.values()],
+                'player': self._current_player_id,
+                'step': self._step,
+                'remainingOverageTime': self._remaining_overage_time}
+
+    def __deepcopy__(self, _):
+        return self._copy()
+
+    def __getitem__(self, point):
+        """ The cell at the position, wrapped around the board """
+        x, y = point
+        size = self._size
+        return self._cell((size - y % size - 1) * size + x % size)
+
+    def _cell(self, index):
+        if self._cell_list is None:
+            self.cells
+        return self._cell_list[index]
+
+    def _copy(self):
+        """ Copies the board with its next actions, without going through the observation """
+        board = object.__new__(Board)
+        board._configuration, board._size = self._configuration, self._size
+        board._step = self._step
+        board._remaining_overage_time = self._remaining_overage_time
+        board._current_player_id = self._current_player_id
+        board._halite = self._halite.copy()
+        board._ship_at, board._shipyard_at = list(self._ship_at), list(self._shipyard_at)
+        board._cells, board._cell_list = None, None
+        board._players = {player_id: Player(player_id, player._halite, list(player._shipyard_ids),
+                                            list(player._ship_ids), board)
+                          for player_id, player in self._players.items()}
+        board._ships = {ship_id: Ship(ship_id, ship._index, ship._halite, ship._player_id, board, ship._next_action)
+                        for ship_id, ship in self._ships.items()}
+        board._shipyards = {shipyard_id: Shipyard(shipyard_id, shipyard._index, shipyard._player_id, board,
+                                                  shipyard._next_action)
+                            for shipyard_id, shipyard in self._shipyards.items()}
+        return board
+
+    def _add_ship(self, ship):
+        self._players[ship._player_id]._ship_ids.append(ship._id)
+        self._ship_at[ship._index] = ship._id
+        self._ships[ship._id] = ship
+
+    def _add_shipyard(self, shipyard):
+        self._players[shipyard._player_id]._shipyard_ids.append(shipyard._id)
+        self._shipyard_at[shipyard._index] = shipyard._id
+        self._halite[shipyard._index] = 0
+        self._shipyards[shipyard._id] = shipyard
+
+    def _delete_ship(self, ship):
+        self._players[ship._player_id]._ship_ids.remove(ship._id)
+        if self._ship_at[ship._index] == ship._id:
+            self._ship_at[ship._index] = None
+        del self._ships[ship._id]
+
+    def _delete_shipyard(self, shipyard):
+        self._players[shipyard._player_id]._shipyard_ids.remove(shipyard._id)
+        if self._shipyard_at[shipyard._index] == shipyard._id:
+            self._shipyard_at[shipyard._index] = None
+        del self._shipyards[shipyard._id]
+
+    def next(self):
+        """ Returns a new board with the next actions applied, the board itself is unchanged """
+        board = self._copy()
+        configuration = board._configuration
+        convert_cost, spawn_cost = configuration.convert_cost, configuration.spawn_cost
+        neighbours = _neighbours(board._size)
+        uid_counter = 0
+
+        def create_uid():
+            nonlocal uid_counter
+            uid_counter += 1
+            return f"{self._step + 1}-{uid_counter}"
+
+        # Spawns, conversions and moves, player by player
+        for player in board._players.values():
+            leftover_convert_halite = 0
+
+            for shipyard in player.shipyards:
+                if shipyard._next_action == ShipyardAction.SPAWN and player._halite >= spawn_cost:
+                    player._halite -= spawn_cost
+                    board._add_ship(Ship(create_uid(), shipyard._index, 0, player._id, board))
+                shipyard._next_action = None
+
+            for ship in player.ships:
+                if ship._next_action == ShipAction.CONVERT:
+                    # The ship's cargo can pay for the conversion, the surplus is only added once all are done
+                    if board._shipyard_at[ship._index] is None and ship._halite + player._halite >= convert_cost:
+                        delta_halite = ship._halite - convert_cost
+                        leftover_convert_halite += max(delta_halite, 0)
+                        player._halite += min(delta_halite, 0)
+                        board._add_shipyard(Shipyard(create_uid(), ship._index, player._id, board))
+                        board._delete_ship(ship)
+                elif ship._next_action is not None:
+                    ship._index = neighbours[ship._next_action][ship._index]
+                    ship._halite *= 1 - configuration.move_cost
+
+            player._halite += leftover_convert_halite
+
+        # Ship collisions, the ship with the least halite takes the others' cargo, ties destroy all of them
+        groups = {}
+        for ship in board._ships.values():
+            groups.setdefault(ship._index, []).append(ship)
+        ship_at = [None] * len(board._ship_at)
+        for index, ships in groups.items():
+            if len(ships) > 1:
+                least = min(ship._halite for ship in ships)
+                smallest = [ship for ship in ships if ship._halite == least]
+                winner = smallest[0] if len(smallest) == 1 else None
+                for ship in ships:
+                    if ship is not winner:
+                        board._delete_ship(ship)
+                        if winner is not None:
+                            winner._halite += ship._halite
+                if winner is None:
+                    continue
+                ship_at[index] = winner._id
+            else:
+                ship_at[index] = ships[0]._id
+        board._ship_at = ship_at
+
+        # Ships ramming enemy shipyards destroy both, mine deposit
+        for shipyard in list(board._shipyards.values()):
+            ship = board._ships.get(ship_at[shipyard._index])
+            if ship is not None and ship._player_id != shipyard._player_id:
+                board._delete_shipyard(shipyard)
+                board._delete_ship(ship)
+        for shipyard in board._shipyards.values():
+            ship = board._ships.get(ship_at[shipyard._index])
+            if ship is not None:
+                board._players[shipyard._player_id]._halite += ship._halite
+                ship._halite = 0
+
+        # Mining
+        halite, collect_rate = board._halite, configuration.collect_rate
+        for ship in board._ships.values():
+            delta_halite = int(halite[ship._index] * collect_rate)
+            if ship._next_action not in _offsets and board._shipyard_at[ship._index] is None and delta_halite > 0:
+                ship._halite += delta_halite
+                halite[ship._index] -= delta_halite
+            ship._next_action = None
+
+        # Regeneration of the cells without a ship
+        free = np.ones(len(halite), dtype=bool)
+        free[[ship._index for ship in board._ships.values()]] = False
+        grown = halite[free] * (1 + configuration.regen_rate)
+        rounded = np.round(grown, 3)
+        # np.round and round(halite, 3) disagree on the values that are (nearly) halfway, those are rounded one by one
+        thousandths = grown * 1000
+        for index in np.flatnonzero(np.abs(thousandths - np.floor(thousandths) - 0.5) < 1e-6):
+            rounded[index] = round(float(grown[index]), 3)
+        halite[free] = np.minimum(rounded, configuration.max_cell_halite)
+
+        board._step += 1
+        return board
+
+
+def populate(configuration, players=4, seed=None):
+    """
+        Generates the observation of a game's first step like the halite interpreter does
+        params:
+            configuration: the game's configuration
+            players: number of players (1, 2 or 4)
+            seed: the seed of the map, the same seed gives the same map as kaggle_environments
+        Halite is spread from random seeds in a quarter of the board then mirrored on the other three quarters,
+        each player starts with one ship placed symmetrically.
+    """
+    configuration = Configuration({**DEFAULT_CONFIGURATION, **configuration})
+    size = configuration.size
+    if seed is None:
+        seed = random.randrange((1 << 31) - 1)
+    rng, np_rng = random.Random(seed), np.random.RandomState(seed)
+
+    half = math.ceil(size / 2)
+    grid = [[0] * half for _ in range(half)]
+    # A few seeds over the whole quarter and around the center of the map
+    for i in range(half):
+        grid[rng.randint(0, half - 1)][rng.randint(0, half - 1)] = i ** 2
+        grid[rng.randint(half // 2, half - 1)][rng.randint(half // 2, half - 1)] = i ** 2
+
+    # Spread the seeds
+    radius_grid = copy.deepcopy(grid)
+    for r in range(half):
+        for c in range(half):
+            value = grid[r][c]
+            if value == 0:
+                continue
+            radius = min(round((value / half) ** 0.5), 1)
+            for r2 in range(r - radius + 1, r + radius):
+                for c2 in range(c - radius + 1, c + radius):
+                    if 0 <= r2 < half and 0 <= c2 < half:
+                        distance = (abs(r2 - r) ** 2 + abs(c2 - c) ** 2) ** 0.5
+                        radius_grid[r2][c2] += int(value / max(1, distance) ** distance)
+
+    # Random sprouts, and more of them in the center corner
+    radius_grid = np.asarray(radius_grid)
+    add_grid = np_rng.gumbel(0, 300.0, size=(half, half)).astype(int)
+    sparse_radius_grid = np_rng.binomial(1, 0.5, size=(half, half))
+    radius_grid += np.clip(add_grid, 0, a_max=None) * sparse_radius_grid
+    corner_grid = np.clip(np_rng.gumbel(0, 500.0, size=(half // 4, half // 4)).astype(int), 0, a_max=None)
+    radius_grid[half - (half // 4):, half - (half // 4):] += corner_grid
+
+    # Scale to the starting halite and mirror the quarter
+    total = radius_grid.sum()
+    halite = [0] * (size ** 2)
+    for r, row in enumerate(radius_grid):
+        for c, value in enumerate(row):
+            value = int(value * configuration.starting_halite / total / 4)
+            halite[size * r + c] = value
+            halite[size * r + (size - c - 1)] = value
+            halite[size * (size - 1) - (size * r) + c] = value
+            halite[size * (size - 1) - (size * r) + (size - c - 1)] = value
+
+    if players == 1:
+        starting_positions = [size * (size // 2) + size // 2]
+    elif players == 2:
+        starting_positions = [size * (size // 2) + size // 4, size * (size // 2) + math.ceil(3 * size / 4) - 1]
+    elif players == 4:
+        starting_positions = [size * (size // 4) + size // 4, size * (size // 4) + 3 * size // 4,
+                              size * (3 * size // 4) + size // 4, size * (3 * size // 4) + 3 * size // 4]
+    else:
+        raise ValueError('Halite is played by 1, 2 or 4 players, not %s' % players)
+
+    return {'halite': halite, 'step': 0, 'player': 0, 'remainingOverageTime': 60,
+            'players': [[5000, {}, {f"0-{n + 1}": [position, 0]}] for n, position in enumerate(starting_positions)]}
+
+
+class Game:
+    """
+        A whole game between agent functions, refereed like the halite interpreter
+        params:
+            agents: the agent(obs, config) functions, one per seat
+            configuration: overrides of the default configuration
+            seed: the seed of the map
+        Keeps:
+            board: the Board of the current step (from player 0's point of view)
+            statuses: 'ACTIVE', 'DONE' or 'ERROR' for each seat
+            errors: the traceback of the exception each 'ERROR' seat raised, None for the others
+            rewards: the player's halite, or step_eliminated - episode_steps - 1 once it is out of the game
+        Agents get a plain dict observation, an agent raising an exception loses its ships and shipyards.
+    """
+    def __init__(self, agents, configuration=None, seed=None):
+        self.agents = agents
+        self.configuration = Configuration({**DEFAULT_CONFIGURATION, **(configuration or {})})
+        if seed is None:
+            seed = self.configuration.random_seed
+        observation = populate(self.configuration, len(agents), seed)
+        self.configuration['randomSeed'] = seed
+        self.board = Board(observation, self.configuration)
+        self.statuses = ['ACTIVE'] * len(agents)
+        self.errors = [None] * len(agents)
+        self.rewards = [player[0] for player in observation['players']]
+
+    @property
+    def done(self):
+        return 'ACTIVE' not in self.statuses
+
+    def step(self):
+        """ Asks the active agents for their actions and plays the turn """
+        observation = self.board.observation
+        actions = []
+        for seat, agent in enumerate(self.agents):
+            if self.statuses[seat] != 'ACTIVE':
+                actions.append({})
+                continue
+            try:
+                actions.append(agent({**copy.deepcopy(observation), 'player': seat}, self.configuration) or {})
+            except Exception:
+                self.statuses[seat] = 'ERROR'
+                self.errors[seat] = traceback.format_exc()
+                actions.append({})
+
+        self.board = Board(observation, self.configuration, actions).next()
+        observation = self.board.observation
+        episode_steps = self.configuration.episode_steps
+
+        # Players that can't gather halite anymore are out, the ones that failed lose everything
+        cleared = False
+        for seat, (player_halite, shipyards, ships) in enumerate(observation['players']):
+            if self.statuses[seat] == 'ACTIVE' and len(ships) == 0 and \
+                    (len(shipyards) == 0 or player_halite < self.configuration.spawn_cost):
+                self.statuses[seat] = 'DONE'
+                self.rewards[seat] = self.board.step - episode_steps - 1
+            if self.statuses[seat] not in ('ACTIVE', 'DONE') and observation['players'][seat] != [0, {}, {}]:
+                observation['players'][seat] = [0, {}, {}]
+                cleared = True
+        if cleared:
+            self.board = Board(observation, self.configuration)
+
+        if len(self.agents) > 1 and self.statuses.count('ACTIVE') < 2:
+            self.statuses = ['DONE' if status == 'ACTIVE' else status for status in self.statuses]
+        for seat, status in enumerate(self.statuses):
+            if status == 'ACTIVE':
+                self.rewards[seat] = observation['players'][seat][0]
+            elif status != 'DONE':
+                self.rewards[seat] = 0
+
+        if self.board.step >= episode_steps - 1:
+            self.statuses = ['DONE' if status == 'ACTIVE' else status for status in self.statuses]
+
+    def run(self):
+        """ Plays the game to its end and returns the rewards """
+        while not self.done:
+            self.step()
+        return self.rewards
@@ -0,0 +1,59 @@
+from collections import deque
+
+# Levels, lines below the logger's level are dropped before they are formatted
+DEBUG, INFO, WARNING, ERROR = 10, 20, 30, 40
+
+
+class Logger:
+    """
+        Levelled logger that keeps the lines in memory and appends them to the file in one write
+        params:
+            path: the file the lines are appended to
+            level: the lowest level that gets logged
+            capacity: size of the ring buffer, the oldest lines are dropped when it fills up before a flush
+        Messages are formatted with `%` only when they get written, so the arguments should not be changed
+        after being logged. Nothing touches the file until flush() or reset() are called.
+    """
+    def __init__(self, path='log.txt', level=INFO, capacity=20000):
+        self.path = path
+        self.level = level
+        self.buffer = deque(maxlen=capacity)
+
+    def enabled(self, level):
+        """ Returns True if lines of the level get logged, so expensive arguments can be skipped """
+        return level >= self.level
+
+    def log(self, level, message, *args):
+        if level >= self.level:
+            self.buffer.append((message, args))
+
+    def debug(self, message, *args):
+        if DEBUG >= self.level:
+            self.buffer.append((message, args))
+
+    def info(self, message, *args):
+        if INFO >= self.level:
+            self.buffer.append((message, args))
+
+    def warning(self, message, *args):
+        if WARNING >= self.level:
+            self.buffer.append((message, args))
+
+    def error(self, message, *args):
+        if ERROR >= self.level:
+            self.buffer.append((message, args))
+
+    def flush(self):
+        """ Formats the buffered lines and appends them to the file at once """
+        if not self.buffer:
+            return
+        lines = [(message % args if args else str(message)) + '\n' for message, args in self.buffer]
+        self.buffer.clear()
+        with open(self.path, 'a') as text_file:
+            text_file.write(''.join(lines))
+
+    def reset(self, header='logs:'):
+        """ Empties the file (e.g. when a new game starts) and the buffer """
+        self.buffer.clear()
+        with open(self.path, 'w') as text_file:
+            text_file.write(header + '\n')
@@ -0,0 +1,70 @@
+class CellMatching:
+    """
+        Gives my ships and spawning shipyards the cells they end the turn on, never two of them on the same cell
+        Each one comes with its actions best first and the flat index of the cell every action leads to (None for the
+        ones that leave nothing on the board, like convert). It takes its best action whose cell is still free, and
+        only when none is it pushes the ones holding its cells down their own lists (an augmenting path, as in Kuhn's
+        matching). The first ones added keep their best choices unless a later one would have nowhere to go.
+        Keeps:
+            owner: cell: id of what ends the turn on it
+            options: id: its (action, cell) options
+            choice: id: index of the option it got
+    """
+    def __init__(self):
+        self.owner = {}
+        self.options = {}
+        self.choice = {}
+
+    def add(self, object_id, options, push=True):
+        """
+            Returns the action the object got, None when all its cells are taken for good
+            params:
+                options: (action, cell) best first
+                push: whether the ones already holding its cells may be moved to their other options
+        """
+        self.options[object_id] = options
+        if self.take(object_id, set(), push):
+            return self.action(object_id)
+        del self.options[object_id]
+        return None
+
+    def take(self, object_id, visited, push):
+        """ Gives the object a free cell, or one freed by moving its owner on, visited being the cells of the path so far """
+        options = self.options[object_id]
+        for n, (action, cell) in enumerate(options):
+            if cell is None or (cell not in self.owner and cell not in visited):
+                self.assign(object_id, n)
+                return True
+        if not push:
+            return False
+        for n, (action, cell) in enumerate(options):
+            if cell in visited:
+                continue
+            visited.add(cell)
+            if self.take(self.owner[cell], visited, push):
+                self.assign(object_id, n)
+                return True
+        return False
+
+    def assign(self, object_id, n):
+        if object_id in self.choice:
+            cell = self.options[object_id][self.choice[object_id]][1]
+            if self.owner.get(cell) == object_id:
+                del self.owner[cell]
+        self.choice[object_id] = n
+        cell = self.options[object_id][n][1]
+        if cell is not None:
+            self.owner[cell] = object_id
+
+    def drop(self, object_id, action):
+        """ Removes an action from the options the object could still be pushed to, the one it got stays """
+        options, choice = self.options[object_id], self.choice[object_id]
+        self.choice[object_id] = sum(option[0] != action for option in options[:choice])
+        self.options[object_id] = [option for n, option in enumerate(options) if option[0] != action or n == choice]
+
+    def action(self, object_id):
+        return self.options[object_id][self.choice[object_id]][0]
+
+    def actions(self):
+        """ Returns id: action of everything that got a cell, in the order they were added """
+        return {object_id: self.action(object_id) for object_id in self.options}
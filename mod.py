@@ -1,6 +1,23 @@
-from kaggle_environments.envs.halite.helpers import Board, ShipAction, ShipyardAction
+try:
+    from kaggle_environments.envs.halite.helpers import Board, ShipAction, ShipyardAction
+except ImportError:
+    # Offline builds play on the local engine
+    from engine import Board, ShipAction, ShipyardAction
 import pandas as pd
 import numpy as np
+from snapshot import BoardSnapshot
+from overlay import TurnOverlay
+from logger import Logger, DEBUG, INFO
+from decision_trace import TraceWriter
+from timers import PhaseTimer
+from deadline import TurnBudget, cheap_action
+from routes import FieldCache
+from assignment import FleetTargets
+from matching import CellMatching
+from search import BeamSearch
+from economy import EconomySearch, spawn_yard, convert_candidate
+from engine import Board as LocalBoard
+from offsets import offset_table, DIRECTIONS
 
 
 class DecisionShip:
@@ -10,21 +27,34 @@ class DecisionShip:
             board: the board that we will base our decisions on
             ship: the ship we are deciding for
             step: the steps into the stimulation
+            snapshot: the BoardSnapshot of the board
+            radius: how many moves away the ship looks, smaller when the turn runs out of time
+            target: the (kind, flat position, value) FleetTargets gave the ship, None without one
+            coefficients: the ship's hyperparameters when they were calculated for the whole fleet (fleet_hyperparameters)
         returns:
             determine: returns the next-action that should be taken
     """
-    def __init__(self, board: Board, ship_id, step):
+    def __init__(self, board: Board, ship_id, step, snapshot, radius=10, target=None, coefficients=None):
         # The passed variables
         self.board = board
         self.ship = board.ships[ship_id]
         self.step = step
+        self.snapshot = snapshot
+        self.radius = radius
+        self.target = target
         # Some usefull properties
         self.player = self.board.current_player
         self.ship_cargo = self.ship.halite
         self.current_cell = self.ship.cell
         self.current_position = self.ship.position
-        # Check to see if the stimulation is about to end
-        self.NEAR_END = self.near_end()
+        self.current_index = snapshot.index(self.current_position)
+        self.current_halite = float(snapshot.halite[self.current_index])
+        # Player totals, projected by the actions committed earlier in the turn
+        self.player_halite = float(snapshot.player_halite[snapshot.me])
+        self.n_ships, self.n_shipyards = len(snapshot.my_ships()), len(snapshot.my_shipyards())
+        self.ship_index = snapshot.ship_lookup[ship_id]
+        # Check to see if the stimulation is about to end, it is the same for the whole fleet
+        self.NEAR_END = coefficients['NEAR_END'] if coefficients else self.near_end()
         # All moves ship can take
         self.moves = {"N": ShipAction.NORTH, 'S': ShipAction.SOUTH, 'W': ShipAction.WEST,
                       'E': ShipAction.EAST, 'convert': ShipAction.CONVERT, 'mine': None}
@@ -33,7 +63,9 @@ class DecisionShip:
         # Weights of different moves
         self.weights = {"N": 0, "E": 0, "W": 0, "S": 0, "mine": 0, "convert": 0, 'None': 0}
         # The cells around the main one
-        self.grid = grid(self.ship.cell)
+        self.grid, self.grid_indices = grid(self.current_index, snapshot.size, radius)
+        # The way from every cell to my closest shipyard, kept across turns
+        self.field = fields.get(snapshot)
         # Closest shipyard id and the distance
         self.closest_shipyard_id, self.closest_shipyard_distance = self.closest_shipyard()
         # Default move which is set to mining (None)
@@ -42,135 +74,85 @@ class DecisionShip:
         self.current = {}
         # Dictionary indicating the actions that should be taken by other ships to increase the prediction accuracy
         self.other_actions = {}
+        # Set when the weights were already filled in by FleetDecisions
+        self.weighted = False
         # Setting the hyper parameters
-        self.set_hyperparameters()
-
-    def set_hyperparameters(self):
-        """ Initializes the hyperparameters that will affect the decision process """
-        self.MINING = self.mining_hyper()
-        self.DEPOSIT = self.deposit_hyper()
-        self.DIRECTION_ENCOURAGEMENT = self.direction_encouragement_hyper()
-        self.ATTACK_ENEMY_SHIP = self.attack_enemy_ship_hyper()
-        self.DISTRIBUTION = self.distribution_hyper()
-        self.GET_AWAY = self.get_away_hyper()
-        self.CLOSEST_SHIPYARD = self.closest_shipyard_hyper()
-        self.CONVERSION = self.conversion_hyper()
-
-        log('  mining: ' + str(round(self.MINING, 2)) + ", conv: " + str(self.CONVERSION) + ", depo: " + str(round(self.DEPOSIT,2)) + ", dir: " + str(round(self.DIRECTION_ENCOURAGEMENT, 2)) + ", att-en-ship: " + str(round(self.ATTACK_ENEMY_SHIP, 2)) + ", distro: " + str(round(self.DISTRIBUTION, 2)) + ', get-away: ' + str(round(self.GET_AWAY, 2)) + ', c_yard: ' + str(round(self.CLOSEST_SHIPYARD, 2)) + ',nearEND: ' + str(self.NEAR_END))
+        self.set_hyperparameters(coefficients)
+
+    def set_hyperparameters(self, coefficients=None):
+        """ Initializes the hyperparameters that will affect the decision process, calculated alone without coefficients """
+        if coefficients is None:
+            coefficients = hyperparameters(self.step, self.ship_cargo, self.closest_shipyard_distance, self.current_halite,
+                                           self.NEAR_END, self.player_halite, self.n_shipyards)
+        self.__dict__.update(coefficients)
+
+    def log_hyperparameters(self):
+        """ Logs the hyperparameters the decision was based on """
+        if not logger.enabled(DEBUG):
+            return
+        logger.debug('  mining: %s, conv: %s, depo: %s, dir: %s, att-en-ship: %s, distro: %s, get-away: %s, c_yard: %s,nearEND: %s',
+                     round(self.MINING, 2), self.CONVERSION, round(self.DEPOSIT, 2), round(self.DIRECTION_ENCOURAGEMENT, 2), round(self.ATTACK_ENEMY_SHIP, 2),
+                     round(self.DISTRIBUTION, 2), round(self.GET_AWAY, 2), round(self.CLOSEST_SHIPYARD, 2), self.NEAR_END)
+        logger.debug('  target: %s, assignment: %s', self.target, self.ASSIGNMENT)
     
-    def mining_hyper(self):
-        """ Calculates the hyperparameters value for MINING, indirect with ship's cargo """
-        spec1 = self.closest_shipyard_distance > 2 and self.closest_shipyard_distance < 5 and self.step > 20
-        spec2 = self.closest_shipyard_distance > 2 and self.closest_shipyard_distance < 3 and self.current_cell.halite != 0
-        return (200 + self.step / 10) * (10 * (self.step // 250) + 1) + int(spec1) * 2500 + int(spec2) * 10000
-
-    def deposit_hyper(self):
-        """ Calculates the hyperparameters value for DEPOSIT, indirect with ship's cargo and step """
-        dir_cargo = self.ship_cargo / 200
-        dir_step = self.step // 100 + 1
-
-        spec1 = self.closest_shipyard_distance < 8 and self.player.halite < 1000
-        # spec2 = 700 - self.step * 1.5 < self.player.halite
-        return 5 + 10 * dir_cargo * dir_step / (self.closest_shipyard_distance + 1) + int(self.NEAR_END) * 100000 + int(spec1) * 100 #+ int(spec2) * 100
-
-    def direction_encouragement_hyper(self):
-        """ Calculates the hyperparameters value for DIRECTION_ENCOURAGEMENT, indirect with ship's cargo and direction with step """
-        indir_cargo = self.ship_cargo // 500 + 1
-        dir_step = 400 - self.step
-
-        spec = self.step > 300
-
-        return 80 * dir_step / indir_cargo + int(spec) * 100
-
-    def get_away_hyper(self):
-        """ Calculates the hyperparameters value for DIRECTION_ENCOURAGEMENT, direct with cargo and indirect with number of ships """
-        dir_cargo = self.ship_cargo // 50 + 1
-        return -10 * dir_cargo
-
-    def attack_enemy_ship_hyper(self):
-        """ Calculates the hyperparameters value for ATTACK_ENEMY_SHIP, indirect with cargo and step """
-        indir_cargo = (self.ship_cargo // 100) + 1
-        indir_step = (self.step // 50) + 1
-
-        return 100 / (indir_cargo * indir_step)
-
-    def distribution_hyper(self):
-        """ Calculates the hyperparameters value for DISTRIBUTION, indirect with cargo and step """
-        # Related to the number of ships
-        return -20 / ((self.step // 20 + 1) * (self.ship_cargo // 100 + 1))
-
-    def closest_shipyard_hyper(self):
-        """ Calculates the hyperparameters value for CLOSEST_SHIPYARD, direct with cargo and step """
-        return (self.step // 25 + 1)
-
-    def conversion_hyper(self):
-        return max(60 - len(self.player.shipyards) * 2, 5)
-
     def determine(self):
         """ Returns next action decided for the ship based on the observations that have been made. """
-        self.weight_moves()  # Calculate the weights for main four directions
-        self.round()  # Round the weights
-        self.apply_elimination()  # Apply the eliminations
-
-        # Sort the values
-        sorted_weights = {k: v for k, v in sorted(self.weights.items(), key=lambda item: item[1], reverse=True)}
+        action = self.ranked()[0]
+        return self.moves[action], action
 
-        log('  -> weights: ' + str(sorted_weights))
+    def ranked(self):
+        """ Returns the actions that weren't eliminated, best first, 'mine' alone when none is left """
+        self.log_hyperparameters()
+        if not self.weighted: self.weight_moves()  # Calculate the weights for main four directions
+        with timer.phase('elimination'):
+            self.round()  # Round the weights
+            self.apply_elimination()  # Apply the eliminations
 
-        # Choose the action with highest value given that it is not eliminated
-        for action in sorted_weights.keys():
-            if action == 'convert':
-                if sorted_weights['convert'] >= 0:
-                    return self.moves[action], action
-                
-                if sorted_weights['convert'] < 0 and len(sorted_weights.values()) == 1:
-                    return self.moves[action], action
+            # Sort the values
+            sorted_weights = {k: v for k, v in sorted(self.weights.items(), key=lambda item: item[1], reverse=True)}
 
-            else:
-                return self.moves[action], action
+        logger.debug('  -> weights: %s', sorted_weights)
 
-        # If none were chosen, then just return the default move which is mining
-        return self.next_move, 'mine'
+        # A negative CONVERT is only taken when there is nothing else
+        actions = [action for action, weight in sorted_weights.items()
+                   if action != 'convert' or weight >= 0 or len(sorted_weights) == 1]
+        # If none were left, then the default move which is mining
+        return actions or ['mine']
 
     def add_accordingly(self, value, title="", loging=False):
-        """ Adds a value to directions according to their corresponding weights """
-        weightX, weightY, dirX, dirY, movesX, movesY = 0, 0, "", "", 0, 0
-
-        if "N" in self.current['dir']:
-            dirY, movesY = 'N', self.current['dir'].upper().count("N")
-            weightY = 1 / (len(self.current['dir']) ** 2 * movesY)
-        elif "S" in self.current['dir']:
-            dirY, movesY = 'S', self.current['dir'].upper().count("S")
-            weightY = 1 / (len(self.current['dir']) ** 2 * movesY)
-
-        if "W" in self.current['dir']:
-            dirX, movesX = 'W', self.current['dir'].upper().count("W")
-            weightX = 1 / (len(self.current['dir']) ** 2 * movesX)
-        elif "E" in self.current['dir']:
-            dirX, movesX = 'E', self.current['dir'].upper().count("E")
-            weightX = 1 / (len(self.current['dir']) ** 2 * movesX)
-
+        """ Adds a value to the grid cell being analyzed, project() spreads the values of all of them over the directions """
         if value != 0 and loging:
-            log('   ' + title + ', adding ' + str(round(value * weightX, 3)) + ' to ' + dirX + ', moves: ' + str(movesX) + ' and ' + str(round(value * weightY, 2)) + ' to ' + dirY + ", moves: " + str(movesY))
-
-        if weightX != 0: self.weights[dirX] += value * weightX
-        if weightY != 0: self.weights[dirY] += value * weightY
+            logger.debug('   %s, adding %s to %s', title, round(value, 3), self.current['dir'])
+        self.spread[self.current['n']] += value
+
+    def project(self):
+        """ Adds the grid's values to the directions according to their corresponding weights, one product for all the cells """
+        table = offset_table(self.radius, self.snapshot.size)
+        for direction, value in zip(DIRECTIONS, (table.projection[:, :len(self.spread)] @ self.spread).tolist()):
+            self.weights[direction] += value
+
+    def add_toward(self, value, direction):
+        """ Adds a value to the directions of a direction string that isn't a grid cell, with the same weights """
+        for axis in ('NS', 'WE'):
+            moves = sum(direction.count(letter) for letter in axis)
+            if moves:
+                self.weights[axis[0] if axis[0] in direction else axis[1]] += value * (1 / (len(direction) ** 2 * moves))
         
     def weight_convert(self, base_threshold=200):
         """ Weights the CONVERT option"""
         # Calculating the threshhold
-        threshold = base_threshold + 200 * len(self.player.shipyards)
+        threshold = base_threshold + 200 * self.n_shipyards
         # If they are no shipyards left
-        no_shipyards = len(self.player.shipyards) == 0
+        no_shipyards = self.n_shipyards == 0
         # On shipyard already
-        on_shipyard = self.ship.cell.shipyard is not None
+        on_shipyard = self.snapshot.shipyard_owner[self.current_index] != -1
 
-        if self.player.halite + self.ship.halite >= 500:
+        if self.player_halite + self.ship.halite >= 500:
             if no_shipyards and not on_shipyard:
                 self.weights['convert'] = 1e8 # Very high number that will ensure that 
             elif not on_shipyard:
                 # When the ship is not on any shipyard then weight it
-                self.weights['convert'] = self.CONVERSION * (self.ship_cargo - threshold) * (self.closest_shipyard_distance ** 2) / ((40 - self.closest_shipyard_distance) * len(self.player.shipyards)) ** 2
+                self.weights['convert'] = self.CONVERSION * (self.ship_cargo - threshold) * (self.closest_shipyard_distance ** 2) / ((40 - self.closest_shipyard_distance) * self.n_shipyards) ** 2
             elif on_shipyard:
                 # If the ship was already on a shipyard then eliminate the move
                 self.eliminated_moves.append('convert')
@@ -182,83 +164,105 @@ class DecisionShip:
         """ This is the main function and runs other helper functions within the module to to weight the different moves that could be taken. """
         
         # Weight the CONVERT option
-        self.weight_convert()
+        with timer.phase('weight_convert'):
+            self.weight_convert()
 
         # See if any of the shipyards need defending
-        self.shipyard_status()
+        with timer.phase('shipyard_status'):
+            self.shipyard_status()
 
         # Performance issues
-        interval = min(220, 12000 // (len(self.player.ships) + 1))
+        interval = min(220, 12000 // (self.n_ships + 1))
+
+        # Read the whole grid from the snapshot at once instead of going through the cells one by one
+        directions = self.grid[:interval]
+        indices = self.grid_indices[:interval]
+        ship_owners = self.snapshot.ship_owner[indices].tolist()
+        ship_indices = self.snapshot.ship_index[indices].tolist()
+        shipyard_owners = self.snapshot.shipyard_owner[indices].tolist()
+        shipyard_indices = self.snapshot.shipyard_index[indices].tolist()
+        halites = self.snapshot.halite[indices].tolist()
+        me = self.snapshot.me
+        # What add_accordingly puts on each cell of the grid
+        self.spread = np.zeros(interval)
 
         # Iterate through different directions
-        for direction, cell in list(self.grid.items())[:interval]:
-            # Set the global values that will be used
-            self.current['dir'] = direction
-            self.current['cell'] = cell
-
-            # 1. Evaluate the moves based on other objects in the map
-            # 1.1 If there was a ship
-            if cell.ship is not None:
-                if cell.ship.id in self.player.ship_ids:
-                    if 'convert' in self.weights.keys():
-                        if self.weights['convert'] > 0: self.weights['convert'] += 100 / len(direction)
-                    self.distribute_ships(cell.ship_id) # If it was my ship
-                else:
-                    if 'convert' in self.weights.keys():
-                        if self.weights['convert'] > 0: self.weights['convert'] -= 200 / len(direction)
-                    self.deal_enemy_ship(cell.ship_id)
-
-            # 1.2 If there was a shipyard
-            if cell.shipyard is not None:
-                if cell.shipyard.id in self.player.shipyard_ids:
-                    self.deposit()
-                else:
-                    self.attack_enemy_shipyard(cell.shipyard_id)
-
-            # 2. Trigger movement in the main four direction solely based on the amount of halite each cell has
-            # Estimate how much halite a cell will have then divide it by four, if there was a ship divide by 100
-            ship_affect = (1 + int(self.ship is None)) / 200
-            main_dir_encourage = self.DIRECTION_ENCOURAGEMENT * (cell.halite * 1.02 ** len(direction)) * ship_affect / 4  
-            self.add_accordingly(main_dir_encourage, title='  main4', loging=False)
-
-            # 3. Either encourage mining or discourage it by adding the difference between cells to the mine
-            mining_trigger = 10 * (self.current_cell.halite - self.grid[direction].halite * 1.25 ** len(direction)) / (len(direction) ** 2)
-            # if self.step > 100 and self.step < 104: log('  trigger:? ' + str(mining_trigger)) 
-            self.weights['mine'] += mining_trigger
+        with timer.phase('grid_loop'):
+            for n, direction in enumerate(directions):
+                # Set the global values that will be used
+                self.current['n'] = n
+                self.current['dir'] = direction
+                self.current['index'] = indices[n]
+                self.current['halite'] = halites[n]
+
+                # 1. Evaluate the moves based on other objects in the map
+                # 1.1 If there was a ship
+                if ship_owners[n] != -1:
+                    if ship_owners[n] == me:
+                        if 'convert' in self.weights.keys():
+                            if self.weights['convert'] > 0: self.weights['convert'] += 100 / len(direction)
+                        self.distribute_ships(ship_indices[n]) # If it was my ship
+                    else:
+                        if 'convert' in self.weights.keys():
+                            if self.weights['convert'] > 0: self.weights['convert'] -= 200 / len(direction)
+                        self.deal_enemy_ship(ship_indices[n])
+
+                # 1.2 If there was a shipyard
+                if shipyard_owners[n] != -1:
+                    if shipyard_owners[n] == me:
+                        self.deposit()
+                    else:
+                        self.attack_enemy_shipyard(shipyard_indices[n])
+
+                # 3. Either encourage mining or discourage it by adding the difference between cells to the mine
+                mining_trigger = 10 * (self.current_halite - halites[n] * 1.25 ** len(direction)) / (len(direction) ** 2)
+                # if self.step > 100 and self.step < 104: log('  trigger:? ' + str(mining_trigger)) 
+                self.weights['mine'] += mining_trigger
+
+            # Spread the cells' values over the directions leading to them
+            self.project()
+
+        # The enemy ships that could end the turn next to the ship, from the turn's prediction
+        self.meet_enemy_ships()
+
+        # 2. Trigger movement in the main four direction solely based on the amount of halite each cell has
+        # Estimate how much halite a cell will have then divide it by four, if there was a ship divide by 100
+        # The halite of the grid is spread like add_accordingly once per turn for the whole board
+        ship_affect = (1 + int(self.ship is None)) / 200
+        attraction = self.snapshot.attraction(self.radius, interval, 1.02)
+        for direction, value in attraction.at(self.current_index, self.DIRECTION_ENCOURAGEMENT * ship_affect / 4).items():
+            self.weights[direction] += value
 
         # The correlation of the mining with cell's halite
-        # if self.step > 100 and self.step < 104: log(" cel?l_halite: " + str(self.current_cell.halite))
-        self.weights['mine'] += self.MINING * (self.current_cell.halite // 4 + 1) ** 2 
+        # if self.step > 100 and self.step < 104: log(" cel?l_halite: " + str(self.current_halite))
+        self.weights['mine'] += self.MINING * (self.current_halite // 4 + 1) ** 2 
 
-    def distribute_ships(self, ship_id):
+        # 4. The target the fleet-wide assignment gave the ship
+        self.go_to_target()
+
+    def distribute_ships(self, ship_index):
         """ This function lowers the ships tendency to densely populate an area """
-        # Preventing my ships from crashing with each other
-        if len(self.current['dir']) == 1 and not self.NEAR_END: self.eliminated_moves.append(self.current['dir'])
-        
+        # My ships crashing with each other is left to the CellMatching of the turn, one can follow another
         # Encourage distribution
-        distribution_encouragement = self.DISTRIBUTION * abs(self.ship_cargo - self.board.ships[ship_id].halite)
+        distribution_encouragement = self.DISTRIBUTION * abs(self.ship_cargo - float(self.snapshot.ship_halite[ship_index]))
         self.add_accordingly(distribution_encouragement, title='Distribution', loging=False)
 
-    def deal_enemy_ship(self, ship_id):
+    def deal_enemy_ship(self, ship_index):
         """ This function will evaluate to either attack or get_away from an enemy ship based on the 
         simple observation: If my ship had more cargo then I should not attack. """
-        if self.ship_cargo + 0.25 * self.ship.cell.halite > (self.board.ships[ship_id].halite + 0.25 * len(self.current['dir']) * self.current['cell'].halite):
-            self.get_away(cargo_diff=abs(self.board.ships[ship_id].halite - self.ship_cargo))
-        else:
-            self.attack_enemy_ship(abs(self.board.ships[ship_id].halite - self.ship_cargo))
+        enemy_cargo = float(self.snapshot.ship_halite[ship_index])
+        if self.ship_cargo + 0.25 * self.current_halite > (enemy_cargo + 0.25 * len(self.current['dir']) * self.current['halite']):
+            self.get_away(cargo_diff=abs(enemy_cargo - self.ship_cargo))
+        elif len(self.current['dir']) > 1:
+            # The ones next to the ship are hunted where they are likely to go, in meet_enemy_ships
+            self.attack_enemy_ship(abs(enemy_cargo - self.ship_cargo))
 
     def get_away(self, cargo_diff=1):
         """ This function is called when my ship needs to get away from a ship which might be following it """
-        direction_discouragement = 0
-
-        # 1. Directly discouraging the movement
-        if len(self.current['dir']) == 1:
-            self.eliminated_moves.append(self.current['dir'])
-            if 'mine' in self.weights.keys(): self.eliminated_moves.append('mine')    
-        else:
+        # 1. Directly discouraging the movement, the cells it could step on next turn are left to meet_enemy_ships
+        if len(self.current['dir']) > 1:
             direction_discouragement = self.GET_AWAY * (self.ship.halite  + 0.1)
-        
-        self.add_accordingly(direction_discouragement, title='Get-Away', loging=False)
+            self.add_accordingly(direction_discouragement, title='Get-Away', loging=False)
 
         # 2. Encourage going to the closest shipyard
         closest_shipyard_encouragement = round(self.CLOSEST_SHIPYARD * cargo_diff ** 1.5 / len(self.current['dir']) ** 2, 2)
@@ -269,55 +273,64 @@ class DecisionShip:
         """ Encourage movement towards the nearest shipyard """
         
         if self.closest_shipyard_id != 0.99: # Given that there is a closest shipyard
-            (x, y) = self.board.shipyards[self.closest_shipyard_id].position
-            
-            if x > self.current_cell.position.x:
+            dx, dy = self.field.dx[self.current_index], self.field.dy[self.current_index]
+
+            if dx > 0:
                 self.weights['E'] += value 
                 # log('   closest_yard: ' + str(value) + " at E")
-            elif x < self.current_cell.position.x:
+            elif dx < 0:
                 self.weights['W'] += value
                 # log('   closest_yard: ' + str(value) + " at W")
 
-            if y > self.current_cell.position.y:
+            if dy > 0:
                 self.weights['N'] += value
                 # log('   closest_yard: ' + str(value) + " at N")
-            elif y < self.current_cell.position.y:
+            elif dy < 0:
                 self.weights['S'] += value 
                 # log('   closest_yard: ' + str(value) + " at S")
 
+    def go_to_target(self):
+        """ Encourage movement toward the ship's target, or mining when the ship is already on it """
+        if self.target is None:
+            return
+        kind, position, value = self.target
+        value = self.ASSIGNMENT * value
+        size, half = self.snapshot.size, self.snapshot.size // 2
+        dx = (int(self.snapshot.x[position]) - int(self.snapshot.x[self.current_index]) + half) % size - half
+        dy = (int(self.snapshot.y[position]) - int(self.snapshot.y[self.current_index]) + half) % size - half
+
+        if dx == 0 and dy == 0:
+            self.weights['mine'] += value
+        if dx > 0:
+            self.weights['E'] += value
+        elif dx < 0:
+            self.weights['W'] += value
+        if dy > 0:
+            self.weights['N'] += value
+        elif dy < 0:
+            self.weights['S'] += value
+
     def attack_enemy_ship(self, diff):
         """ This function encourages attacking the enemy ship """
         attack_encouragement = self.ATTACK_ENEMY_SHIP * (diff + 1) / (self.closest_shipyard_distance + 0.1)
         self.add_accordingly(attack_encouragement, title='Attacking-Enemy-Ship', loging=False)
-        
-        # If the enemy ship was one move away then update it so the other ships could see it 
-        # if len(self.current['dir']) == 1:
-        #     self.basic_enemy_move(self.current['cell'].ship_id)
-    
-    def basic_self_move(self, ship_id):
-        """ Decides a basic move for one of my ships that is about to get hit by an enemy ship. """
-        pass
 
-    def basic_enemy_move(self, ship_id):
-        """ Decides a basic move for an enemy ship which is about to get hit by one of my own ships. """
-        # Weighting process
-        weights = {"N": 0, "S": 0, "W": 0, "E": 0}
+    def meet_enemy_ships(self):
+        """ Eliminates the moves a lighter enemy ship is likely to end the turn on and encourages the ones a heavier may """
+        enemies = self.snapshot.enemy_moves()
+        cells = enemies.around[self.current_index]
+        risk = enemies.risk(cells, self.ship_cargo)
+        # The same encouragement as attack_enemy_ship, weighted by the chance the enemy ship ends up on the cell
+        hunt = self.ATTACK_ENEMY_SHIP * enemies.prey(cells, self.ship_cargo) / (self.closest_shipyard_distance + 0.1)
 
-        for Dir, Cell in get_directions(self.board.ships[ship_id]):
+        for move, danger, value in zip(enemies.moves, risk.tolist(), hunt.tolist()):
+            self.weights[move] += value
+            if danger > self.COLLISION_RISK:
+                self.eliminated_moves.append(move)
 
-            if not Cell.ship_id in self.board.ships[ship_id].player.ship_ids:
-                weights[Dir] += self.board.ships[ship_id].halite - Cell.ship.halite
-
-            if Cell.shipyard_id in self.board.ships[ship_id].player.shipyard_ids:
-                weights += (1 + self.board.ships[ship_id].halite)
-
-         # Sort the values
-        sorted_weights = {k: v for k, v in sorted(self.weights.items(), key=lambda item: item[1], reverse=True)}
-
-        # Determine an action
-        for action, weight in sorted_weights.items():
-            if weight > 0:
-                pass
+    def basic_self_move(self, ship_id):
+        """ Decides a basic move for one of my ships that is about to get hit by an enemy ship. """
+        pass
 
 
     def deposit(self):
@@ -325,10 +338,12 @@ class DecisionShip:
         deposit_tendency = self.DEPOSIT * (self.ship_cargo + 1)
         self.add_accordingly(deposit_tendency, title='Deposit', loging=False)
 
-    def attack_enemy_shipyard(self, shipyard_id):
+    def attack_enemy_shipyard(self, shipyard_index):
         """ Weights the tendency to attack the enemy shipyard. """
-        dist_to_shipyard = measure_distance(self.board.shipyards[shipyard_id].position, self.current['cell'].position)
-        if len(self.player.ships) >= 2 and self.player.halite > 700 and self.ship_cargo < 30 and dist_to_shipyard < 6 and self.board.shipyards[shipyard_id].player.halite < 500:
+        distances = self.snapshot.distances
+        shipyard_player_halite = float(self.snapshot.player_halite[self.snapshot.shipyard_player[shipyard_index]])
+        dist_to_shipyard = distances.moves[distances.ship(self.ship_index), distances.shipyard(shipyard_index)]
+        if self.n_ships >= 2 and self.player_halite > 700 and self.ship_cargo < 30 and dist_to_shipyard < 6 and shipyard_player_halite < 500:
             destory_shipyard = 1e7 / len(self.current['dir']) ** 2
             self.add_accordingly(destory_shipyard, title='  Destroy_en_shipyard', loging=False)
         elif len(self.current['dir']) == 1 and self.ship_cargo > 100:
@@ -336,22 +351,18 @@ class DecisionShip:
 
     def shipyard_status(self):
         """ Measures tendency for the shipyards within the map """
-        if len(self.player.shipyards) != 0:
+        if self.n_shipyards != 0:
+            # The ships around the shipyards are measured once for all the ships of the turn
+            threats = self.snapshot.threats()
             for shipyard in self.player.shipyards:
-                self.analyze_shipyard_surroundings(shipyard.id)
+                self.analyze_shipyard_surroundings(shipyard.id, threats)
 
-    def analyze_shipyard_surroundings(self, shipyard_id):
+    def analyze_shipyard_surroundings(self, shipyard_id, threats):
         """ Analyzes the tendency to go toward a specific shipyard """
-        shipyard, value = self.board.shipyards[shipyard_id], 0
-        shipyard_grid = grid(shipyard.cell) # Limit it to four moves away
-
-        for cell in shipyard_grid.values():
-            # If there is a ship on that cell
-            if cell.ship is not None:
-                if cell.ship.id in self.player.ship_ids:
-                    value += -1e4 / (self.ship_cargo + 0.99)
-                else:
-                    value += 1e4 /(cell.ship.halite + 0.99) 
+        shipyard, index = self.board.shipyards[shipyard_id], self.snapshot.shipyard_lookup[shipyard_id]
+        # The enemy ships around add 1e4 / their cargo, each one of mine takes away 1e4 / this ship's cargo
+        enemies = threats.enemies(1e4 / (self.snapshot.ship_halite + 0.99))[index]
+        value = enemies - threats.own_ships()[index] * 1e4 / (self.ship_cargo + 0.99)
 
         # Don't discourage any move toward a shipyards
         if value > 0:
@@ -368,29 +379,19 @@ class DecisionShip:
                 currentDir += "N" * abs(shipyard.position.y - self.current_position.y)
 
             if currentDir != "":
-                self.current['dir'] = currentDir
-                self.add_accordingly(value, title='  Yard-sur', loging=False)
+                self.add_toward(value, currentDir)
 
     def closest_shipyard(self):
-        """ Returns the closest shipyard's id """
-        closest_id, diff = 0.99, 0.99
-        for shipyard in self.player.shipyards:
-            distance = measure_distance(self.current_cell.position, shipyard.cell.position)
-            if diff > distance or diff == 0.99:
-                closest_id, diff = shipyard.id, distance
-        return closest_id, diff
+        """ Returns the closest shipyard's id and its distance, 0.99 for both when I have no shipyards """
+        if self.field is None:
+            return 0.99, 0.99
+
+        closest = self.snapshot.shipyard_index[self.field.target[self.current_index]]
+        return self.snapshot.shipyard_ids[closest], int(self.field.moves[self.current_index])
         
     def near_end(self):
         """ Determines if the game is about to end so the ships with halite can convert to shipyard and maximum the halite we will end up with """
-        count = 0
-
-        # If the halite was less than 500 and it had no ships
-        for opp in self.board.opponents:
-            if opp.halite < 500 and len(opp.ships) == 0 and self.player.halite > opp.halite: count += 1
-            if opp.halite > 2000 and len(opp.ships) > 1: count -= 1
-
-        # If count was more than 2 return True
-        return (count >= 2 or self.step > 385)
+        return near_end(self.board, self.step, self.player_halite)
 
     def apply_elimination(self):
         """ Eliminates the moves to be eliminated. """
@@ -408,16 +409,196 @@ class DecisionShip:
         self.weights['convert'] = round(self.weights['convert'], 1)
 
 
+class FleetDecisions:
+    """
+        Weights the moves of a whole fleet at once, the batched counterpart of DecisionShip.weight_moves
+        params:
+            snapshot: the BoardSnapshot that every decider was built on
+            deciders: the DecisionShip of each ship in the fleet
+        Every term of weight_moves becomes a ships x cells array, the results are written back into the deciders
+        so determine() picks exactly the same action as the per-ship path.
+    """
+    # Columns of the weight matrix, in the order DecisionShip.weights has them
+    columns = ['N', 'E', 'W', 'S', 'mine', 'convert']
+
+    def __init__(self, snapshot, deciders):
+        self.snapshot = snapshot
+        self.deciders = deciders
+
+    def hyper(self, name):
+        """ Returns an attribute of every decider as an array """
+        return np.array([getattr(decider, name) for decider in self.deciders], dtype=float)
+
+    def weight_moves(self):
+        """ Calculates the ships x {N,E,W,S,mine,convert} weights and the eliminated moves of every decider """
+        if len(self.deciders) == 0:
+            return
+
+        snapshot, me = self.snapshot, self.snapshot.me
+        # The player totals are the same for every decider
+        player = self.deciders[0]
+        # The CONVERT option is a handful of scalar checks per ship
+        with timer.phase('weight_convert'):
+            for decider in self.deciders:
+                decider.weight_convert()
+
+        cargo, current_halite = self.hyper('ship_cargo'), self.hyper('current_halite')
+        closest_distance = self.hyper('closest_shipyard_distance')
+        weights = np.zeros((len(self.deciders), len(self.columns)))
+        eliminated = np.zeros((len(self.deciders), len(self.columns)), dtype=bool)
+        weights[:, 5] = [decider.weights['convert'] for decider in self.deciders]
+
+        # See if any of the shipyards need defending
+        with timer.phase('shipyard_status'):
+            self.shipyard_status(weights, cargo)
+
+        # The grid of every ship
+        with timer.phase('grid_loop'):
+            interval = min(220, 12000 // (player.n_ships + 1))
+            # weigh_fleet gives every decider the same radius
+            table = offset_table(player.radius, snapshot.size)
+            moves = table.moves[:interval]
+            cells = table.gather(self.hyper('current_index').astype(int))[:, :interval]
+            ship_owner, ship_cargo = snapshot.ship_owner[cells], snapshot.ship_cargo[cells]
+            shipyard_owner, halite = snapshot.shipyard_owner[cells], snapshot.halite[cells]
+            shipyard_player_halite = snapshot.player_halite[shipyard_owner]
+
+            my_ship = ship_owner == me
+            enemy_ship = (ship_owner != -1) & ~my_ship
+            my_shipyard = shipyard_owner == me
+            enemy_shipyard = (shipyard_owner != -1) & ~my_shipyard
+            one_move = moves == 1
+
+            # 1.1 My ships: distribute, the CellMatching keeps them from stepping on each other
+            spread = np.where(my_ship, self.hyper('DISTRIBUTION')[:, None] * np.abs(cargo[:, None] - ship_cargo), 0)
+
+            # 1.1 Enemy ships: get away when carrying more, attack otherwise
+            cargo_diff = np.abs(ship_cargo - cargo[:, None])
+            get_away = enemy_ship & ((cargo + 0.25 * current_halite)[:, None] > ship_cargo + 0.25 * moves * halite)
+            # The ones next to the ship are hunted where they are likely to go, like meet_enemy_ships
+            attack = enemy_ship & ~get_away & ~one_move
+            spread += np.where(get_away & ~one_move, (self.hyper('GET_AWAY') * (cargo + 0.1))[:, None], 0)
+            spread += np.where(attack, self.hyper('ATTACK_ENEMY_SHIP')[:, None] * (cargo_diff + 1) / (closest_distance[:, None] + 0.1), 0)
+            # Running away also leads to the closest shipyard
+            closest_shipyard = np.where(get_away, np.round(self.hyper('CLOSEST_SHIPYARD')[:, None] * cargo_diff ** 1.5 / moves ** 2, 2), 0).sum(axis=1)
+            self.go_to_closest_shipyard(weights, closest_shipyard)
+
+            # 1.2 Shipyards: deposit into mine, attack or avoid the enemy's
+            spread += np.where(my_shipyard, (self.hyper('DEPOSIT') * (cargo + 1))[:, None], 0)
+            can_attack = (player.n_ships >= 2 and player.player_halite > 700) & (cargo < 30)
+            # A shipyard sits on the cell, so the moves to the cell are the moves to the shipyard
+            destroy = enemy_shipyard & can_attack[:, None] & (moves < 6) & (shipyard_player_halite < 500)
+            spread += np.where(destroy, 1e7 / moves ** 2, 0)
+            eliminate = enemy_shipyard & ~destroy & one_move & (cargo > 100)[:, None]
+
+            # Spread every cell's value over the directions leading to it, one product for the whole fleet
+            projection = table.projection[:, :interval]
+            weights[:, :4] += spread @ projection.T
+            eliminated[:, :4] |= (eliminate & one_move) @ (projection > 0).T
+
+            # The enemy ships that could end the turn next to the ships, from the turn's prediction
+            enemies = snapshot.enemy_moves()
+            around = enemies.around[self.hyper('current_index').astype(int)]
+            weights[:, :5] += (self.hyper('ATTACK_ENEMY_SHIP') / (closest_distance + 0.1))[:, None] * enemies.prey(around, cargo[:, None])
+            eliminated[:, :5] |= enemies.risk(around, cargo[:, None]) > self.hyper('COLLISION_RISK')[:, None]
+
+
+            # 2. The main four directions based on the halite of each cell, spread around the ships' cells
+            attraction = snapshot.attraction(player.radius, interval, 1.02)
+            weights[:, :4] += (self.hyper('DIRECTION_ENCOURAGEMENT') * (1 / 200) / 4)[:, None] * \
+                attraction.field(self.hyper('current_index').astype(int))
+
+            # 3. Mining
+            weights[:, 4] += (10 * (current_halite[:, None] - halite * 1.25 ** moves) / moves ** 2).sum(axis=1)
+            weights[:, 4] += self.hyper('MINING') * (current_halite // 4 + 1) ** 2
+
+            # 4. The targets of the fleet-wide assignment
+            self.go_to_target(weights)
+
+            # CONVERT gets pushed by nearby ships for as long as it stays positive
+            delta = np.where(my_ship, 100 / moves, 0) - np.where(enemy_ship, 200 / moves, 0)
+            convert = np.cumsum(np.hstack([weights[:, 5:6], delta]), axis=1)[:, 1:]
+            stopped = (convert <= 0).any(axis=1)
+            final = np.where(stopped, convert[np.arange(len(convert)), (convert <= 0).argmax(axis=1)], convert[:, -1])
+            weights[:, 5] = np.where(weights[:, 5] > 0, final, weights[:, 5])
+
+            for decider, row, eliminated_row in zip(self.deciders, weights.tolist(), eliminated.tolist()):
+                decider.weights.update(zip(self.columns, row))
+                decider.eliminated_moves += [move for move, out in zip(self.columns, eliminated_row) if out]
+                decider.weighted = True
+
+    def shipyard_status(self, weights, cargo):
+        """ Batched DecisionShip.shipyard_status: encourages going toward the shipyards with enemies around """
+        snapshot = self.snapshot
+        my_shipyards = snapshot.my_shipyards()
+        if len(my_shipyards) == 0:
+            return
+
+        # Ships around each of my shipyards
+        threats = snapshot.threats()
+        enemies = threats.enemies(1e4 / (snapshot.ship_halite + 0.99))[my_shipyards]
+        mine = threats.own_ships()[my_shipyards]
+        value = enemies[None, :] - 1e4 * mine[None, :] / (cargo[:, None] + 0.99)
+
+        # Same orientation as analyze_shipyard_surroundings
+        position = self.hyper('current_index').astype(int)
+        dx = snapshot.x[snapshot.shipyard_pos[my_shipyards]][None, :] - snapshot.x[position][:, None]
+        dy = snapshot.y[snapshot.shipyard_pos[my_shipyards]][None, :] - snapshot.y[position][:, None]
+        moves = np.abs(dx) + np.abs(dy)
+        value = np.where((value > 0) & (moves > 0), value, 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            along_x = np.where(dx != 0, value / (moves ** 2 * np.abs(dx)), 0)
+            along_y = np.where(dy != 0, value / (moves ** 2 * np.abs(dy)), 0)
+
+        weights[:, 0] += np.where(dy < 0, along_y, 0).sum(axis=1)
+        weights[:, 1] += np.where(dx > 0, along_x, 0).sum(axis=1)
+        weights[:, 2] += np.where(dx < 0, along_x, 0).sum(axis=1)
+        weights[:, 3] += np.where(dy > 0, along_y, 0).sum(axis=1)
+
+    def go_to_target(self, weights):
+        """ Batched DecisionShip.go_to_target """
+        snapshot = self.snapshot
+        targeted = [n for n, decider in enumerate(self.deciders) if decider.target is not None]
+        if not targeted:
+            return
+        position = np.array([self.deciders[n].target[1] for n in targeted])
+        value = np.array([self.deciders[n].ASSIGNMENT * self.deciders[n].target[2] for n in targeted])
+        index = self.hyper('current_index').astype(int)[targeted]
+        size, half = snapshot.size, snapshot.size // 2
+        dx = (snapshot.x[position] - snapshot.x[index] + half) % size - half
+        dy = (snapshot.y[position] - snapshot.y[index] + half) % size - half
+        weights[targeted, 0] += np.where(dy > 0, value, 0)
+        weights[targeted, 1] += np.where(dx > 0, value, 0)
+        weights[targeted, 2] += np.where(dx < 0, value, 0)
+        weights[targeted, 3] += np.where(dy < 0, value, 0)
+        weights[targeted, 4] += np.where((dx == 0) & (dy == 0), value, 0)
+
+    def go_to_closest_shipyard(self, weights, value):
+        """ Batched DecisionShip.go_to_closest_shipyard """
+        field = fields.get(self.snapshot)
+        if field is None:
+            return
+        index = self.hyper('current_index').astype(int)
+        dx, dy = field.dx[index], field.dy[index]
+        weights[:, 0] += np.where(dy > 0, value, 0)
+        weights[:, 1] += np.where(dx > 0, value, 0)
+        weights[:, 2] += np.where(dx < 0, value, 0)
+        weights[:, 3] += np.where(dy < 0, value, 0)
+
+
 class ShipyardDecisions:
-    def __init__(self, board: Board, player, step):
+    def __init__(self, board: Board, player, step, snapshot):
         """
             Decides the Shipyard's next action based on the given parameters
             board: The board that we will be observing
             step: step of the stimulation
+            snapshot: the BoardSnapshot of the board
         """
         self.board = board
+        self.snapshot = snapshot
         self.player = player
-        self.player_halite = player.halite
+        # Projected by the actions committed earlier in the turn
+        self.player_halite = float(snapshot.player_halite[snapshot.me])
         self.step = step
         self.Shipyards = player.shipyards
         self.shipyard_tendencies = {}
@@ -427,7 +608,7 @@ class ShipyardDecisions:
         self.weight_shipyard_tendencies()
         sorted_weights = {k: v for k, v in
                           sorted(self.shipyard_tendencies.items(), key=lambda item: item[1], reverse=True)}
-        log(' Shipyard weights: ' + str(sorted_weights))
+        logger.info(' Shipyard weights: %s', sorted_weights)
         shipyard_ids = []
         for shipyard_id, tendency in sorted_weights.items():
             if tendency > 5 and self.player_halite >= 500:
@@ -440,54 +621,108 @@ class ShipyardDecisions:
         """ Iterates through the shipyards and weights their tendencies. """
         for shipyard in self.Shipyards:
             # Weighting will take place only when there are no ships on the cell
-            if shipyard.cell.ship is None:
-                weight = self.weight(grid(shipyard.cell))
+            if self.snapshot.ship_owner[self.snapshot.index(shipyard.position)] == -1:
+                weight = self.weight(self.snapshot.shipyard_lookup[shipyard.id])
 
                 self.shipyard_tendencies[shipyard.id] = weight
 
-    def weight(self, grid):
+    def weight(self, shipyard_index, radius=3):
         """
             Weights shipyard's tendency to spawn solely based on the objects around it
             The weighting system is rather simple:
                 - If there was an enemy ship add to the weight
                 - If there was one of my own ships, then subtract from the weight
-            Take the distance of the ship into account
+            Take the distance of the ship into account (only the ones in `radius` moves count)
         """
         # If I had no ships then SPAWN
         if len(self.board.current_player.ships) == 0: return 100
         # Get the averages
         if self.step < 120 and self.player_halite >= 500 and len(self.player.ship_ids) < 22: return 100
 
-        value = 0
-        # Iterating through the grid
-        for direction, cell in list(grid.items())[0:24]:
-            if cell.ship is not None:
-                if cell.ship.id in self.player.ship_ids:
-                    value -= 11 / len(direction) ** 2
-                else:
-                    value += 10 / len(direction) ** 2
-                    # If there was an enemy ship one move away from my shipyard then spawn
-                    if len(direction) == 1 and self.player_halite > 500 and cell.ship.halite < 100: 
-                        value += 1e3 
-
-            if cell.shipyard is not None:
-                if cell.shipyard.id in self.player.shipyard_ids:
-                    value += 10 / len(direction) ** 2
-
-        return round(value, 2)
-
-def get_directions(cell):
-    """ Returns the major directions """
-    return {"N": cell.north, "W": cell.west, "E": cell.east, "S": cell.south}
-
-def measure_distance(org, dest):
-    """ Measures the distance between two points """
-    x_1 = abs(org.x - dest.x)
-    x_2 = abs(21 - org.x + dest.x)
-    y_1 = abs(org.y - dest.y)
-    y_2 = abs(21 - org.y + dest.y)
-
-    return min((x_1 + y_1), (x_1 + y_2), (x_2 + y_1), (x_2 + y_2))
+        snapshot = self.snapshot
+        threats = snapshot.threats(radius)
+        moves = threats.moves[shipyard_index]
+        enemy, own = threats.enemy[shipyard_index], threats.own[shipyard_index]
+
+        # The ships around: enemies add to the weight, mine take a bit more from it
+        value = threats.inverse(2, 10, moves)[enemy].sum() - threats.inverse(2, 11, moves)[own].sum()
+        # If there was an enemy ship one move away from my shipyard then spawn
+        if self.player_halite > 500:
+            value += 1e3 * (enemy & (moves == 1) & (snapshot.ship_halite < 100)).sum()
+
+        # My other shipyards around
+        value += threats.inverse(2, 10, threats.shipyard_moves[shipyard_index])[threats.own_shipyards[shipyard_index]].sum()
+
+        return round(float(value), 2)
+
+def near_end(board, step, player_halite):
+    """ Whether the game is about to end for the current player, the same for every ship of the turn """
+    count = 0
+
+    # If the halite was less than 500 and it had no ships
+    for opp in board.opponents:
+        if opp.halite < 500 and len(opp.ships) == 0 and player_halite > opp.halite: count += 1
+        if opp.halite > 2000 and len(opp.ships) > 1: count -= 1
+
+    # If count was more than 2 return True
+    return (count >= 2 or step > 385)
+
+
+def step_hyperparameters(step):
+    """ The parts of the hyperparameters that only depend on the step """
+    P = PARAMETERS
+    return {'mining': (P['mining'] + step / P['mining_step']) * (P['mining_late'] * (step // 250) + 1),
+            'mining_started': step > 20,
+            'deposit_step': step // 100 + 1,
+            'direction': P['direction_encouragement'] * (400 - step),
+            'direction_late': int(step > 300) * P['direction_late'],
+            'attack_step': step // 50 + 1,
+            'distribution_step': step // 20 + 1,
+            'closest_shipyard': P['closest_shipyard'] * (step // 25 + 1)}
+
+
+def step_table(steps=400):
+    """ Returns one row of step_hyperparameters per step, built again when PARAMETERS changes (tuner.py) """
+    global _step_table
+    if _step_table[0] != PARAMETERS:
+        _step_table = dict(PARAMETERS), [step_hyperparameters(step) for step in range(steps)]
+    return _step_table[1]
+
+
+def hyperparameters(step, cargo, distance, halite, near_end, player_halite, n_shipyards):
+    """
+        Returns the hyperparameters of one ship, or of a whole fleet when cargo, distance (to the closest shipyard) and
+        halite (of the ship's cell) are arrays, by name
+        The step-only parts come from the step table, the rest is a handful of operations on the fleet's arrays.
+    """
+    P, table = PARAMETERS, step_table()
+    row = table[step] if step < len(table) else step_hyperparameters(step)
+
+    # MINING, indirect with ship's cargo
+    spec1 = (distance > 2) & (distance < 5) & row['mining_started']
+    spec2 = (distance > 2) & (distance < 3) & (halite != 0)
+    mining = row['mining'] + spec1 * P['mining_near'] + spec2 * P['mining_nearer']
+    # DEPOSIT, indirect with ship's cargo and step
+    spec1 = (distance < 8) & (player_halite < 1000)
+    deposit = P['deposit'] + P['deposit_scale'] * (cargo / P['deposit_cargo']) * row['deposit_step'] / (distance + 1) + \
+        int(near_end) * P['deposit_near_end'] + spec1 * P['deposit_poor']
+    return {'MINING': mining,
+            'DEPOSIT': deposit,
+            # Indirect with ship's cargo and direct with step
+            'DIRECTION_ENCOURAGEMENT': row['direction'] / (cargo // 500 + 1) + row['direction_late'],
+            # Indirect with cargo and step
+            'ATTACK_ENEMY_SHIP': P['attack_enemy_ship'] / ((cargo // 100 + 1) * row['attack_step']),
+            'DISTRIBUTION': P['distribution'] / (row['distribution_step'] * (cargo // 100 + 1)),
+            # Direct with cargo
+            'GET_AWAY': P['get_away'] * (cargo // 50 + 1),
+            'CLOSEST_SHIPYARD': row['closest_shipyard'],
+            # Indirect with the number of shipyards
+            'CONVERSION': max(P['conversion'] - n_shipyards * P['conversion_per_shipyard'], P['conversion_min']),
+            # The pull toward the ship's target per halite a turn it is worth
+            'ASSIGNMENT': P['assignment'],
+            # The chance of meeting a lighter enemy ship above which a move is eliminated
+            'COLLISION_RISK': P['collision_risk']}
+
 
 # def determine_direction():
 #      if shipyard.position.x > self.current_position.x:
@@ -500,140 +735,210 @@ def measure_distance(org, dest):
 #             elif shipyard.position.y < self.current_position.y:
 #                 currentDir += "N" * abs(shipyard.position.y - self.current_position.y)
 
-def grid(cell):
-    """ Returns a dictionary of cells which are in 10 moves distance of the given cell """
-    # The directions that are one move away
-    north, south, west, east = cell.north, cell.south, cell.west, cell.east
-    # The directions that are two moves away
-    n2, s2, w2, e2 = north.north, south.south, west.west, east.east
-    n3, s3, w3, e3 = n2.north, s2.south, w2.west, e2.east
-    n4, s4, w4, e4 = n3.north, s3.south, w3.west, e3.east
-    n5, s5, w5, e5 = n4.north, s4.south, w4.west, e4.east
-    n6, s6, w6, e6 = n5.north, s5.south, w5.west, e5.east
-    n7, s7, w7, e7 = n6.north, s6.south, w6.west, e6.east
-    n8, s8, w8, e8 = n7.north, s7.south, w7.west, e7.east
-    n9, s9, w9, e9 = n8.north, s8.south, w8.west, e8.east
-    n10, s10, w10, e10 = n9.north, s9.south, w9.west, e9.east
-
-    return {
-        # 1 move away
-        'N': north, 'S': south, 'W': west, 'E': east,
-        # 2 moves away
-        'NW': north.west, 'NE': north.east, 'SW': south.west, 'SE': south.east, 'WW': w2, 'EE': e2, 'NN': n2, 'SS': s2,
-        # 3 moves away
-        'SSS': s3, 'EEE': e3, 'WWW': w3, 'NNN': n3,
-        'ENN': n2.east, 'WNN': n2.west, 'ESS': s2.east, 'WSS': s2.west,
-        'SEE': e2.south, 'NEE': e2.north, 'SWW': w2.south, 'NWW': w2.north,
-        # 4 moves away
-        'NNNN': n4, 'SSSS': s4, 'WWWW': w4, 'EEEE': e4,
-        'EESS': e2.south.south, 'EENN': e2.north.north, 'WWNN': w2.north.north, 'WWSS': w2.south.south,
-        'WWWS': w3.south, 'EEES': e3.south, 'EEEN': e3.north, 'WWWN': w3.north,
-        'SSSW': s3.west, 'SSSE': s3.east, 'NNNE': n3.east, 'NNNW': n3.west,
-        # 5 moves away
-        'SSSSS': s5, 'NNNNN': n5, 'WWWWW': w5, 'EEEEE': e5,
-        'WWWWN': w4.north, 'WWWWS': w4.south, 'EEEEN': e4.north, 'EEEES': e4.south,
-        'SSSSE': s4.east, 'SSSSW': s4.west, 'NNNNW': n4.west, 'NNNNE': n4.east,
-        'EESSS': s3.east.east, 'WWSSS': s3.west.west, 'EENNN': n3.east.east, 'WWNNN': n3.west.west,
-        'EEESS': e3.south.south, 'EEENN': e3.north.north, 'WWWSS': w3.south.south, 'WWWNN': w3.north.north,
-        # 6 moves away
-        'SSSSSS': s6, 'NNNNNN': n6, 'WWWWWW': w6, 'EEEEEE': e6,
-        'WWWWWN': w5.north, 'WWWWWS': w5.south, 'EEEEEN': e5.north, 'EEEEES': e5.south,
-        'SSSSSE': s5.east, 'SSSSSW': s5.west, 'NNNNNW': n5.west, 'NNNNNE': n5.east,
-        'WWWWNN': w4.north.north, 'WWWWSS': w4.south.south, 'EEEENN': e4.north.north, 'EEEESS': e4.south.south,
-        'NNNNEE': n4.east.east, 'NNNNWW': n4.west.west, 'SSSSWW': s4.west.west, 'SSSSEE': s4.east.east,
-        'EEENNN': e3.north.north.north, 'EEESSS': e3.south.south.south, 'WWWNNN': w3.north.north.north, 'WWWSSS': w3.south.south.south,
-        # 7 moves away
-        'SSSSSSS': s7, 'NNNNNNN': n7, 'WWWWWWW': w7, 'EEEEEEE': e7,
-        'WWWWWWN': w6.north, 'WWWWWWS': w6.south, 'EEEEEEN': e6.north, 'EEEEEES': e6.south,
-        'SSSSSSE': s6.east, 'SSSSSSW': s6.west, 'NNNNNNW': n6.west, 'NNNNNNE': n6.east,
-        'WWWWWNN': w5.north.north, 'WWWWWSS': w5.south.south, 'EEEEENN': e5.north.north, 'EEEEESS': e5.south.south,
-        'NNNNNWW': n5.west.west, 'NNNNNEE': n5.east.east, 'SSSSSWW': s5.west.west, 'SSSSSEE': s5.east.east,
-        'EEEENNN': e4.north.north.north, 'EEEESSS': e4.south.south.south, 'WWWWNNN': w4.north.north.north, 'WWWWSSS': w4.south.south.south,
-        'NNNNEEE': n4.east.east.east, 'NNNNWWW': n4.west.west.west, 'SSSSWWW': s4.west.west.west, 'SSSSEEE': s4.east.east.east,
-        # 8 moves away
-        'SSSSSSSS': s8, 'NNNNNNNN': n8, 'WWWWWWWW': w8, 'EEEEEEEE': e8,
-        'WWWWWWWN': w7.north, 'WWWWWWWS': w7.south, 'EEEEEEEN': e7.north, 'EEEEEEES': e7.south,
-        'SSSSSSSE': s7.east, 'SSSSSSSW': s7.west, 'NNNNNNNW': n7.west, 'NNNNNNNE': n7.east,
-        'WWWWWWNN': w6.north.north, 'WWWWWWWSS': w6.south.south, 'EEEEEEENN': e6.north.north, 'EEEEEEESS': e6.south.south,
-        'NNNNNNWW': n6.west.west, 'NNNNNNEE': n6.east.east, 'SSSSSSWW': s6.west.west, 'SSSSSSEE': s6.west.west,
-        'NNNNNWWW': n5.west.west.west, 'NNNNNEEE': n5.east.east.east, 'SSSSSWWW': s5.west.west.west, 'SSSSSEEE':  s5.east.east.east,
-        'EEEEENNN': e5.north.north.north, 'EEEEESSS': e5.south.south.south, 'WWWWWNNN': w5.north.north.north, 'WWWWWSSS': w5.south.south.south,
-        'EEEENNNN': e4.north.north.north.north, 'WWWWNNNN': w4.north.north.north.north, 'EEEESSSS': e4.south.south.south.south, 'WWWWSSSS': w4.south.south.south.south,
-        # 9 moves away
-        'SSSSSSSSS': s9, 'NNNNNNNNN': n9, 'WWWWWWWWW': w9, 'EEEEEEEEE': e9,
-        'WWWWWWWWN': w8.north, 'WWWWWWWWS': w8.south, 'EEEEEEEEN': e8.north, 'EEEEEEEES': e8.south,
-        'SSSSSSSSE': s8.east, 'SSSSSSSSW': s8.west, 'NNNNNNNNW': n8.west, 'NNNNNNNNE': n8.east,
-        'NNNNNNNEE': n7.east.east, 'NNNNNNNWW': n7.west.west, 'SSSSSSSEE': s7.east.east, 'SSSSSSSWW': s7.west.west,
-        'EEEEEEENN': e7.north.north, 'EEEEEEESS': e7.south.south, 'WWWWWWWNN': w7.north.north, 'WWWWWWWSS': w7.south.south,
-        'NNNNNNWWW': n6.west.west.west, 'NNNNNNEEE': n6.east.east.east, 'SSSSSSWWW': s6.west.west.west, 'SSSSSSEEE': s6.east.east.east,
-        'EEEEEENNN': e6.north.north.north, 'EEEEEESSS': e6.south.south.south, 'WWWWWWNNN': w6.north.north.north, 'WWWWWWSSS': w6.south.south.south,
-        'NNNNNWWWW': n5.west.west.west.west, 'NNNNNEEEE': n5.east.east.east.east, 'SSSSSWWWW': s5.west.west.west.west, 'SSSSSEEEE':  s5.east.east.east.east,
-        'EEEEENNNN': e5.north.north.north.north, 'EEEEESSSS': e5.south.south.south.south, 'WWWWWNNNN': w5.north.north.north.north, 'WWWWWSSSS': w5.south.south.south.south,
-        # 10 moves away
-        'SSSSSSSSSS': s10, 'NNNNNNNNNN': n10, 'WWWWWWWWWW': w10, 'EEEEEEEEEE': e10,
-        'WWWWWWWWWN': w9.north, 'WWWWWWWWWS': w9.south, 'EEEEEEEEEN': e9.north, 'EEEEEEEEES': e9.south,
-        'SSSSSSSSSE': s9.east, 'SSSSSSSSSW': s9.west, 'NNNNNNNNNW': n9.west, 'NNNNNNNNNE': n9.east,
-        'NNNNNNNNEE': n8.east.east, 'SSSSSSSSEE': s8.east.east, 'NNNNNNNNWW': n8.west.west, 'SSSSSSSSWW': s8.west.west,
-        'EEEEEEEENN': e8.north.north, 'EEEEEEEESS': e8.south.south, 'WWWWWWWWNN': w8.north.north, 'WWWWWWWWNN': w8.north.north,
-        'WWWWWWWNNN': w7.north.north.north, 'WWWWWWWSSS': w7.south.south.south, 'EEEEEEESSS': e7.south.south.south, 'EEEEEEEWWW': e7.north.north.north,
-        'NNNNNNNWWW': n7.west.west.west, 'NNNNNNNEEE': n7.east.east.east, 'SSSSSSSWWW': s7.west.west.west, 'SSSSSSSEEE': s7.east.east.east,
-        'WWWWWWNNNN': w6.north.north.north.north, 'WWWWWWSSSS': w6.south.south.south.south, 'EEEEEENNNN': e6.north.north.north.north, 'EEEEEESSSS': e6.south.south.south.south,
-        'NNNNNNWWWW': n6.west.west.west.west, 'NNNNNNEEEE': n6.east.east.east.east, 'SSSSSSWWWW': s6.west.west.west.west, 'SSSSSSEEEE': s6.east.east.east.east,
-        'NNNNNWWWWW': n5.west.west.west.west.west, 'NNNNNEEEEE': n5.east.east.east.east.east, 'SSSSSWWWWW': s5.west.west.west.west.west, 'SSSSSEEEEE': s5.east.east.east.east.east
-    }
-
-
-def log(text, step=1):
-    if step == 0:
-        with open("log.txt", "w") as text_file:
-            text = str(text) + '\n'
-            text_file.write(text)
-    else:
-        with open("log.txt", "a") as text_file:
-            text = str(text) + '\n'
-            text_file.write(text)
-
-
-log('logs:', 0)
+def grid(index, size=21, radius=10):
+    """ Returns the direction keys and the flat indices of the cells which are in `radius` moves distance of the given flat index """
+    table = offset_table(radius, size)
+    return table.keys, table.gather(index)
+
+
+# The constants of the hyperparameter functions, tuner.py searches over them (every seat of a game loads its own copy)
+PARAMETERS = {'mining': 200, 'mining_step': 10, 'mining_late': 10, 'mining_near': 2500, 'mining_nearer': 10000,
+              'deposit': 5, 'deposit_scale': 10, 'deposit_cargo': 200, 'deposit_near_end': 100000, 'deposit_poor': 100,
+              'direction_encouragement': 80, 'direction_late': 100, 'get_away': -10, 'attack_enemy_ship': 100,
+              'distribution': -20, 'closest_shipyard': 1, 'conversion': 60, 'conversion_per_shipyard': 2,
+              'conversion_min': 5, 'assignment': 30, 'collision_risk': 0.15}
+# The step-only parts of the hyperparameters of every step, for the PARAMETERS they were built with
+_step_table = dict(PARAMETERS), [step_hyperparameters(step) for step in range(400)]
+
+# Lines are buffered during the turn and written when it ends, set the level to DEBUG to get every ship's weights
+logger = Logger('log.txt', INFO)
+# Every ship's weights and chosen action, give it a path (e.g. tracer = TraceWriter('game.trace')) to record a game
+tracer = TraceWriter()
+# Times the phases of every turn, set timer.enabled = True to log them per turn and summed over the game
+timer = PhaseTimer()
+# Shrinks the ships' grid when the turn runs out of time, it learns what a ship costs over the game
+budget = TurnBudget()
+# The distance fields of the shipyards, only searched again when the shipyards change
+fields = FieldCache()
+# Greedy by default, give it a BeamSearch (e.g. search = BeamSearch(fleet_options)) to look a few turns ahead
+search = None
+# Spawns and conversions follow the thresholds by default, give it an EconomySearch to decide them with a tree search
+economy = None
 
 movement_dictionary = {"S": "SOUTH", 'N': 'NORTH', 'W': 'WEST', 'E': 'EAST', 'convert': 'CONVERT'}
 
 import operator
 
+def fleet_hyperparameters(board, ship_ids, step, snapshot):
+    """ Returns ship_id: hyperparameters (and NEAR_END) of every ship, calculated for the whole fleet at once """
+    ships = [board.ships[ship_id] for ship_id in ship_ids]
+    position = np.array([snapshot.index(ship.position) for ship in ships], dtype=int)
+    field = fields.get(snapshot)
+    distance = field.moves[position] if field is not None else np.full(len(ships), 0.99)
+    player_halite = float(snapshot.player_halite[snapshot.me])
+    end = near_end(board, step, player_halite)
+    values = hyperparameters(step, np.array([ship.halite for ship in ships]), distance, snapshot.halite[position],
+                             end, player_halite, len(snapshot.my_shipyards()))
+    values['NEAR_END'] = end
+    columns = {name: value.tolist() if isinstance(value, np.ndarray) else [value] * len(ships) for name, value in values.items()}
+    return {ship_id: dict(zip(columns, row)) for ship_id, row in zip(ship_ids, zip(*columns.values()))}
+
+def weigh_fleet(board, ship_ids, step, snapshot, radius=10, targets=None):
+    """
+        Builds the DecisionShip of each of the given ships and weights all of them at once, None as radius skips them
+        targets: ship_id: target of FleetTargets, the ships missing from it get none
+    """
+    if radius is None:
+        return {}
+    targets = {} if targets is None else targets
+    ship_ids = [ship_id for ship_id in ship_ids if ship_id in board.ships]
+    with timer.phase('deciders'):
+        coefficients = fleet_hyperparameters(board, ship_ids, step, snapshot)
+        deciders = {ship_id: DecisionShip(board, ship_id, step, snapshot, radius, targets.get(ship_id), coefficients[ship_id])
+                    for ship_id in ship_ids}
+    FleetDecisions(snapshot, list(deciders.values())).weight_moves()
+    return deciders
+
+def fleet_options(board, radius=10):
+    """ Returns ship_id: [(action, weight)] best first of the current player's ships on the board, BeamSearch's evaluation """
+    snapshot = BoardSnapshot(board)
+    ships = [ship.id for ship in sorted(board.current_player.ships, key=operator.attrgetter("halite"), reverse=True)]
+    targets = FleetTargets(snapshot, fields.get(snapshot), board.configuration.episode_steps - board.step).targets
+    deciders = weigh_fleet(board, ships, board.step, snapshot, radius, targets)
+    return {ship_id: [(action, decider.weights.get(action, 0.)) for action in decider.ranked()]
+            for ship_id, decider in deciders.items()}
+
 def agent(obs, config):
+    # The clock of the turn starts before anything else
+    budget.start_turn(obs, config)
+    timer.start_turn()
     # Another for updates
-    board = Board(obs, config)
+    with timer.phase('board'):
+        board = Board(obs, config)
 
     # Step of the board
     step = board.observation['step']
+    # A new game starts a new log
+    if step == 0:
+        logger.reset()
+        tracer.reset()
+        timer.reset()
 
-    ships = [ship.id for ship in sorted(board.current_player.ships, key=operator.attrgetter("halite"), reverse=True)]
+    with timer.phase('sort'):
+        ships = [ship.id for ship in sorted(board.current_player.ships, key=operator.attrgetter("halite"), reverse=True)]
     actions = {}
 
+    # Dense copy of the board that every decision reads from, the fleet is weighted against it in one go
+    # and the overlay applies the chosen actions to it
+    with timer.phase('snapshot'):
+        snapshot = BoardSnapshot(board)
+        overlay = TurnOverlay(snapshot, board.configuration.convert_cost, board.configuration.spawn_cost)
+    # Where the enemy ships may go, every ship looks it up
+    with timer.phase('enemy_moves'):
+        snapshot.enemy_moves()
+    # The tree search of my spawns and conversions adds one of them to the thresholds' when its playouts prefer it
+    economic = None
+    if economy is not None:
+        with timer.phase('economy'):
+            local = LocalBoard(obs, config)
+            economic = economy.decide(local, budget.remaining() / 4)
+            player = local.observation['players'][local.current_player_id]
+            candidate = convert_candidate(player, local.configuration.size, local.configuration.convert_cost) \
+                if economic == 'convert' else None
+        logger.info(' Economy: %s, %s', economic, economy.stats)
+    # Every ship gets its own cell to mine, shipyard to deposit in or enemy to hunt, once for the turn
+    with timer.phase('assignment'):
+        targets = FleetTargets(snapshot, fields.get(snapshot), board.configuration.episode_steps - step).targets
+    # A ship's cost includes its share of weighting the fleet, without time for a search they follow a cheap rule
+    budget.mark()
+    radius = budget.radius(len(ships))
+    if radius != budget.RADII[0]:
+        logger.info(' Time pressure: %.2fs left, %s ships with radius %s', budget.remaining(), len(ships), radius)
+    deciders = weigh_fleet(board, ships, step, snapshot, radius, targets)
+
     # It would be absurd to log when I am out of the game
-    log(str(step + 1) + '|-----------------------------------------------------------------------')
-    log(' Halite: ' + str(board.current_player.halite) + ', n_ships:' + str(len(board.current_player.ships)) + ' ,n_yards: ' + str(len(board.current_player.shipyards)))
+    logger.info('%s|-----------------------------------------------------------------------', step + 1)
+    logger.info(' Halite: %s, n_ships:%s ,n_yards: %s', board.current_player.halite, len(board.current_player.ships), len(board.current_player.shipyards))
+
+    # Every ship ranks its actions, then they get their cells all at once: a ship can follow another one out of
+    # its cell and the last ships aren't boxed in by the first ones
+    matching = CellMatching()
+    my_shipyards = set(snapshot.shipyard_pos[snapshot.my_shipyards()].tolist())
+    chosen, options_of = {}, {}
+    # The whole fleet was weighted before any ship converted, the conversions are paid for here instead: the halite
+    # left has to cover each of them and a turn adds one shipyard at most
+    halite, new_shipyards = float(snapshot.player_halite[snapshot.me]), 0
     for ship_id in ships:
-        if ship_id in board.current_player.ship_ids:
-            log(' Pos:' + str(board.ships[ship_id].position) + ', cargo: ' + str(board.ships[ship_id].halite) + ', player halite: ' + str(board.current_player.halite))
-                
-            next_action, action_type = DecisionShip(board, ship_id, step).determine()
-                
+        logger.debug(' Pos:%s, cargo: %s, player halite: %s', board.ships[ship_id].position, board.ships[ship_id].halite, board.current_player.halite)
+        decider = deciders.get(ship_id)
+        ranked = decider.ranked() if decider else [cheap_action(snapshot, overlay, ship_id, fields.get(snapshot))]
+        if economic == 'convert' and ship_id == candidate:
+            ranked = ['convert'] + [action for action in ranked if action != 'convert']
+        cargo = board.ships[ship_id].halite
+        if new_shipyards or halite + cargo < board.configuration.convert_cost:
+            ranked = [action for action in ranked if action != 'convert'] or ['mine']
+        budget.ship_done(decider.radius if decider else None)
+
+        with timer.phase('matching'):
+            # Staying is the last resort, even when it was eliminated
+            options = [(action, overlay.destination(ship_id, action)) for action in ranked + ['mine'] * ('mine' not in ranked)]
+            # At the end my ships may pile up on my shipyards, the cargo gets deposited anyway
+            if decider and decider.NEAR_END:
+                options = [(action, None if cell in my_shipyards else cell) for action, cell in options]
+            chosen[ship_id] = matching.add(ship_id, options)
+            if chosen[ship_id] is None:
+                logger.info(' No free cell for %s, it takes its best action', ship_id)
+                chosen[ship_id] = ranked[0]
+            if chosen[ship_id] == 'convert':
+                halite, new_shipyards = halite + cargo - board.configuration.convert_cost, new_shipyards + 1
+            elif 'convert' in ranked:
+                # A later ship may push it down its list, never onto a conversion nobody paid for
+                matching.drop(ship_id, 'convert')
+                ranked = [action for action in ranked if action != 'convert']
+        options_of[ship_id] = [(action, decider.weights.get(action, 0.) if decider else 0.) for action in ranked]
+
+    # Later ships may have pushed earlier ones down their lists
+    chosen.update(matching.actions())
+
+    # The search keeps the first move of its best plan, the greedy actions stay when it found none in time
+    if search is not None and ships:
+        with timer.phase('search'):
+            planned = search.run(LocalBoard(obs, config), options_of, chosen, budget.remaining() / 2)
+        logger.info(' Search: %s', search.stats)
+        if planned:
+            chosen.update(planned)
+            # The spawns need the cells of the plan
+            matching = CellMatching()
+            for ship_id in ships:
+                matching.add(ship_id, [(chosen[ship_id], overlay.destination(ship_id, chosen[ship_id]))], push=False)
+    with timer.phase('commit'):
+        for ship_id in ships:
+            action_type, decider = chosen[ship_id], deciders.get(ship_id)
+            tracer.add(step, board.current_player.id, ship_id, board.ships[ship_id].position, board.ships[ship_id].halite,
+                       snapshot.player_halite[snapshot.me], decider.weights if decider else {}, action_type, decider)
             if action_type != 'mine':
                 actions[ship_id] = movement_dictionary[action_type]
-                board.ships[ship_id].next_action = next_action
-                
-                if action_type != 'convert':
-                    board.ships[ship_id].position = 
-                board = board.next()
+                board.ships[ship_id].next_action = ShipAction[movement_dictionary[action_type]]
+                overlay.commit(ship_id, action_type)
 
-    shipyard_ids = ShipyardDecisions(board, board.current_player, step).determine()
+    with timer.phase('shipyards'):
+        shipyard_ids = ShipyardDecisions(board, board.current_player, step, snapshot).determine()
+        if economic == 'spawn':
+            shipyard_ids = shipyard_ids or [spawn_yard(player)]
 
     for shipyard_id in board.current_player.shipyard_ids:
-        if shipyard_id in shipyard_ids:
+        # The new ship needs the shipyard's cell to itself
+        position = int(snapshot.shipyard_pos[snapshot.shipyard_lookup[shipyard_id]])
+        if shipyard_id in shipyard_ids and matching.add(shipyard_id, [('spawn', position)], push=False):
             actions[shipyard_id] = 'SPAWN'
             board.shipyards[shipyard_id].next_action = ShipyardAction.SPAWN
-            
-            board = board.next()
-        
+            overlay.commit(shipyard_id, 'spawn')
+
+    timer.end_turn(step)
+    if timer.enabled:
+        logger.info(timer.turn_summary())
+        if step == board.configuration.episode_steps - 2:
+            logger.info(timer.summary())
+    logger.flush()
+    tracer.flush()
     return actions
@@ -0,0 +1,76 @@
+from functools import lru_cache
+import numpy as np
+
+# The rows of OffsetTable.projection
+DIRECTIONS = ('N', 'E', 'W', 'S')
+
+
+class OffsetTable:
+    """
+        Every cell within `radius` moves of a cell on a `size` x `size` torus, generated instead of written by hand
+        params:
+            radius: the maximum number of moves
+            size: the board size
+        Cells are ordered by the number of moves it takes to reach them, each one has:
+            keys: the direction string (e.g. 'NNE'), same format grid() used
+            dx, dy: offset of the cell, east and north being positive
+            dirX, dirY: 'E'/'W' and 'N'/'S', 'None' when there is no movement on that axis
+            movesX, movesY, moves: number of moves along each axis and in total
+            weightX, weightY: 1 / (moves ** 2 * movesX/Y), the factors add_accordingly spreads a value with
+        projection: 4 x cells matrix (rows in DIRECTIONS order) of the same factors, weightX in the dirX row and weightY
+            in the dirY row, so projection @ values spreads a value per cell over the four directions at once
+    """
+    def __init__(self, radius=10, size=21):
+        self.radius = radius
+        self.size = size
+
+        offsets = []
+        for moves in range(1, radius + 1):
+            # Straight lines first, then the rest of the diamond's ring
+            offsets += [(0, moves), (0, -moves), (-moves, 0), (moves, 0)]
+            offsets += [(dx, dy) for dx in range(-moves + 1, moves) for dy in (moves - abs(dx), abs(dx) - moves) if dx != 0]
+
+        self.dx = np.array([dx for dx, _ in offsets], dtype=int)
+        self.dy = np.array([dy for _, dy in offsets], dtype=int)
+        self.movesX, self.movesY = np.abs(self.dx), np.abs(self.dy)
+        self.moves = self.movesX + self.movesY
+
+        self.dirX = ['E' if dx > 0 else 'W' if dx < 0 else 'None' for dx, _ in offsets]
+        self.dirY = ['N' if dy > 0 else 'S' if dy < 0 else 'None' for _, dy in offsets]
+        self.keys = [(dirY * abs(dy) if dy else '') + (dirX * abs(dx) if dx else '')
+                     for (dx, dy), dirX, dirY in zip(offsets, self.dirX, self.dirY)]
+        self.lookup = {key: n for n, key in enumerate(self.keys)}
+
+        with np.errstate(divide='ignore'):
+            self.weightX = np.where(self.movesX > 0, 1 / (self.moves ** 2 * self.movesX), 0.)
+            self.weightY = np.where(self.movesY > 0, 1 / (self.moves ** 2 * self.movesY), 0.)
+        self.projection = np.array([np.where(np.array(self.dirY) == direction, self.weightY, 0.) +
+                                    np.where(np.array(self.dirX) == direction, self.weightX, 0.) for direction in DIRECTIONS])
+
+        # Flat (Point.to_index) offsets, rows grow southward so north is a negative row offset
+        self.drow = -self.dy
+
+    def __len__(self):
+        return len(self.keys)
+
+    def gather(self, index):
+        """ Returns the flat indices of the cells around the flat index (or an array of indices, one row each) """
+        index = np.asarray(index)
+        row, col = np.divmod(index, self.size)
+        rows = (row[..., None] + self.drow) % self.size
+        cols = (col[..., None] + self.dx) % self.size
+        return rows * self.size + cols
+
+    def within(self, moves):
+        """ Returns the number of leading cells that are at most `moves` away """
+        return int(np.searchsorted(self.moves, moves, side='right'))
+
+
+@lru_cache(maxsize=None)
+def offset_table(radius=10, size=21):
+    """ Returns the OffsetTable for the given radius and board size, each one is only built once """
+    return OffsetTable(radius, size)
+
+
+# The default board is built at import
+offset_table()
@@ -0,0 +1,82 @@
+from snapshot import Position
+
+
+class TurnOverlay:
+    """
+        The actions committed earlier in the turn, applied in place on the BoardSnapshot instead of simulating
+        the whole board with board.next() after every one of them
+        params:
+            snapshot: the BoardSnapshot of the turn, it is updated as the actions get committed
+            convert_cost, spawn_cost: the costs of the configuration
+        Keeps:
+            pending: id: action ('N', 'S', 'W', 'E', 'convert' or 'spawn') of every committed ship/shipyard
+            reserved: flat indices of the cells my ships will be on at the end of the turn
+            cargo: id: projected cargo of every ship that committed a move
+        Only the committed objects change, nobody mines and halite does not regenerate: later ships see where the
+        earlier ones are going, what they deposit and which cells became shipyards.
+    """
+    # (dx, dy) of each move, north being y + 1 like Point
+    offsets = {'N': (0, 1), 'S': (0, -1), 'E': (1, 0), 'W': (-1, 0)}
+
+    def __init__(self, snapshot, convert_cost=500, spawn_cost=500):
+        self.snapshot = snapshot
+        self.convert_cost = convert_cost
+        self.spawn_cost = spawn_cost
+        self.pending = {}
+        self.reserved = set()
+        self.cargo = {}
+
+    def commit(self, object_id, action):
+        """ Applies a ship's move/convert or a shipyard's spawn """
+        if action in self.offsets:
+            self.move(object_id, action)
+        elif action == 'convert':
+            self.convert(object_id)
+        elif action == 'spawn':
+            self.spawn(object_id)
+
+    def destination(self, ship_id, action):
+        """ Returns the flat index of the cell the ship ends the turn on with the action, None when it converts """
+        snapshot, size = self.snapshot, self.snapshot.size
+        origin = int(snapshot.ship_pos[snapshot.ship_lookup[ship_id]])
+        if action == 'convert':
+            return None
+        if action not in self.offsets:
+            return origin
+        dx, dy = self.offsets[action]
+        return snapshot.index(Position(int(snapshot.x[origin] + dx) % size, int(snapshot.y[origin] + dy) % size))
+
+    def move(self, ship_id, direction):
+        """ Moves the ship one cell, it deposits right away when it arrives on one of my shipyards """
+        snapshot = self.snapshot
+        ship_index = snapshot.ship_lookup[ship_id]
+        target = self.destination(ship_id, direction)
+
+        cargo = float(snapshot.ship_halite[ship_index])
+        if snapshot.shipyard_owner[target] == snapshot.ship_player[ship_index]:
+            snapshot.player_halite[snapshot.ship_player[ship_index]] += cargo
+            cargo = 0.
+
+        snapshot.move_ship(ship_index, target, cargo)
+        self.pending[ship_id], self.cargo[ship_id] = direction, cargo
+        self.reserved.add(target)
+
+    def convert(self, ship_id):
+        """ Turns the ship into a shipyard, the ship's id stands for the shipyard's until the next turn """
+        snapshot = self.snapshot
+        ship_index = snapshot.ship_lookup[ship_id]
+        position, player = int(snapshot.ship_pos[ship_index]), int(snapshot.ship_player[ship_index])
+
+        # The cargo pays for the conversion first
+        snapshot.player_halite[player] += snapshot.ship_halite[ship_index] - self.convert_cost
+        snapshot.remove_ship(ship_index)
+        snapshot.add_shipyard(ship_id, position, player)
+        self.pending[ship_id] = 'convert'
+
+    def spawn(self, shipyard_id):
+        """ Spawns a ship on the shipyard """
+        snapshot = self.snapshot
+        shipyard_index = snapshot.shipyard_lookup[shipyard_id]
+        snapshot.player_halite[snapshot.shipyard_player[shipyard_index]] -= self.spawn_cost
+        self.pending[shipyard_id] = 'spawn'
+        self.reserved.add(int(snapshot.shipyard_pos[shipyard_index]))
@@ -0,0 +1,79 @@
+import numpy as np
+from offsets import offset_table, DIRECTIONS
+
+
+class EnemyMoves:
+    """
+        Where every enemy ship may be at the end of the turn, guessed for all of them at once
+        params:
+            snapshot: the BoardSnapshot of the turn, the ships not owned by snapshot.me are the enemy ships
+            temperature: how sure an enemy ship is of its best move (halite), the scores go through a softmax of it
+            ship_value: what losing a ship is worth to its owner (halite), a spawn
+        Every enemy ship scores its five moves (N, E, W, S then staying, like FleetDecisions.columns) in halite:
+            staying mines a quarter of its cell, moving is worth half of what it could mine on the next cell
+            its own shipyard is worth its cargo, an enemy one costs it the ship
+            a cell that a ship of another player with less cargo is on or next to costs it the ship and its cargo
+            a ship of another player with more cargo on the cell is worth half that cargo
+        Keeps:
+            around: flat index x the five moves, the cell each move leads to
+            probability: one row per enemy ship (its index in ship_ids in `ships`), the chance of each of its moves
+            arrival, cargo: flat index x the five moves, the chance that the enemy ship that would arrive on the cell
+                with that move does, and its cargo (0 and inf where no ship could)
+            occupancy: flat index, the chance that an enemy ship ends the turn on the cell
+        Lookups are one row of arrival/cargo per cell, no enemy ship is looked at again when a ship asks.
+    """
+    moves = list(DIRECTIONS) + ['mine']
+
+    def __init__(self, snapshot, temperature=50., ship_value=500.):
+        size, me = snapshot.size, snapshot.me
+        table = offset_table(1, size)
+        # The cell itself after its four neighbours, in the order of moves
+        steps = [table.lookup[direction] for direction in DIRECTIONS]
+        cells = np.arange(size * size)
+        self.around = around = np.hstack([table.gather(cells)[:, steps], cells[:, None]])
+
+        self.ships = np.flatnonzero(snapshot.ship_player != me)
+        position, player = snapshot.ship_pos[self.ships], snapshot.ship_player[self.ships]
+        own_cargo = snapshot.ship_halite[self.ships][:, None]
+        destination = around[position]
+
+        # The lightest ship of every player on or next to each cell
+        players = int(max(snapshot.ship_player.max(initial=-1), snapshot.shipyard_player.max(initial=-1), me)) + 1
+        lightest = np.full((players, size * size), np.inf)
+        np.minimum.at(lightest, (snapshot.ship_player, snapshot.ship_pos), snapshot.ship_halite)
+        lightest = lightest[:, around].min(axis=2)
+        # Then the lightest of the other players' for every enemy ship
+        others = np.where(np.arange(players)[None, :] == player[:, None], np.inf, 0.)
+        threat = (lightest[None, :, :] + others[:, :, None]).min(axis=1)[np.arange(len(self.ships))[:, None], destination]
+
+        score = 0.125 * snapshot.halite[destination]
+        score[:, 4] *= 2
+        yard = snapshot.shipyard_owner[destination]
+        score += np.where(yard == player[:, None], own_cargo, 0.)
+        score -= np.where((yard != -1) & (yard != player[:, None]), ship_value, 0.)
+        score -= np.where(threat < own_cargo, own_cargo + ship_value, 0.)
+        prey = (snapshot.ship_owner[destination] != -1) & (snapshot.ship_owner[destination] != player[:, None])
+        score += np.where(prey & (snapshot.ship_cargo[destination] > own_cargo), 0.5 * snapshot.ship_cargo[destination], 0.)
+
+        score = (score - score.max(axis=1, keepdims=True)) / temperature
+        self.probability = np.exp(score) / np.exp(score).sum(axis=1, keepdims=True)
+
+        # A ship arriving on a cell with a move came from one cell only, so (cell, move) holds at most one ship
+        self.arrival = np.zeros((size * size, len(self.moves)))
+        self.cargo = np.full((size * size, len(self.moves)), np.inf)
+        columns = np.broadcast_to(np.arange(len(self.moves)), destination.shape)
+        self.arrival[destination, columns] = self.probability
+        self.cargo[destination, columns] = own_cargo
+        self.occupancy = 1 - np.prod(1 - self.arrival, axis=1)
+
+    def risk(self, cells, cargo):
+        """ Returns the chance that an enemy ship with no more cargo than `cargo` ends the turn on each of the cells """
+        cargo = np.asarray(cargo)[..., None]
+        return 1 - np.prod(1 - np.where(self.cargo[cells] <= cargo, self.arrival[cells], 0.), axis=-1)
+
+    def prey(self, cells, cargo):
+        """ Returns the expected cargo difference + 1 of the enemy ships with more cargo ending the turn on each of the cells """
+        cargo = np.asarray(cargo)[..., None]
+        enemy_cargo = self.cargo[cells]
+        heavier = np.isfinite(enemy_cargo) & (enemy_cargo > cargo)
+        return (self.arrival[cells] * np.where(heavier, enemy_cargo - cargo + 1, 0.)).sum(axis=-1)
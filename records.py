@@ -0,0 +1,89 @@
+import numpy as np
+
+
+class Record:
+    """
+        Light row of a Records table, the fields are read either as row.field or row['field']
+        Subclasses only have to list their fields in __slots__
+    """
+    __slots__ = ()
+
+    def __init__(self, *values):
+        for field, value in zip(self.__slots__, values):
+            setattr(self, field, value)
+
+    def __getitem__(self, field):
+        return getattr(self, field)
+
+    def __repr__(self):
+        return type(self).__name__ + '(' + ', '.join(field + '=' + repr(getattr(self, field)) for field in self.__slots__) + ')'
+
+
+class ShipRecord(Record):
+    __slots__ = ('my_ship', 'moves', 'position', 'cargo', 'dirX', 'dirY', 'movesX', 'movesY')
+
+
+class ShipyardRecord(Record):
+    __slots__ = ('my_shipyard', 'position', 'dirX', 'dirY', 'player_halite', 'movesX', 'movesY', 'moves')
+
+
+class CellRecord(Record):
+    __slots__ = ('ship_id', 'shipyard_id', 'my_ship', 'my_shipyard', 'halite', 'moves',
+                 'movesX', 'movesY', 'dirY', 'dirX', 'weightX', 'weightY')
+
+
+class Records:
+    """
+        Column-wise table keyed by id, what Locator returns instead of the DataFrames it used to build
+        params:
+            record: the Record class rows are returned as
+            ids: id of each row
+            columns: dictionary of field: values (list or NumPy array), one value per id
+        Rows are only built when they are asked for: records[id] returns the record of that id,
+        where() and idxmin() query the whole columns at once.
+    """
+    def __init__(self, record, ids, columns):
+        self.record = record
+        self.ids = list(ids)
+        self.lookup = {id_: n for n, id_ in enumerate(self.ids)}
+        self.columns = columns
+        # Python values for the rows, so the weights never end up with NumPy scalars
+        self.values = [columns[field].tolist() if isinstance(columns[field], np.ndarray) else list(columns[field])
+                       for field in record.__slots__]
+        self.rows = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, id_):
+        return id_ in self.lookup
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __getitem__(self, id_):
+        row = self.rows.get(id_)
+        if row is None:
+            n = self.lookup[id_]
+            row = self.rows[id_] = self.record(*[values[n] for values in self.values])
+        return row
+
+    @property
+    def empty(self):
+        return len(self.ids) == 0
+
+    def items(self):
+        """ Iterates through (id, record) pairs in order """
+        for id_ in self.ids:
+            yield id_, self[id_]
+
+    def where(self, field, value):
+        """ Returns the records whose field equals value """
+        keep = np.flatnonzero(np.asarray(self.columns[field]) == value)
+        columns = {name: [column[n] for n in keep] if isinstance(column, list) else column[keep]
+                   for name, column in self.columns.items()}
+        return Records(self.record, [self.ids[n] for n in keep], columns)
+
+    def idxmin(self, field):
+        """ Returns the id with the lowest value of the field, the first one on ties """
+        return self.ids[int(np.argmin(self.columns[field]))]
@@ -0,0 +1,66 @@
+import numpy as np
+from offsets import offset_table
+
+
+class DistanceField:
+    """
+        The way from every cell of the board to the closest of a set of shipyards, by a multi-source breadth-first search
+        params:
+            positions: flat positions (Point.to_index) of the shipyards, on ties the first one is the closest
+            size: the board size
+        Keeps one entry per flat index, like obs['halite']:
+            moves: moves to the closest shipyard (0 on a shipyard)
+            nearest: index in positions of the closest shipyard, target: its flat position
+            dx, dy: the shortest offset around the torus to it, east and north being positive (same as DistanceMatrix)
+            step: the best first move toward it ('N', 'E', 'W' or 'S', along the longer axis first), '' on a shipyard
+    """
+    def __init__(self, positions, size=21):
+        self.positions = positions = np.asarray(positions, dtype=int)
+        self.size = size
+        cells = size * size
+        # Neighbours of every cell (N, S, W, E)
+        neighbours = offset_table(1, size).gather(np.arange(cells))
+
+        self.moves, self.nearest = np.full(cells, -1), np.full(cells, -1)
+        self.moves[positions], self.nearest[positions] = 0, np.arange(len(positions))
+        frontier, moves = positions, 0
+        while len(frontier):
+            moves += 1
+            reached = neighbours[frontier].ravel()
+            labels = np.repeat(self.nearest[frontier], neighbours.shape[1])
+            new = self.moves[reached] == -1
+            reached, labels = reached[new], labels[new]
+            # A cell reached from several shipyards at once goes to the first one
+            order = np.lexsort((labels, reached))
+            reached, labels = reached[order], labels[order]
+            first = np.concatenate([[True], reached[1:] != reached[:-1]])[:len(reached)]
+            frontier = reached[first]
+            self.moves[frontier], self.nearest[frontier] = moves, labels[first]
+
+        self.target = positions[self.nearest]
+        half, x, y = size // 2, np.arange(cells) % size, size - 1 - np.arange(cells) // size
+        self.dx = (x[self.target] - x + half) % size - half
+        self.dy = (y[self.target] - y + half) % size - half
+        vertical = np.where(self.dy > 0, 'N', 'S')
+        horizontal = np.where(self.dx > 0, 'E', 'W')
+        self.step = np.where(self.moves == 0, '', np.where(np.abs(self.dy) >= np.abs(self.dx), vertical, horizontal))
+
+
+class FieldCache:
+    """
+        The DistanceField of each player's shipyards, kept from one turn to the next
+        A player's field is only searched again when its shipyards (or their order) changed since the last time.
+    """
+    def __init__(self):
+        self.fields = {}
+
+    def get(self, snapshot, player=None):
+        """ Returns the DistanceField of the player's shipyards (the current player by default), None without shipyards """
+        player = snapshot.me if player is None else player
+        positions = snapshot.shipyard_pos[snapshot.shipyard_player == player]
+        if len(positions) == 0:
+            return None
+        key = (snapshot.size, tuple(positions.tolist()))
+        if player not in self.fields or self.fields[player][0] != key:
+            self.fields[player] = key, DistanceField(positions, snapshot.size)
+        return self.fields[player][1]
@@ -0,0 +1,177 @@
+import argparse
+import importlib.util
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from multiprocessing import Pool
+
+from engine import Game
+from logger import Logger, ERROR
+from decision_trace import TraceWriter
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# The agents that can take a seat, by name
+AGENTS = {'current': os.path.join(ROOT, 'current.py'),
+          'mod': os.path.join(ROOT, 'mod.py'),
+          **{'agent_' + letter: os.path.join(ROOT, 'agents', 'agent_%s.py' % letter) for letter in 'abcde'}}
+
+# Modules loaded by the worker, (name, seat): module
+_modules = {}
+_options = {}
+
+
+def load_agent(name, seat):
+    """
+        Returns the module of an agent, loaded once per worker and seat
+        Every seat gets its own copy so an agent playing itself doesn't share its module state (logger, tracer...)
+    """
+    key = (name, seat)
+    if key not in _modules:
+        path = AGENTS[name]
+        # The agents import the root modules like kaggle_environments lets them
+        for directory in (ROOT, os.path.dirname(path)):
+            if directory not in sys.path:
+                sys.path.append(directory)
+        spec = importlib.util.spec_from_file_location('%s_seat%s' % (name, seat), path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        # Quiet unless asked otherwise, the files still get reset at the first step
+        if not _options.get('verbose') and isinstance(getattr(module, 'logger', None), Logger):
+            module.logger.level = ERROR + 1
+        _modules[key] = module
+    return _modules[key]
+
+
+def _init_worker(options):
+    """ Runs once per worker: the agents' log files go to the worker's own directory """
+    _options.update(options)
+    os.chdir(tempfile.mkdtemp(prefix='halite-worker-'))
+    # The agents fall back on the engine's Board, it plays the same games as the helpers' one in a fraction of the time
+    if not options.get('helpers'):
+        sys.modules['kaggle_environments'] = None
+    for name in options['agents']:
+        for seat in range(4):
+            load_agent(name, seat)
+
+
+def play(job):
+    """ Plays one game, job being (game, seed, names of the agents in seat order), errors holds the crashed seats' tracebacks """
+    game_index, seed, seats = job
+    modules = [load_agent(name, seat) for seat, name in enumerate(seats)]
+
+    traces = _options.get('traces')
+    for seat, module in enumerate(modules):
+        if isinstance(getattr(module, 'tracer', None), TraceWriter):
+            module.tracer = TraceWriter(os.path.join(traces, 'game%s-seat%s.trace' % (game_index, seat))
+                                        if traces else None)
+
+    start = time.perf_counter()
+    game = Game([module.agent for module in modules], {'episodeSteps': _options.get('steps', 400)}, seed)
+    rewards = game.run()
+    return {'game': game_index, 'seed': seed, 'seats': list(seats), 'rewards': rewards,
+            'statuses': game.statuses, 'errors': game.errors, 'steps': game.board.step, 'seconds': round(time.perf_counter() - start, 2)}
+
+
+def schedule(names, games, seed=0):
+    """
+        Returns the (game, seed, seats) of every game
+        Each game draws four agents (the same agent can take several seats when there are less than four names)
+        and shuffles their seats, every game is played on a different map.
+    """
+    rng = random.Random(seed)
+    jobs = []
+    for game_index in range(games):
+        seats = rng.sample(names, 4) if len(names) >= 4 else [rng.choice(names) for _ in range(4)]
+        jobs.append((game_index, rng.randrange((1 << 31) - 1), seats))
+    return jobs
+
+
+def summarize(results):
+    """ Returns name: {games, mean halite, mean rank (1 is the best), wins} over the results """
+    stats = defaultdict(lambda: {'games': 0, 'halite': 0., 'rank': 0., 'wins': 0})
+    for result in results:
+        rewards = result['rewards']
+        for seat, name in enumerate(result['seats']):
+            # Ties share the better rank
+            rank = 1 + sum(reward > rewards[seat] for reward in rewards)
+            stats[name]['games'] += 1
+            stats[name]['halite'] += rewards[seat]
+            stats[name]['rank'] += rank
+            stats[name]['wins'] += rank == 1
+
+    return {name: {'games': stat['games'], 'halite': round(stat['halite'] / stat['games'], 1),
+                   'rank': round(stat['rank'] / stat['games'], 2), 'wins': stat['wins']}
+            for name, stat in sorted(stats.items(), key=lambda item: item[1]['rank'] / item[1]['games'])}
+
+
+def run(names, games, processes=None, steps=400, seed=0, out=None, traces=None, verbose=False, helpers=False):
+    """
+        Plays the games over a pool of processes and returns their results
+        params:
+            names: the agents (keys of AGENTS) to draw the seats from
+            games: the number of games
+            processes: the size of the pool, every core by default
+            steps: the length of the games
+            seed: the seed of the schedule, the same seed plays the same games
+            out: JSON lines file every result is appended to as soon as its game ends
+            traces: directory of the decision traces of the agents that have a tracer, None records nothing
+            verbose: keep the agents' logs (in the workers' temporary directories)
+            helpers: let the agents use kaggle_environments' Board when it is installed
+    """
+    options = {'agents': names, 'steps': steps, 'verbose': verbose, 'helpers': helpers,
+               'traces': os.path.abspath(traces) if traces else None}
+    if traces:
+        os.makedirs(traces, exist_ok=True)
+
+    results = []
+    out_file = open(out, 'a') if out else None
+    try:
+        with Pool(processes, initializer=_init_worker, initargs=(options,)) as pool:
+            for result in pool.imap_unordered(play, schedule(names, games, seed)):
+                results.append(result)
+                if out_file:
+                    out_file.write(json.dumps(result) + '\n')
+                    out_file.flush()
+    finally:
+        if out_file:
+            out_file.close()
+    return sorted(results, key=lambda result: result['game'])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Plays 4 player games between the agents on the local engine')
+    parser.add_argument('agents', nargs='*', metavar='agent',
+                        help='agents to draw the seats from: %s (all of them by default)' % ', '.join(AGENTS))
+    parser.add_argument('-n', '--games', type=int, default=100)
+    parser.add_argument('-p', '--processes', type=int, default=None, help='every core by default')
+    parser.add_argument('--steps', type=int, default=400)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', help='JSON lines file the results get appended to')
+    parser.add_argument('--traces', help='directory for the decision traces')
+    parser.add_argument('-v', '--verbose', action='store_true', help="keep the agents' logs")
+    parser.add_argument('--helpers', action='store_true', help="agents use kaggle_environments' Board when installed")
+    args = parser.parse_args()
+    unknown = [name for name in args.agents if name not in AGENTS]
+    if unknown:
+        parser.error('unknown agents: %s' % ', '.join(unknown))
+    names = args.agents or list(AGENTS)
+
+    start = time.perf_counter()
+    results = run(names, args.games, args.processes, args.steps, args.seed, args.out, args.traces, args.verbose,
+                  args.helpers)
+    elapsed = time.perf_counter() - start
+
+    print('%s games in %.0fs (%.0f games/hour)' % (len(results), elapsed, len(results) * 3600 / elapsed))
+    print('%-10s %6s %9s %6s %5s' % ('agent', 'games', 'halite', 'rank', 'wins'))
+    for name, stat in summarize(results).items():
+        print('%-10s %6s %9s %6s %5s' % (name, stat['games'], stat['halite'], stat['rank'], stat['wins']))
+    # A crashed seat scores like a weak one, so the crashes are shown rather than only counted in the ranks
+    for result in results:
+        for name, error in zip(result['seats'], result['errors']):
+            if error:
+                print('\ngame %s: %s crashed\n%s' % (result['game'], name, error.rstrip()), file=sys.stderr)
@@ -0,0 +1,123 @@
+import time
+from engine import ShipAction
+from matching import CellMatching
+from offsets import offset_table
+
+
+class BeamSearch:
+    """
+        Looks a few turns ahead over the joint moves of my fleet, keeping the best plans of every turn (a beam)
+        params:
+            evaluate: board: ship_id: [(action, weight)] best first of the current player's ships on the board, the
+                weights being the ones weight_moves gives (mod.fleet_options)
+            depth: how many turns a plan looks ahead
+            width: how many plans are kept after every turn
+            branching: how many ships take their second best action instead of their best in the children of a plan,
+                the ones whose two best weights are the closest
+            discount: what the weights of a turn are worth compared to the turn before
+            time_limit: seconds the search may take in a turn, it stops as soon as it is over
+            clock: the clock the time is measured with
+        A plan is stepped on the local engine's Board, the array backed copy of the board, with the enemy ships staying
+        where they are. It is worth the weights of the actions it took, then the best weights of my ships once it is
+        stepped (the ships it lost are worth nothing), every turn discounted: weight_moves is the evaluation of the
+        leaves, and a ship that deposits gets the weight of depositing rather than the smaller one of an empty ship.
+        Keeps:
+            stats: plans evaluated, turns looked ahead and whether the time ran out, for the last search
+    """
+    # The engine's name of every action that isn't mining
+    names = {'N': 'NORTH', 'S': 'SOUTH', 'W': 'WEST', 'E': 'EAST', 'convert': 'CONVERT'}
+
+    def __init__(self, evaluate, depth=2, width=3, branching=2, discount=0.5, time_limit=1., clock=time.perf_counter):
+        self.evaluate = evaluate
+        self.depth = depth
+        self.width = width
+        self.branching = branching
+        self.discount = discount
+        self.time_limit = time_limit
+        self.clock = clock
+        self.stats = {}
+
+    def run(self, board, options, greedy, time_limit=None):
+        """
+            Returns ship_id: action of the first move of the best plan, None when not a single plan could be evaluated
+            params:
+                board: the local engine's Board of the turn
+                options: ship_id: [(action, weight)] best first of my ships, in the order the greedy mode decided them
+                greedy: ship_id: action the greedy mode chose, the first child of the turn
+                time_limit: seconds the search may take this turn, time_limit by default
+        """
+        deadline = self.clock() + (self.time_limit if time_limit is None else min(time_limit, self.time_limit))
+        self.stats = {'plans': 0, 'depth': 0, 'timeout': False}
+        # (value, weights of the actions taken so far, first move, board, options) of every plan in the beam
+        beam, best = [(0., 0., None, board, options)], None
+        for depth in range(self.depth):
+            children = []
+            for _, taken, first, parent, parent_options in beam:
+                for joint in self.joint_moves(parent, parent_options, greedy if first is None else None):
+                    if self.clock() > deadline:
+                        self.stats['timeout'] = True
+                        return best or self.best(children)
+                    child = self.step(parent, joint)
+                    child_options = self.evaluate(child)
+                    weights = {ship_id: dict(ranked) for ship_id, ranked in parent_options.items()}
+                    child_taken = taken + self.discount ** depth * sum(weights[ship_id].get(action, 0.)
+                                                                       for ship_id, action in joint.items())
+                    leaf = sum(ranked[0][1] for ranked in child_options.values() if ranked)
+                    children.append((child_taken + self.discount ** (depth + 1) * leaf, child_taken,
+                                     joint if first is None else first, child, child_options))
+                    self.stats['plans'] += 1
+            beam = sorted(children, key=lambda plan: -plan[0])[:self.width]
+            best = self.best(beam)
+            self.stats['depth'] = depth + 1
+        return best
+
+    @staticmethod
+    def best(plans):
+        return max(plans, key=lambda plan: plan[0])[2] if plans else None
+
+    def joint_moves(self, board, options, greedy=None):
+        """
+            Returns the joint moves tried from the board: everyone's best (or the greedy one) then, for each of the
+            `branching` ships closest to a tie, the same with that ship taking its second best (when neither converts)
+        """
+        ship_ids = [ship_id for ship_id in options if ship_id in board.ships]
+        first = greedy if greedy is not None else self.match(board, options, ship_ids)
+        moves = [first]
+        # A converted ship is worth nothing to the evaluation, so converting is never what a ship tries instead
+        gaps = [(ranked[0][1] - ranked[1][1], ship_id) for ship_id, ranked in options.items()
+                if ship_id in board.ships and len(ranked) > 1 and 'convert' not in (ranked[0][0], ranked[1][0])]
+        for _, ship_id in sorted(gaps, key=lambda gap: gap[0])[:self.branching]:
+            forced = dict(options)
+            forced[ship_id] = options[ship_id][1:2] + options[ship_id][:1] + options[ship_id][2:]
+            joint = self.match(board, forced, ship_ids)
+            if joint not in moves:
+                moves.append(joint)
+        return moves
+
+    def match(self, board, options, ship_ids):
+        """ Gives every ship the first of its actions whose cell is still free, the same CellMatching as the turn's """
+        matching = CellMatching()
+        for ship_id in ship_ids:
+            actions = [action for action, _ in options[ship_id]]
+            matching.add(ship_id, [(action, self.destination(board, ship_id, action))
+                                   for action in actions + ['mine'] * ('mine' not in actions)])
+        return matching.actions()
+
+    @staticmethod
+    def destination(board, ship_id, action):
+        """ Returns the flat index of the cell the ship ends the turn on, None when it converts """
+        size = board.configuration.size
+        index = board.ships[ship_id].position.to_index(size)
+        if action == 'convert':
+            return None
+        if action not in BeamSearch.names:
+            return index
+        table = offset_table(1, size)
+        return int(table.gather(index)[table.lookup[action]])
+
+    def step(self, board, joint):
+        """ Returns the board after my ships take the joint move, the other ships and the shipyards do nothing """
+        for ship_id in board.current_player.ship_ids:
+            action = joint.get(ship_id, 'mine')
+            board.ships[ship_id].next_action = ShipAction[self.names[action]] if action in self.names else None
+        return board.next()
@@ -0,0 +1,147 @@
+from collections import namedtuple
+from functools import cached_property
+import numpy as np
+from distances import DistanceMatrix
+from threats import ShipyardThreats
+from attraction import AttractionField
+from prediction import EnemyMoves
+
+# Light stand-in for Point when a position has to be rebuilt from a flat index
+Position = namedtuple('Position', ['x', 'y'])
+
+
+class BoardSnapshot:
+    """
+        Dense NumPy copy of the board, built once per board and shared by every ship/shipyard decision
+        params:
+            board: the board that will be copied
+        Every per-cell array is flat and indexed like obs['halite'] (Point.to_index), -1 stands for an empty cell:
+            halite: halite of each cell
+            ship_owner, shipyard_owner: id of the player owning the ship/shipyard on the cell
+            ship_cargo: halite carried by the ship on the cell
+            ship_index, shipyard_index: index of the ship/shipyard in ship_ids/shipyard_ids
+        move_ship, remove_ship and add_shipyard update it in place when actions get committed during the turn
+        distances: the DistanceMatrix between all ships and shipyards, built the first time it is needed
+        threats(radius): the ShipyardThreats at the radius, built the first time it is needed and dropped on every change
+        attraction(radius, cells, growth): the AttractionField of the halite, nothing changes the halite during a turn
+        enemy_moves(): the EnemyMoves of the enemy ships, built from the board before any of my actions is committed
+    """
+    def __init__(self, board):
+        self.size = size = board.configuration.size
+        self.step = board.step
+        self.me = board.current_player_id
+        self.player_halite = np.array([player.halite for player in board.players.values()], dtype=float)
+
+        # Cell coordinates, so positions never have to be rebuilt from Point objects
+        cells = np.arange(size * size)
+        self.x = cells % size
+        self.y = size - 1 - cells // size
+
+        self.halite = np.zeros(size * size)
+        self.halite[[position.to_index(size) for position in board.cells]] = [cell.halite for cell in board.cells.values()]
+
+        # Ships: one entry per ship then scattered on the board
+        ships = list(board.ships.values())
+        self.ship_ids = [ship.id for ship in ships]
+        self.ship_lookup = {ship_id: index for index, ship_id in enumerate(self.ship_ids)}
+        self.ship_pos = np.array([ship.position.to_index(size) for ship in ships], dtype=int)
+        self.ship_player = np.array([ship.player_id for ship in ships], dtype=int)
+        self.ship_halite = np.array([ship.halite for ship in ships], dtype=float)
+
+        self.ship_owner = np.full(size * size, -1, dtype=int)
+        self.ship_cargo = np.zeros(size * size)
+        self.ship_index = np.full(size * size, -1, dtype=int)
+        self.ship_owner[self.ship_pos] = self.ship_player
+        self.ship_cargo[self.ship_pos] = self.ship_halite
+        self.ship_index[self.ship_pos] = np.arange(len(ships))
+
+        # Shipyards
+        shipyards = list(board.shipyards.values())
+        self.shipyard_ids = [shipyard.id for shipyard in shipyards]
+        self.shipyard_lookup = {shipyard_id: index for index, shipyard_id in enumerate(self.shipyard_ids)}
+        self.shipyard_pos = np.array([shipyard.position.to_index(size) for shipyard in shipyards], dtype=int)
+        self.shipyard_player = np.array([shipyard.player_id for shipyard in shipyards], dtype=int)
+
+        self.shipyard_owner = np.full(size * size, -1, dtype=int)
+        self.shipyard_index = np.full(size * size, -1, dtype=int)
+        self.shipyard_owner[self.shipyard_pos] = self.shipyard_player
+        self.shipyard_index[self.shipyard_pos] = np.arange(len(shipyards))
+
+    @cached_property
+    def distances(self):
+        return DistanceMatrix(self.ship_pos, self.shipyard_pos, self.size)
+
+    def threats(self, radius=10):
+        """ Returns the ShipyardThreats of the board at the radius, shared until something moves """
+        cache = self.__dict__.setdefault('_threats', {})
+        if radius not in cache:
+            cache[radius] = ShipyardThreats(self, radius)
+        return cache[radius]
+
+    def attraction(self, radius=10, cells=None, growth=1.):
+        """ Returns the AttractionField of the halite for the grid, shared by every ship of the turn """
+        cache = self.__dict__.setdefault('_attraction', {})
+        if (radius, cells, growth) not in cache:
+            cache[radius, cells, growth] = AttractionField(self.halite, self.size, radius, cells, growth)
+        return cache[radius, cells, growth]
+
+    def enemy_moves(self):
+        """ Returns the EnemyMoves of the turn, the enemy ships don't move during a turn so it is built once """
+        if '_enemy_moves' not in self.__dict__:
+            self._enemy_moves = EnemyMoves(self)
+        return self._enemy_moves
+
+    def move_ship(self, ship_index, position, cargo):
+        """ Puts a ship on another flat position with the given cargo, the per-cell arrays and the distances follow it """
+        origin = self.ship_pos[ship_index]
+        # Leave the cell, unless another ship already moved onto it
+        if self.ship_index[origin] == ship_index:
+            self.ship_owner[origin], self.ship_cargo[origin], self.ship_index[origin] = -1, 0, -1
+
+        self.ship_pos[ship_index], self.ship_halite[ship_index] = position, cargo
+        self.ship_owner[position] = self.ship_player[ship_index]
+        self.ship_cargo[position], self.ship_index[position] = cargo, ship_index
+        if 'distances' in self.__dict__:
+            self.distances.move(self.distances.ship(ship_index), position)
+        self.__dict__.pop('_threats', None)
+
+    def remove_ship(self, ship_index):
+        """ Takes a ship off the board, the ships after it shift down by one index """
+        position = self.ship_pos[ship_index]
+        if self.ship_index[position] == ship_index:
+            self.ship_owner[position], self.ship_cargo[position], self.ship_index[position] = -1, 0, -1
+
+        del self.ship_ids[ship_index]
+        self.ship_lookup = {ship_id: index for index, ship_id in enumerate(self.ship_ids)}
+        self.ship_pos = np.delete(self.ship_pos, ship_index)
+        self.ship_player = np.delete(self.ship_player, ship_index)
+        self.ship_halite = np.delete(self.ship_halite, ship_index)
+        self.ship_index[self.ship_index > ship_index] -= 1
+        self.__dict__.pop('distances', None)
+        self.__dict__.pop('_threats', None)
+
+    def add_shipyard(self, shipyard_id, position, player):
+        """ Adds a shipyard on a flat position """
+        self.shipyard_lookup[shipyard_id] = len(self.shipyard_ids)
+        self.shipyard_ids.append(shipyard_id)
+        self.shipyard_pos = np.append(self.shipyard_pos, position)
+        self.shipyard_player = np.append(self.shipyard_player, player)
+        self.shipyard_owner[position], self.shipyard_index[position] = player, len(self.shipyard_ids) - 1
+        self.__dict__.pop('distances', None)
+        self.__dict__.pop('_threats', None)
+
+    def index(self, position):
+        """ Returns the flat index of a Point """
+        return (self.size - position.y - 1) * self.size + position.x
+
+    def point(self, index):
+        """ Returns the (x, y) position of a flat index """
+        return Position(int(self.x[index]), int(self.y[index]))
+
+    def my_ships(self):
+        """ Returns the indices (in ship_ids) of the current player's ships """
+        return np.flatnonzero(self.ship_player == self.me)
+
+    def my_shipyards(self):
+        """ Returns the indices (in shipyard_ids) of the current player's shipyards """
+        return np.flatnonzero(self.shipyard_player == self.me)
@@ -0,0 +1,43 @@
+import copy
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+import corpus
+import mod
+
+
+@pytest.fixture(autouse=True)
+def quiet(tmp_path, monkeypatch):
+    # The agents write their logs in the working directory
+    monkeypatch.chdir(tmp_path)
+
+
+def no_shipyard(halite, ships):
+    """ An early corpus board where player 0 lost its shipyards and has empty ships spread over the board """
+    states, configuration = corpus.load()
+    observation = copy.deepcopy(states[0]['observation'])
+    observation['step'], observation['player'] = 60, 0
+    observation['players'][0] = [halite, {}, {'%s-9' % n: [21 * (1 + 3 * n) + 10, 0] for n in range(ships)}]
+    return observation, configuration
+
+
+@pytest.mark.parametrize('halite, ships', [(3000, 4), (520, 3)])
+def test_one_conversion_per_turn(halite, ships):
+    """ Every ship wants to convert without a shipyard, only one of them does and the others stay ships """
+    observation, configuration = no_shipyard(halite, ships)
+    actions = mod.agent(copy.deepcopy(observation), configuration)
+    assert list(actions.values()).count('CONVERT') == 1
+
+    # None of the ships that don't convert ends the turn on another one's cell
+    board = mod.Board(observation, configuration)
+    for ship_id, action in actions.items():
+        board.ships[ship_id].next_action = mod.ShipAction[action]
+    board = board.next()
+    assert len(board.players[0].shipyards) == 1
+    assert len(board.players[0].ships) == ships - 1
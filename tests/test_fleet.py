@@ -0,0 +1,44 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+import corpus
+import mod
+from snapshot import BoardSnapshot
+from assignment import FleetTargets
+
+
+def states():
+    """ The benchmark corpus (up to 80 ships) and a few turns of a game between four mods, every player's fleet """
+    saved, configuration = corpus.load()
+    observations = [state['observation'] for state in saved]
+    observations += corpus.play_states({1, 20, 60, 120}, agents=('mod',) * 4, seed=3).values()
+    return [({**observation, 'player': player}, configuration) for observation in observations
+            for player, (_, _, ships) in enumerate(observation['players']) if ships]
+
+
+@pytest.fixture(autouse=True)
+def quiet(tmp_path, monkeypatch):
+    # The agents write their logs in the working directory
+    monkeypatch.chdir(tmp_path)
+
+
+@pytest.mark.parametrize('observation, configuration', states())
+def test_fleet_weights_match_per_ship(observation, configuration):
+    """ FleetDecisions gives every ship the weights and the action of its own DecisionShip.weight_moves """
+    board = mod.Board(observation, configuration)
+    snapshot = BoardSnapshot(board)
+    targets = FleetTargets(snapshot, mod.fields.get(snapshot), board.configuration.episode_steps - board.step).targets
+    ship_ids = [ship.id for ship in board.current_player.ships]
+
+    fleet = mod.weigh_fleet(board, ship_ids, board.step, snapshot, targets=targets)
+    for ship_id in ship_ids:
+        single = mod.DecisionShip(board, ship_id, board.step, snapshot, target=targets.get(ship_id))
+        action = single.determine()[1]
+        assert fleet[ship_id].determine()[1] == action, ship_id
+        assert fleet[ship_id].weights == pytest.approx(single.weights, rel=1e-9, abs=1e-9), ship_id
@@ -0,0 +1,51 @@
+import numpy as np
+
+
+class ShipyardThreats:
+    """
+        The ships and shipyards around every shipyard, measured once for all the ship and shipyard decisions of a turn
+        params:
+            snapshot: the BoardSnapshot, its distances give the moves between every shipyard and everything else
+            radius: only what is 1 to `radius` moves away from a shipyard counts
+        A ship counts when it is the one the snapshot shows on its cell: once a committed ship of mine moves onto an
+        enemy ship's cell only mine is seen there, like a grid of the board's cells sees it.
+        One row per shipyard (its index in snapshot.shipyard_ids):
+            moves: moves to every ship (one column per ship_ids entry)
+            own, enemy: whether each ship is within the radius and belongs to the shipyard's owner / someone else
+            shipyard_moves, own_shipyards, enemy_shipyards: the same between the shipyards
+            threat, defence: distance weighted sum (1 / moves ** 2) of the enemy / own ships around the shipyard
+        Get it with snapshot.threats(radius), the snapshot drops it as soon as a committed action moves something.
+    """
+    def __init__(self, snapshot, radius=10):
+        self.radius = radius
+        distances = snapshot.distances
+        rows = distances.shipyards()
+        owner = snapshot.shipyard_player[:, None]
+
+        self.moves = distances.moves[rows, :distances.ships]
+        shown = snapshot.ship_index[snapshot.ship_pos] == np.arange(len(snapshot.ship_pos))
+        within = (self.moves > 0) & (self.moves <= radius) & shown[None, :]
+        self.own = within & (snapshot.ship_player[None, :] == owner)
+        self.enemy = within & (snapshot.ship_player[None, :] != owner)
+
+        self.shipyard_moves = distances.moves[rows, rows]
+        within = (self.shipyard_moves > 0) & (self.shipyard_moves <= radius)
+        self.own_shipyards = within & (snapshot.shipyard_player[None, :] == owner)
+        self.enemy_shipyards = within & (snapshot.shipyard_player[None, :] != owner)
+
+        near = self.inverse(2)
+        self.threat, self.defence = self.enemies(near), self.own_ships(near)
+
+    def inverse(self, power=1, scale=1., moves=None):
+        """ Returns scale / moves ** power of every ship (or of the given moves), 0 where the moves are 0 """
+        moves = self.moves if moves is None else moves
+        with np.errstate(divide='ignore'):
+            return np.where(moves > 0, scale / moves ** power, 0.)
+
+    def enemies(self, values=None):
+        """ Sums the values (one per ship, or one per shipyard and ship) over the enemy ships of every shipyard, counts them without values """
+        return (self.enemy if values is None else np.where(self.enemy, values, 0.)).sum(axis=1)
+
+    def own_ships(self, values=None):
+        """ Sums the values over the own ships of every shipyard, counts them without values """
+        return (self.own if values is None else np.where(self.own, values, 0.)).sum(axis=1)
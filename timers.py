@@ -0,0 +1,103 @@
+import time
+
+
+class _Off:
+    """ What phase() hands out while the timers are off, entering and leaving it does nothing """
+    __slots__ = ()
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exception):
+        return False
+
+
+_OFF = _Off()
+
+
+class _Phase:
+    __slots__ = ('timer', 'name', 'start')
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exception):
+        self.timer.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class PhaseTimer:
+    """
+        Optional timers around the phases of a turn, summed per turn and per game
+        params:
+            enabled: the timers are off by default, phase() then costs one call and an empty with block
+        Keeps:
+            turn: name: [seconds, calls] of the turn being played
+            turns: (step, seconds, {name: (seconds, calls)}) of every turn that ended
+            game: name: [seconds, calls] over all the turns
+        Usage: start_turn() when the turn starts, `with timer.phase('name'):` around each phase and end_turn(step)
+        once the actions are decided. Phases can be nested, each one counts its own time (children included).
+    """
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.turn, self.turn_start = {}, None
+        self.reset()
+
+    def reset(self):
+        """ Forgets the turns that ended (e.g. when a new game starts), the running one is kept """
+        self.turns, self.game = [], {}
+
+    def phase(self, name):
+        if not self.enabled:
+            return _OFF
+        return _Phase(self, name)
+
+    def add(self, name, seconds):
+        """ Adds the time spent in a phase to the running turn """
+        total = self.turn.setdefault(name, [0., 0])
+        total[0] += seconds
+        total[1] += 1
+
+    def start_turn(self):
+        if self.enabled:
+            self.turn, self.turn_start = {}, time.perf_counter()
+
+    def end_turn(self, step):
+        """ Closes the turn, its phases are added to the game's """
+        if not self.enabled or self.turn_start is None:
+            return
+        elapsed = time.perf_counter() - self.turn_start
+        self.turns.append((step, elapsed, {name: tuple(total) for name, total in self.turn.items()}))
+        for name, (seconds, calls) in self.turn.items():
+            total = self.game.setdefault(name, [0., 0])
+            total[0] += seconds
+            total[1] += calls
+        self.turn, self.turn_start = {}, None
+
+    def turn_summary(self):
+        """ One line with the milliseconds of every phase of the last turn """
+        if not self.turns:
+            return ''
+        step, elapsed, phases = self.turns[-1]
+        return 'timing %s| turn %.1fms, ' % (step + 1, elapsed * 1e3) + \
+            ', '.join('%s %.1fms/%s' % (name, seconds * 1e3, calls) for name, (seconds, calls) in phases.items())
+
+    def summary(self):
+        """ Table of the phases over the game: calls, total, mean per call, mean and max per turn, share of the turns """
+        if not self.turns:
+            return 'timing: no turns'
+        game_time = sum(elapsed for _, elapsed, _ in self.turns)
+        worst_turn = max((elapsed * 1e3, step + 1) for step, elapsed, _ in self.turns)
+        lines = ['timing over %s turns, %.1fms per turn (max %.1fms at step %s)' % (
+            len(self.turns), game_time / len(self.turns) * 1e3, *worst_turn),
+            '%-20s %8s %10s %10s %10s %10s %6s' % ('phase', 'calls', 'total ms', 'us/call', 'ms/turn', 'max ms', 'share')]
+        for name, (seconds, calls) in sorted(self.game.items(), key=lambda item: -item[1][0]):
+            worst = max(phases[name][0] for _, _, phases in self.turns if name in phases)
+            lines.append('%-20s %8s %10.1f %10.1f %10.2f %10.2f %5.1f%%' % (
+                name, calls, seconds * 1e3, seconds / calls * 1e6, seconds / len(self.turns) * 1e3, worst * 1e3,
+                100 * seconds / game_time))
+        return '\n'.join(lines)
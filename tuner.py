@@ -0,0 +1,208 @@
+import argparse
+import json
+import math
+import os
+import random
+import time
+from multiprocessing import Pool
+
+import runner
+from engine import Game
+
+
+def score(rewards, seat):
+    """ Returns how many of the other players the seat beat, a tie counting for half """
+    return sum((rewards[seat] > reward) + 0.5 * (rewards[seat] == reward)
+               for other, reward in enumerate(rewards) if other != seat)
+
+
+def defaults():
+    """ Returns mod's PARAMETERS, read in a worker where mod is loaded the way the games load it """
+    return dict(runner.load_agent('mod', 0).PARAMETERS)
+
+
+def play(job):
+    """
+        Plays one game of a candidate against three copies of the incumbent, every seat of mod gets its own parameters
+        job being (candidate index, candidate's parameters, incumbent's parameters, seed, the candidate's seat)
+        Returns the candidate index, its score and the traceback of the candidate's seat when it crashed (None if not)
+    """
+    index, parameters, incumbent, seed, seat = job
+    modules = [runner.load_agent('mod', n) for n in range(4)]
+    for n, module in enumerate(modules):
+        module.PARAMETERS = dict(parameters if n == seat else incumbent)
+    game = Game([module.agent for module in modules], {'episodeSteps': runner._options.get('steps', 400)}, seed)
+    return index, score(game.run(), seat), game.errors[seat]
+
+
+class Tuner:
+    """
+        Genetic search over mod.PARAMETERS with successive halving of the games
+        params:
+            defaults: the parameters the search starts from (mod.PARAMETERS), also the first incumbent
+            population: candidates per generation
+            games: games every candidate still in the running plays per round
+            rounds: rounds of a generation, each one keeps the better half of the candidates
+            sigma: standard deviation of a mutation, on the log of the parameter (signs never change)
+            mutation: chance of every parameter to mutate
+            confirm: games the best candidate of a generation plays again, on maps no candidate played, before it can
+                become the incumbent (0 promotes it on its fitness alone)
+            margin: standard errors the mean of those games has to be above 1.5 by
+            seed: the seed of the search, a generation only depends on it and on the checkpoint
+        Every candidate plays against three copies of the incumbent on the same maps as the other candidates of the
+        round, its fitness is the mean number of players it beat (1.5 is as good as the incumbent). The best fitness
+        of a generation is the luckiest of many noisy means, so the best candidate only becomes the incumbent when it
+        also beats 1.5 by `margin` standard errors over `confirm` fresh games. The survivors of the last round breed
+        the next generation. The state is kept in a JSON checkpoint after every round so a search can be resumed, with the
+        tracebacks of the candidates that crashed.
+    """
+    def __init__(self, defaults, population=16, games=4, rounds=3, sigma=0.3, mutation=0.3, confirm=16, margin=1.,
+                 seed=0):
+        self.defaults = dict(defaults)
+        self.size = population
+        self.games = games
+        self.rounds = rounds
+        self.sigma = sigma
+        self.mutation = mutation
+        self.confirm = confirm
+        self.margin = margin
+        self.seed = seed
+        self.state = {'generation': 0, 'round': 0, 'incumbent': dict(defaults), 'population': None,
+                      'scores': None, 'history': [], 'errors': []}
+
+    def load(self, path):
+        """ Resumes from a checkpoint, keeps the fresh state when there is none """
+        if path and os.path.exists(path):
+            with open(path) as file:
+                self.state = json.load(file)
+
+    def save(self, path):
+        """ Writes the checkpoint, the old one is only replaced once the new one is complete """
+        if not path:
+            return
+        with open(path + '.tmp', 'w') as file:
+            json.dump(self.state, file, indent=1)
+        os.replace(path + '.tmp', path)
+
+    def rng(self, *keys):
+        return random.Random('%s-%s' % (self.seed, '-'.join(map(str, keys))))
+
+    def maps(self, games, *keys):
+        """ Returns (seed, candidate's seat) of the games, drawn from the keys """
+        rng = self.rng(*keys)
+        return [(rng.randrange((1 << 31) - 1), rng.randrange(4)) for _ in range(games)]
+
+    def results(self, pool, jobs, where, log):
+        """ Yields (candidate index, score) of the jobs played by the pool's workers, the crashes are logged and kept """
+        for n, result, error in pool.imap_unordered(play, jobs):
+            # A crashed seat ends with no halite, without its traceback it would only look like a weak candidate
+            if error:
+                self.state.setdefault('errors', []).append({'where': where, 'candidate': n, 'error': error})
+                log('%s: candidate %s crashed\n%s' % (where, n, error.rstrip()))
+            yield n, result
+
+    def mutate(self, parameters, rng):
+        """ Multiplies some of the parameters by a log-normal factor """
+        return {name: value * math.exp(rng.gauss(0, self.sigma)) if rng.random() < self.mutation and value != 0 else value
+                for name, value in parameters.items()}
+
+    def breed(self, parents, rng):
+        """ Returns the next population: the parents then their mutated uniform crossovers """
+        children = [dict(parent) for parent in parents]
+        while len(children) < self.size:
+            mother, father = rng.choice(parents), rng.choice(parents)
+            child = {name: (mother if rng.random() < 0.5 else father)[name] for name in self.defaults}
+            children.append(self.mutate(child, rng))
+        return children
+
+    def first_population(self):
+        """ The incumbent and its mutations """
+        rng = self.rng(0, 'population')
+        incumbent = self.state['incumbent']
+        return [dict(incumbent)] + [self.mutate(incumbent, rng) for _ in range(self.size - 1)]
+
+    def run(self, generations, pool, checkpoint=None, log=print):
+        """ Plays the generations that are left up to `generations`, the pool's workers run play() """
+        state = self.state
+        while state['generation'] < generations:
+            generation = state['generation']
+            if state['population'] is None:
+                state['population'] = self.first_population()
+                state['scores'] = [[] for _ in state['population']]
+            population, scores = state['population'], state['scores']
+
+            while state['round'] < self.rounds:
+                start = time.perf_counter()
+                alive = [n for n, games in enumerate(scores) if games is not None]
+                # Every candidate of the round plays the same maps from the same seats
+                maps = self.maps(self.games, generation, state['round'], 'games')
+                jobs = [(n, population[n], state['incumbent'], seed, seat) for n in alive for seed, seat in maps]
+                where = 'generation %s round %s' % (generation, state['round'])
+                for n, result in self.results(pool, jobs, where, log):
+                    scores[n].append(result)
+
+                # The better half goes on to the next round
+                ranked = sorted(alive, key=lambda n: -sum(scores[n]) / len(scores[n]))
+                for n in ranked[max(1, len(ranked) // 2):] if state['round'] < self.rounds - 1 else []:
+                    scores[n] = None
+                log('generation %s round %s: %s games in %.0fs, best %.2f over %s games' %
+                    (generation, state['round'], len(jobs), time.perf_counter() - start,
+                     sum(scores[ranked[0]]) / len(scores[ranked[0]]), len(scores[ranked[0]])))
+                state['round'] += 1
+                self.save(checkpoint)
+
+            ranked = sorted([n for n, games in enumerate(scores) if games is not None],
+                            key=lambda n: -sum(scores[n]) / len(scores[n]))
+            best = ranked[0]
+            fitness = sum(scores[best]) / len(scores[best])
+            confirmed, error, promote = None, None, fitness > 1.5
+            if promote and self.confirm:
+                maps = self.maps(self.confirm, generation, 'confirm')
+                jobs = [(best, population[best], state['incumbent'], seed, seat) for seed, seat in maps]
+                results = [result for _, result in self.results(pool, jobs, 'generation %s confirm' % generation, log)]
+                confirmed = sum(results) / len(results)
+                error = math.sqrt(sum((result - confirmed) ** 2 for result in results) /
+                                  max(len(results) - 1, 1) / len(results))
+                promote = confirmed - self.margin * error > 1.5
+            if promote:
+                state['incumbent'] = dict(population[best])
+            state['history'].append({'generation': generation, 'fitness': fitness, 'games': len(scores[best]),
+                                     'confirmed': confirmed, 'error': error, 'parameters': population[best],
+                                     'incumbent': promote})
+            log('generation %s: best %.2f%s%s' % (generation, fitness,
+                                                  '' if confirmed is None else ', %.2f +- %.2f over %s fresh games' %
+                                                  (confirmed, error, self.confirm),
+                                                  ', new incumbent' if promote else ''))
+
+            parents = [population[n] for n in ranked]
+            state['population'] = self.breed(parents, self.rng(generation + 1, 'population'))
+            state['scores'] = [[] for _ in state['population']]
+            state['generation'], state['round'] = generation + 1, 0
+            self.save(checkpoint)
+        return state['incumbent']
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Tunes mod.py's PARAMETERS with a genetic search over local games")
+    parser.add_argument('-g', '--generations', type=int, default=10)
+    parser.add_argument('--population', type=int, default=16)
+    parser.add_argument('-n', '--games', type=int, default=4, help='games per candidate and round')
+    parser.add_argument('--rounds', type=int, default=3, help='successive halving rounds per generation')
+    parser.add_argument('--sigma', type=float, default=0.3)
+    parser.add_argument('--mutation', type=float, default=0.3)
+    parser.add_argument('--confirm', type=int, default=16, help="fresh games the generation's best plays before it is promoted")
+    parser.add_argument('--margin', type=float, default=1., help='standard errors above 1.5 those games need')
+    parser.add_argument('-p', '--processes', type=int, default=None, help='every core by default')
+    parser.add_argument('--steps', type=int, default=400)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--checkpoint', default='tuner.json', help='JSON file the search is saved to and resumed from')
+    args = parser.parse_args()
+
+    options = {'agents': ['mod'], 'steps': args.steps, 'verbose': False, 'helpers': False, 'traces': None}
+    with Pool(args.processes, initializer=runner._init_worker, initargs=(options,)) as pool:
+        tuner = Tuner(pool.apply(defaults), args.population, args.games, args.rounds, args.sigma, args.mutation,
+                      args.confirm, args.margin, args.seed)
+        tuner.load(args.checkpoint)
+        incumbent = tuner.run(args.generations, pool, args.checkpoint)
+
+    print('PARAMETERS = %r' % incumbent)